@@ -80,6 +80,9 @@ class Settings(BaseSettings):
     local_llm_context_size: int = 8192
     local_llm_gpu_layers: int = 0  # Set to -1 for all layers on GPU (Metal on macOS)
     local_llm_threads: int = 4
+    local_llm_max_queue: int = 8  # inference requests waiting for the model
+    local_llm_max_tokens: int = 2048  # hard cap on tokens generated per request
+    local_llm_deadline_seconds: float = 120.0  # queue wait + generation, per request
 
     # ── Embedding Configuration ──────────────────────────────────────
     embedding_model: str = "law-ai/InLegalBERT"
@@ -93,6 +96,18 @@ class Settings(BaseSettings):
     rag_bm25_weight: float = 0.4
     rag_semantic_weight: float = 0.6
 
+    # ── Chat Admission Control ───────────────────────────────────────
+    chat_max_concurrent: int = 8  # chat answers generated at once per worker
+    chat_max_queue: int = 32  # waiting beyond this is rejected with 503
+
+    # ── LLM Provider HTTP Pools ──────────────────────────────────────
+    llm_http2: bool = True
+    llm_max_connections: int = 20  # per provider
+    llm_max_keepalive_connections: int = 10
+    llm_keepalive_expiry_seconds: float = 60.0
+    llm_connect_timeout_seconds: float = 5.0
+    llm_read_timeout_seconds: float = 120.0
+
     # ── RAG Data Source Configuration ────────────────────────────────
     jurisgpt_vector_store: str = "local"
     jurisgpt_llm_type: str = "anthropic"  # anthropic (PageGrid), openai, or local_legal_llama
@@ -4,6 +4,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.services.provider_clients import provider_clients
 
 logger = logging.getLogger(__name__)
 from app.routes import (
@@ -63,6 +64,7 @@ async def lifespan(app: FastAPI):
     yield
     # ── shutdown ──
     logger.info("JurisGPT API shutting down")
+    await provider_clients.aclose()
 
 
 app = FastAPI(
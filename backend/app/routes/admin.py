@@ -1,6 +1,7 @@
 import logging
 
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 from uuid import UUID
 from datetime import datetime, timezone
@@ -136,15 +137,30 @@ async def request_changes(
 
 
 @router.post("/reload-corpus")
-async def reload_corpus(admin: dict = Depends(require_admin)):
-    """Rebuild the RAG corpus and BM25 index without a redeploy.
+async def reload_corpus(full: bool = False, wait: bool = False, admin: dict = Depends(require_admin)):
+    """Update the RAG corpus and BM25 index without a redeploy.
 
     Run data/ingest_updates.py (Indian Kanoon refresh) first, then call this
-    endpoint so the chatbot can cite the newly ingested judgments.
+    endpoint so the chatbot can cite the newly ingested judgments. Changes to
+    the ingested judgments and Obsidian notes are applied to the live index
+    in place; ``?full=true`` (or any other corpus file changing) rebuilds it
+    in the background while the current index keeps serving chat requests.
+    Poll ``GET /reload-corpus/status`` for progress, or pass ``?wait=true``
+    to block until the rebuild has been swapped in.
     """
     from app.services.chatbot_service import chatbot_service
 
-    result = chatbot_service.reload_corpus()
+    # An incremental refresh re-reads and re-indexes files before returning:
+    # keep it off the event loop as well as the blocking full rebuild.
+    result = await run_in_threadpool(chatbot_service.reload_corpus, full=full, wait=wait)
     if not result.get("success"):
         raise HTTPException(status_code=503, detail=result.get("error", "reload failed"))
     return result
+
+
+@router.get("/reload-corpus/status")
+async def reload_corpus_status(admin: dict = Depends(require_admin)):
+    """Report the state, build phase and timings of the last corpus reload."""
+    from app.services.chatbot_service import chatbot_service
+
+    return chatbot_service.reload_status()
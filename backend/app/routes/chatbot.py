@@ -8,9 +8,13 @@ Supports:
 - Document generation assistance
 """
 
+import asyncio
 import json
-from fastapi import APIRouter, HTTPException, Depends
+from contextlib import aclosing
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 
@@ -21,10 +25,20 @@ from app.services.chatbot_service import (
     ChatMessage as ChatMessageModel,
     CitationModel
 )
+from app.services.chat_admission import (
+    PRIORITY_AUTHENTICATED,
+    ChatQueueFull,
+    ChatSlot,
+    chat_admission,
+)
+from app.services.inference_worker import inference_priority
 from app.routes.auth import require_auth
 
 router = APIRouter(tags=["Chatbot"], dependencies=[Depends(require_auth)])
 
+# How often a pending answer checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+
 
 class ChatMessageRequest(BaseModel):
     """Request model for chat endpoint"""
@@ -63,6 +77,7 @@ class ChatMessageResponse(BaseModel):
     error: Optional[str] = None
     model_used: Optional[str] = None  # Which model generated the answer
     corpus_as_of: Optional[str] = None  # How current the legal sources are
+    served_from_cache: bool = False  # Answer reused from the RAG answer cache
 
     # Legacy fields for backwards compatibility
     message: str = ""  # Alias for answer
@@ -121,6 +136,7 @@ def _response_to_api(response: ChatResponse) -> ChatMessageResponse:
         error=response.error,
         model_used=response.model_used,
         corpus_as_of=response.corpus_as_of,
+        served_from_cache=response.served_from_cache,
         # Legacy fields
         message=response.answer,
         sources=response.sources,
@@ -130,10 +146,57 @@ def _response_to_api(response: ChatResponse) -> ChatMessageResponse:
     )
 
 
+async def _run_until_disconnect(http_request: Request, coro):
+    """Await ``coro``, cancelling it if the client disconnects first.
+
+    Cancellation reaches the pipeline's async LLM call, so an abandoned
+    request stops spending provider tokens.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                task.cancel()
+                # 499: client closed request (nobody receives the response)
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+async def _admit(priority: int) -> ChatSlot:
+    """A chat admission slot, or 503 + Retry-After when the queue is full.
+
+    Also sets the request's ``inference_priority``, so the local model's
+    queue serves requests in admission-priority order too.
+    """
+    inference_priority.set(priority)
+    try:
+        return await chat_admission.acquire(priority)
+    except ChatQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail="The legal assistant is busy. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+async def _admitted_legal_response(chat_request: ChatRequest, priority: int) -> ChatResponse:
+    """``aget_legal_response`` once admitted; a cancelled waiter leaves the queue."""
+    slot = await _admit(priority)
+    try:
+        return await chatbot_service.aget_legal_response(chat_request)
+    finally:
+        slot.release()
+
+
 # ─── Standard JSON Endpoint ─────────────────────────────────────────
 
 @router.post("/message", response_model=ChatMessageResponse)
-async def send_chat_message(request: ChatMessageRequest):
+async def send_chat_message(request: ChatMessageRequest, http_request: Request):
     """
     Send a message to the JurisGPT legal research assistant.
 
@@ -153,8 +216,12 @@ async def send_chat_message(request: ChatMessageRequest):
     """
     try:
         chat_request = _build_chat_request(request)
-        response = chatbot_service.get_legal_response(chat_request)
+        response = await _run_until_disconnect(
+            http_request, _admitted_legal_response(chat_request, PRIORITY_AUTHENTICATED)
+        )
         return _response_to_api(response)
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception:
@@ -165,21 +232,62 @@ async def send_chat_message(request: ChatMessageRequest):
 
 # ─── SSE Streaming Endpoint (Phase 4.1) ─────────────────────────────
 
+def _sse_citations(citations) -> str:
+    """``citations`` event with content previews, sent right after retrieval."""
+    citations_data = [
+        {
+            "title": c.title,
+            "content": c.content[:300] + "..." if len(c.content) > 300 else c.content,
+            "doc_type": c.doc_type,
+            "source": c.source,
+            "relevance": c.relevance,
+            "section": c.section,
+            "act": c.act,
+            "url": c.url,
+        }
+        for c in citations
+    ]
+    return f"event: citations\ndata: {json.dumps(citations_data)}\n\n"
+
+
+def _sse_metadata(rag, *, confidence, limitations, grounded, follow_ups, model_used) -> str:
+    """``metadata`` event of a streamed RAG answer."""
+    metadata = {
+        "confidence": confidence,
+        "limitations": limitations,
+        "grounded": grounded,
+        "follow_up_questions": follow_ups,
+        "model_used": model_used,
+        "corpus_as_of": getattr(rag, "corpus_as_of", None),
+        "is_document": False,
+        "document_type": None,
+    }
+    return f"event: metadata\ndata: {json.dumps(metadata)}\n\n"
+
+
 @router.post("/stream")
 async def stream_chat_message(request: ChatMessageRequest):
     """
     Stream a response from the JurisGPT legal research assistant via SSE.
 
     Streams token-by-token using Server-Sent Events:
-    - `event: token` — individual tokens as they are generated
-    - `event: citations` — citation data (sent after answer completes)
+    - `event: citations` — citation data (sent right after retrieval)
     - `event: metadata` — confidence, limitations, follow-ups
+    - `event: token` — individual tokens as they are generated
+    - `event: correction` — the full answer after citation verification,
+      replacing the streamed text (only sent when verification changed it)
     - `event: done` — signals stream completion
     - `event: error` — error information
 
-    Requires local LLM for true streaming. Falls back to sending
-    the full response as a single event if streaming is not available.
+    Streams from the local LLM or the configured Anthropic / OpenAI model.
+    Falls back to sending the full response as a single event when no LLM
+    is available, for document generation, and for answers served from the
+    response caches; a completed stream is stored in those caches.
+    A client disconnect cancels the stream, closing the LLM stream with it.
+    Returns 503 with Retry-After (before streaming) when the chat queue is full.
     """
+    slot = await _admit(PRIORITY_AUTHENTICATED)
+
     async def event_stream():
         try:
             chat_request = _build_chat_request(request)
@@ -188,7 +296,7 @@ async def stream_chat_message(request: ChatMessageRequest):
             # service path as JSON responses so metadata and document markers
             # stay consistent.
             if chatbot_service._is_document_generation_request(chat_request.message):
-                response = chatbot_service.get_legal_response(chat_request)
+                response = await chatbot_service.aget_legal_response(chat_request)
                 yield f"event: token\ndata: {json.dumps({'token': response.answer})}\n\n"
                 yield f"event: citations\ndata: {json.dumps([])}\n\n"
                 metadata = {
@@ -205,95 +313,96 @@ async def stream_chat_message(request: ChatMessageRequest):
                 yield f"event: done\ndata: {{}}\n\n"
                 return
 
-            chatbot_service._lazy_init()
-
-            # If RAG pipeline has a local LLM, use streaming
-            rag = chatbot_service.rag
-            if rag and hasattr(rag, 'local_llm') and rag.local_llm is not None:
-                # Retrieve citations using the same enhanced query path as
-                # non-streaming JSON responses.
-                enhanced_query = chatbot_service._build_enhanced_query(chat_request)
-                citations = rag.retrieve(enhanced_query)
-                confidence = rag._assess_confidence(enhanced_query, citations)
-                limitations = rag._generate_limitations(enhanced_query, citations, confidence)
-
-                # Stream tokens
-                for token in rag.stream_answer(enhanced_query, citations):
-                    payload = json.dumps({"token": token})
-                    yield f"event: token\ndata: {payload}\n\n"
-
-                # Send citations
-                citations_data = [
-                    {
-                        "title": c.title,
-                        "content": c.content[:300] + "..." if len(c.content) > 300 else c.content,
-                        "doc_type": c.doc_type,
-                        "source": c.source,
-                        "relevance": c.relevance,
-                        "section": c.section,
-                        "act": c.act,
-                        "url": c.url,
+            await run_in_threadpool(chatbot_service._lazy_init)
+
+            # Pin the pipeline for the whole stream: a corpus reload may swap
+            # chatbot_service.rag before the last token is sent.
+            with chatbot_service.rag_lease() as rag:
+                # Stream from whichever LLM is configured (local Legal Llama,
+                # Anthropic or OpenAI); citations and metadata go out as soon
+                # as retrieval finishes, before the first token.
+                if rag and (getattr(rag, "local_llm", None) is not None or getattr(rag, "llm", None) is not None):
+                    # Same enhanced query, and so the same exact / semantic
+                    # answer cache entries, as non-streaming JSON responses.
+                    enhanced_query = chatbot_service._build_enhanced_query(chat_request)
+                    async with aclosing(rag.astream_query_events(enhanced_query)) as events:
+                        async for kind, value in events:
+                            if kind == "response":
+                                # Cache hit: replayed whole, in the streaming event order
+                                yield _sse_citations(value.citations)
+                                yield _sse_metadata(
+                                    rag,
+                                    confidence=value.confidence,
+                                    limitations=value.limitations,
+                                    grounded=value.grounded,
+                                    follow_ups=value.follow_up_questions,
+                                    model_used=value.model_used,
+                                )
+                                yield f"event: token\ndata: {json.dumps({'token': value.answer})}\n\n"
+                            elif kind == "citations":
+                                # Citations and metadata go out before the first token
+                                confidence = rag._assess_confidence(enhanced_query, value)
+                                yield _sse_citations(value)
+                                yield _sse_metadata(
+                                    rag,
+                                    confidence=confidence,
+                                    limitations=rag._generate_limitations(enhanced_query, value, confidence),
+                                    grounded=confidence in ("high", "medium"),
+                                    follow_ups=rag._generate_follow_ups(enhanced_query, value),
+                                    model_used=rag.streaming_model(value, confidence),
+                                )
+                            elif kind == "token":
+                                yield f"event: token\ndata: {json.dumps({'token': value})}\n\n"
+                            else:
+                                # The citation audit's correction of the streamed answer
+                                yield f"event: correction\ndata: {json.dumps({'answer': value})}\n\n"
+                    yield f"event: done\ndata: {{}}\n\n"
+                else:
+                    # No streaming LLM — get full response and send as single event
+                    response = await chatbot_service.aget_legal_response(chat_request)
+
+                    # Send full answer as one token event
+                    yield f"event: token\ndata: {json.dumps({'token': response.answer})}\n\n"
+
+                    # Send citations
+                    citations_data = [
+                        {
+                            "title": c.title,
+                            "content": c.content,
+                            "doc_type": c.doc_type,
+                            "source": c.source,
+                            "relevance": c.relevance,
+                            "section": c.section,
+                            "act": c.act,
+                            "url": c.url,
+                        }
+                        for c in response.citations
+                    ]
+                    yield f"event: citations\ndata: {json.dumps(citations_data)}\n\n"
+
+                    metadata = {
+                        "confidence": response.confidence,
+                        "limitations": response.limitations,
+                        "grounded": response.grounded,
+                        "follow_up_questions": response.follow_up_questions,
+                        "model_used": getattr(response, "model_used", None),
+                        "corpus_as_of": getattr(response, "corpus_as_of", None),
+                        "is_document": response.is_document,
+                        "document_type": response.document_type,
                     }
-                    for c in citations
-                ]
-                yield f"event: citations\ndata: {json.dumps(citations_data)}\n\n"
-
-                # Send metadata
-                follow_ups = rag._generate_follow_ups(enhanced_query, citations)
-                metadata = {
-                    "confidence": confidence,
-                    "limitations": limitations,
-                    "grounded": confidence in ("high", "medium"),
-                    "follow_up_questions": follow_ups,
-                    "model_used": "local_legal_llama",
-                    "corpus_as_of": getattr(rag, "corpus_as_of", None),
-                    "is_document": False,
-                    "document_type": None,
-                }
-                yield f"event: metadata\ndata: {json.dumps(metadata)}\n\n"
-                yield f"event: done\ndata: {{}}\n\n"
-            else:
-                # No streaming LLM — get full response and send as single event
-                response = chatbot_service.get_legal_response(chat_request)
-
-                # Send full answer as one token event
-                yield f"event: token\ndata: {json.dumps({'token': response.answer})}\n\n"
-
-                # Send citations
-                citations_data = [
-                    {
-                        "title": c.title,
-                        "content": c.content,
-                        "doc_type": c.doc_type,
-                        "source": c.source,
-                        "relevance": c.relevance,
-                        "section": c.section,
-                        "act": c.act,
-                        "url": c.url,
-                    }
-                    for c in response.citations
-                ]
-                yield f"event: citations\ndata: {json.dumps(citations_data)}\n\n"
-
-                metadata = {
-                    "confidence": response.confidence,
-                    "limitations": response.limitations,
-                    "grounded": response.grounded,
-                    "follow_up_questions": response.follow_up_questions,
-                    "model_used": getattr(response, "model_used", None),
-                    "corpus_as_of": getattr(response, "corpus_as_of", None),
-                    "is_document": response.is_document,
-                    "document_type": response.document_type,
-                }
-                yield f"event: metadata\ndata: {json.dumps(metadata)}\n\n"
-                yield f"event: done\ndata: {{}}\n\n"
+                    yield f"event: metadata\ndata: {json.dumps(metadata)}\n\n"
+                    yield f"event: done\ndata: {{}}\n\n"
 
         except Exception as e:
             yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+        finally:
+            slot.release()
 
     return StreamingResponse(
         event_stream(),
         media_type="text/event-stream",
+        # Also frees the slot if the stream is never iterated.
+        background=BackgroundTask(slot.release),
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
@@ -321,9 +430,10 @@ async def get_document_assistance(request: DocumentAssistanceRequest):
             "founders": request.founders or []
         }
 
-        response = chatbot_service.get_document_assistance(
+        response = await run_in_threadpool(
+            chatbot_service.get_document_assistance,
             matter_type=request.matter_type,
-            context=context
+            context=context,
         )
         return _response_to_api(response)
     except ValueError as e:
@@ -392,7 +502,7 @@ async def get_chatbot_status():
     - Available features (including new capabilities)
     - Any initialization errors
     """
-    chatbot_service._lazy_init()
+    await run_in_threadpool(chatbot_service._lazy_init)
 
     rag = chatbot_service.rag
     rag_info = {}
@@ -407,12 +517,15 @@ async def get_chatbot_status():
             "use_reranker": getattr(rag, "use_reranker", False),
             "local_llm_available": getattr(rag, "local_llm", None) is not None,
         }
+        if rag_info["local_llm_available"] and hasattr(rag.local_llm, "stats"):
+            rag_info["local_llm_queue"] = rag.local_llm.stats()
 
     return {
         "product": "JurisGPT",
         "version": "2.0",
         "description": "Research-Level Citation-Grounded Legal AI for Indian Law",
         "initialized": chatbot_service._initialized,
+        "admission": chat_admission.stats(),
         "rag_available": rag is not None,
         "error": chatbot_service._initialization_error,
         **rag_info,
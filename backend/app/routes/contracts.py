@@ -9,8 +9,8 @@ from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timezone
 from uuid import UUID, uuid4
-from openai import OpenAI
 from app.config import settings
+from app.services.provider_clients import provider_clients
 from app.database import supabase
 import io
 
@@ -20,7 +20,7 @@ def get_openai_client():
     api_key = settings.openai_api_key
     if not api_key or api_key == "sk-placeholder" or len(api_key) < 20:
         raise ValueError("OpenAI API key is not configured properly")
-    return OpenAI(api_key=api_key)
+    return provider_clients.openai(api_key=api_key)
 
 # Lazy initialization - client will be created on first use
 _openai_client = None
@@ -28,9 +28,11 @@ from pydantic import BaseModel, Field
 from app.routes.chatbot import (
     ChatMessageResponse,
     ChatRequest,
+    _admitted_legal_response,
     _response_to_api,
-    chatbot_service,
+    _run_until_disconnect,
 )
+from app.services.chat_admission import PRIORITY_DEMO
 
 logger = logging.getLogger(__name__)
 
@@ -106,8 +108,13 @@ async def demo_message(request: Request, body: DemoMessageRequest) -> ChatMessag
         # reads `context` and `conversation_history`, which this model
         # intentionally does not carry.
         chat_request = ChatRequest(message=message, context=None, conversation_history=None)
-        response = chatbot_service.get_legal_response(chat_request)
+        # Queued behind authenticated chat; 503 + Retry-After when full.
+        response = await _run_until_disconnect(
+            request, _admitted_legal_response(chat_request, PRIORITY_DEMO)
+        )
         return _response_to_api(response)
+    except HTTPException:
+        raise
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception:
@@ -10,9 +10,9 @@ def _get_openai_client():
     global _client
     if _client is None:
         try:
-            from openai import OpenAI
+            from app.services.provider_clients import provider_clients
             if settings.openai_api_key and not settings.openai_api_key.startswith("sk-placeholder"):
-                _client = OpenAI(api_key=settings.openai_api_key)
+                _client = provider_clients.openai(api_key=settings.openai_api_key)
         except Exception as e:
             print(f"OpenAI client initialization failed: {e}")
             _client = None
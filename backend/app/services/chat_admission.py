@@ -0,0 +1,156 @@
+"""
+Admission control for chat generation.
+
+Every chat answer (``/api/chat/message``, ``/api/chat/stream``,
+``/api/demo/message``) takes a slot here before any retrieval or LLM work
+starts. At most ``max_concurrent`` answers run at once per worker; up to
+``max_queue`` more wait, served by priority (authenticated chat ahead of
+the public demo) and then arrival order. Anything beyond that is rejected
+at once with ``ChatQueueFull``, which the routes turn into ``503`` with a
+``Retry-After`` estimated from recent service times — a burst therefore
+costs the rejected caller one round trip instead of stalling ``/health``
+and every other route on the worker.
+
+Waiting is a future on the event loop, not a blocked thread, and a waiter
+whose request is cancelled (client disconnect) leaves the queue.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Tuple
+
+from app.config import settings
+
+# Lower runs first.
+PRIORITY_AUTHENTICATED = 0
+PRIORITY_DEMO = 10
+
+# Recent samples kept for wait / service time statistics.
+SAMPLE_WINDOW = 256
+# Retry-After bounds, in seconds.
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 60
+
+
+class ChatQueueFull(Exception):
+    """The wait queue is full; retry after ``retry_after`` seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"chat queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class ChatSlot:
+    """One admitted request; ``release`` (idempotent) frees the slot."""
+
+    def __init__(self, admission: "ChatAdmission", admitted_at: float):
+        self._admission = admission
+        self._admitted_at = admitted_at
+        self._released = False
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        self._admission._release(time.monotonic() - self._admitted_at)
+
+
+class ChatAdmission:
+    """Priority admission gate with a bounded wait queue."""
+
+    def __init__(self, max_concurrent: int, max_queue: int):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self._running = 0
+        # (priority, arrival, future); futures resolve when handed a slot
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+        self._wait_seconds: Deque[float] = deque(maxlen=SAMPLE_WINDOW)
+        self._service_seconds: Deque[float] = deque(maxlen=SAMPLE_WINDOW)
+        self._counters = {"admitted": 0, "queued": 0, "rejected": 0, "cancelled": 0}
+
+    async def acquire(self, priority: int = PRIORITY_AUTHENTICATED) -> ChatSlot:
+        """Wait for a slot; raises ``ChatQueueFull`` when the queue is full."""
+        started = time.monotonic()
+        if self._running < self.max_concurrent and not self._waiters:
+            self._running += 1
+        else:
+            if len(self._waiters) >= self.max_queue:
+                self._counters["rejected"] += 1
+                raise ChatQueueFull(self.retry_after())
+            waiter = (priority, next(self._arrivals), asyncio.get_running_loop().create_future())
+            heapq.heappush(self._waiters, waiter)
+            self._counters["queued"] += 1
+            try:
+                await waiter[2]
+            except asyncio.CancelledError:
+                if waiter[2].done() and not waiter[2].cancelled():
+                    # Handed a slot just as the request was cancelled.
+                    self._release(None)
+                else:
+                    self._waiters.remove(waiter)
+                    heapq.heapify(self._waiters)
+                self._counters["cancelled"] += 1
+                raise
+
+        now = time.monotonic()
+        self._wait_seconds.append(now - started)
+        self._counters["admitted"] += 1
+        return ChatSlot(self, now)
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_AUTHENTICATED) -> AsyncIterator[ChatSlot]:
+        chat_slot = await self.acquire(priority)
+        try:
+            yield chat_slot
+        finally:
+            chat_slot.release()
+
+    def _release(self, service_seconds):
+        if service_seconds is not None:
+            self._service_seconds.append(service_seconds)
+        # Hand the slot straight to the best waiter, if any.
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._running -= 1
+
+    def retry_after(self) -> int:
+        """Seconds until a queued request would likely be admitted."""
+        if not self._service_seconds:
+            return MIN_RETRY_AFTER
+        mean_service = sum(self._service_seconds) / len(self._service_seconds)
+        estimate = mean_service * (len(self._waiters) + 1) / self.max_concurrent
+        return int(min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, math.ceil(estimate))))
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._wait_seconds)
+        by_priority: Dict[int, int] = {}
+        for priority, _, _ in self._waiters:
+            by_priority[priority] = by_priority.get(priority, 0) + 1
+        return {
+            **self._counters,
+            "running": self._running,
+            "queue_depth": len(self._waiters),
+            "queue_depth_by_priority": by_priority,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "wait_ms_avg": round(1000 * sum(waits) / len(waits), 2) if waits else 0.0,
+            "wait_ms_p95": round(1000 * waits[int(0.95 * (len(waits) - 1))], 2) if waits else 0.0,
+            "wait_ms_max": round(1000 * waits[-1], 2) if waits else 0.0,
+            "retry_after_seconds": self.retry_after(),
+        }
+
+
+# Global admission gate (one per worker process)
+chat_admission = ChatAdmission(
+    max_concurrent=settings.chat_max_concurrent,
+    max_queue=settings.chat_max_queue,
+)
@@ -10,11 +10,17 @@ import sys
 import importlib.util
 import json
 import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, Any, List, Optional
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
 from app.config import settings
+from app.services.provider_clients import provider_clients
 
 # Add data directory to path for RAG imports
 DATA_DIR = Path(__file__).parent.parent.parent.parent / "data"
@@ -77,6 +83,7 @@ class ChatResponse(BaseModel):
     # Model provenance
     model_used: Optional[str] = None  # Which model generated the answer
     corpus_as_of: Optional[str] = None  # How current the legal sources are
+    served_from_cache: bool = False  # Answer reused from the RAG answer cache
 
     # Document generation (separate workflow)
     is_document: bool = False
@@ -99,88 +106,258 @@ class JurisGPTChatbotService:
         self._initialization_error = None
         self._openai_client = None
         self._sample_faqs = None
-
-    def reload_corpus(self) -> Dict[str, Any]:
-        """Rebuild the RAG pipeline so newly ingested corpus files are indexed.
+        # Async routes run _lazy_init in the threadpool, so two first
+        # requests may race to build the pipeline.
+        self._init_lock = threading.Lock()
+
+        # Full corpus reloads build a new pipeline on a background thread
+        # while self.rag keeps serving, then swap it in (reload_corpus).
+        self._reload_lock = threading.Lock()
+        self._reload_thread: Optional[threading.Thread] = None
+        self._reload_started = 0.0
+        self._reload_status: Dict[str, Any] = {"state": "idle"}
+
+        # Requests in flight per pipeline (id -> count), and pipelines that
+        # were swapped out but still serve some of them.
+        self._lease_lock = threading.Lock()
+        self._leases: Dict[int, int] = {}
+        self._retiring: Dict[int, Any] = {}
+
+    def reload_corpus(self, full: bool = False, wait: bool = False) -> Dict[str, Any]:
+        """Bring the RAG corpus up to date with the corpus files.
 
         Used by the admin reload endpoint after data/ingest_updates.py runs,
-        so corpus refreshes don't require a redeploy.
+        so corpus refreshes don't require a redeploy. When only the ingested
+        judgments or Obsidian notes changed, the delta is applied to the live
+        index (``JurisGPTRAG.refresh_corpus``) before returning.
+
+        Otherwise, or with ``full``, a new pipeline is built on a background
+        thread while the current one keeps answering; it replaces
+        ``self.rag`` in a single assignment once ready, and the old one's
+        in-memory cached retrievals and answers are dropped when its
+        in-flight requests finish. This returns as soon as
+        the build starts (or when it ends, with ``wait``); progress is
+        reported by ``reload_status``.
         """
-        self.rag = None
-        self._initialized = False
-        self._init_attempted = False
+        rag = self.rag
+        if not full and rag is not None and hasattr(rag, "refresh_corpus"):
+            started = time.perf_counter()
+            delta = rag.refresh_corpus()
+            if delta is not None:
+                stats = rag.get_corpus_stats()
+                result = {
+                    "success": True,
+                    "mode": "incremental",
+                    **delta,
+                    "total_documents": stats.total_documents,
+                    "corpus_as_of": getattr(rag, "corpus_as_of", None),
+                    "loaded_files": len(stats.loaded_files),
+                }
+                with self._reload_lock:
+                    if self._reload_status.get("state") != "building":
+                        now = datetime.now(timezone.utc).isoformat()
+                        self._reload_status = {
+                            "state": "ready",
+                            "mode": "incremental",
+                            "started_at": now,
+                            "finished_at": now,
+                            "elapsed_seconds": round(time.perf_counter() - started, 3),
+                            **delta,
+                            "total_documents": stats.total_documents,
+                            "corpus_version": getattr(rag, "corpus_version", None),
+                        }
+                return result
+
+        if self._rag_disabled():
+            return {"success": False, "error": "RAG disabled via DISABLE_RAG env var"}
+
+        with self._reload_lock:
+            thread = self._reload_thread
+            if thread is None or not thread.is_alive():
+                self._reload_started = time.perf_counter()
+                self._reload_status = {
+                    "state": "building",
+                    "mode": "full",
+                    "phase": "starting",
+                    "started_at": datetime.now(timezone.utc).isoformat(),
+                    "previous_corpus_version": getattr(rag, "corpus_version", None),
+                }
+                # A first request arriving mid-build must not start a
+                # second, synchronous build via _lazy_init.
+                self._init_attempted = True
+                thread = threading.Thread(
+                    target=self._rebuild_rag, name="corpus-reload", daemon=True
+                )
+                self._reload_thread = thread
+                thread.start()
+        if wait:
+            thread.join()
+        status = self.reload_status()
+        if status["state"] == "failed":
+            return {"success": False, "error": status.get("error", "reload failed"), **status}
+        return {"success": True, **status}
+
+    def reload_status(self) -> Dict[str, Any]:
+        """Progress and timings of the most recent corpus reload."""
+        with self._reload_lock:
+            status = dict(self._reload_status)
+        if status["state"] == "building":
+            status["elapsed_seconds"] = round(time.perf_counter() - self._reload_started, 3)
+        with self._lease_lock:
+            status["draining_requests"] = sum(self._leases.get(key, 0) for key in self._retiring)
+        status["serving_corpus_version"] = getattr(self.rag, "corpus_version", None)
+        return status
+
+    def _update_reload_status(self, **fields: Any):
+        with self._reload_lock:
+            self._reload_status.update(fields)
+
+    def _rebuild_rag(self):
+        """Build a new pipeline and swap it in (reload thread target)."""
+        try:
+            new_rag = self._build_rag(progress=lambda phase: self._update_reload_status(phase=phase))
+        except Exception as e:
+            error = self._describe_init_error(e)
+            self._update_reload_status(
+                state="failed",
+                phase=None,
+                error=error,
+                finished_at=datetime.now(timezone.utc).isoformat(),
+                elapsed_seconds=round(time.perf_counter() - self._reload_started, 3),
+            )
+            print(f"Corpus reload failed, still serving the previous corpus: {error}")
+            return
+
+        with self._lease_lock:
+            old_rag = self.rag
+            self.rag = new_rag
+            release_now = old_rag is not None and not self._leases.get(id(old_rag))
+            if old_rag is not None and not release_now:
+                self._retiring[id(old_rag)] = old_rag
+        self._initialized = True
         self._initialization_error = None
-        self._lazy_init()
-        if not (self._initialized and self.rag):
-            return {
-                "success": False,
-                "error": str(self._initialization_error or "RAG unavailable"),
-            }
-        stats = self.rag.get_corpus_stats()
-        return {
-            "success": True,
-            "total_documents": stats.total_documents,
-            "corpus_as_of": getattr(self.rag, "corpus_as_of", None),
-            "loaded_files": len(stats.loaded_files),
-        }
+        if release_now:
+            self._release_rag(old_rag)
+
+        stats = new_rag.get_corpus_stats()
+        self._update_reload_status(
+            state="ready",
+            phase=None,
+            finished_at=datetime.now(timezone.utc).isoformat(),
+            elapsed_seconds=round(time.perf_counter() - self._reload_started, 3),
+            total_documents=stats.total_documents,
+            loaded_files=len(stats.loaded_files),
+            load_timings=stats.load_timings,
+            corpus_version=getattr(new_rag, "corpus_version", None),
+            corpus_as_of=getattr(new_rag, "corpus_as_of", None),
+        )
+        print(f"JurisGPT RAG Pipeline reloaded ({stats.total_documents} documents)")
+
+    @contextmanager
+    def rag_lease(self):
+        """Yield the current pipeline (or None), pinned for one request.
+
+        A corpus reload may swap ``self.rag`` at any time; callers use the
+        yielded reference throughout, and a swapped-out pipeline is only
+        released once every lease on it has ended.
+        """
+        with self._lease_lock:
+            rag = self.rag
+            if rag is not None:
+                self._leases[id(rag)] = self._leases.get(id(rag), 0) + 1
+        try:
+            yield rag
+        finally:
+            if rag is not None:
+                retired = None
+                with self._lease_lock:
+                    remaining = self._leases[id(rag)] - 1
+                    if remaining:
+                        self._leases[id(rag)] = remaining
+                    else:
+                        del self._leases[id(rag)]
+                        retired = self._retiring.pop(id(rag), None)
+                if retired is not None:
+                    self._release_rag(retired)
+
+    @staticmethod
+    def _release_rag(rag):
+        if hasattr(rag, "clear_response_cache"):
+            rag.clear_response_cache()
+
+    @staticmethod
+    def _rag_disabled() -> bool:
+        return os.getenv("DISABLE_RAG", "").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def _describe_init_error(error: Exception) -> str:
+        if isinstance(error, ImportError):
+            return f"RAG dependencies not installed: {error}"
+        if isinstance(error, FileNotFoundError):
+            return f"Vector store not found: {error}"
+        return f"RAG initialization failed: {error}"
+
+    def _build_rag(self, progress=None):
+        """Construct a JurisGPTRAG from the environment configuration."""
+        # Dynamic import without sys.path pollution
+        rag_pipeline_path = DATA_DIR / "rag_pipeline.py"
+        spec = importlib.util.spec_from_file_location("rag_pipeline", rag_pipeline_path)
+        if spec is None or spec.loader is None:
+            raise ImportError(f"RAG pipeline not found at {rag_pipeline_path}")
+
+        rag_module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(rag_module)
+        JurisGPTRAG = rag_module.JurisGPTRAG
+        vector_store_type = os.getenv("JURISGPT_VECTOR_STORE", "lexical")
+        llm_type = os.getenv("JURISGPT_LLM_TYPE", "local_legal_llama")
+        hybrid_search = os.getenv("RAG_HYBRID_SEARCH", "false").lower() == "true"
+        use_reranker = os.getenv("RAG_USE_RERANKER", "false").lower() == "true"
+        return JurisGPTRAG(
+            vector_store_type=vector_store_type,
+            llm_type=llm_type,
+            hybrid_search=hybrid_search,
+            use_reranker=use_reranker,
+            progress=progress,
+            provider_clients=provider_clients,
+        )
 
     def _lazy_init(self):
         """Lazy initialization of RAG pipeline"""
-        if self._initialized or self._init_attempted:
+        if self._initialized:
             return
-
-        self._init_attempted = True
-
+        with self._init_lock:
+            if self._init_attempted:
+                return
+            self._init_attempted = True
+            self._initialize_rag()
+
+    def _initialize_rag(self):
+        """Build the pipeline once (called under ``_init_lock``)."""
         # Free-tier escape hatch: if DISABLE_RAG=true the chatbot answers
         # via direct LLM calls without retrieving from the local corpus.
         # Set this on Render free tier (512 MB) to avoid OOM from torch +
         # transformers + sentence-transformers loading. Higher-RAM instances
         # (Render Standard, 2GB+) should leave it unset.
-        if os.getenv("DISABLE_RAG", "").lower() in ("1", "true", "yes"):
+        if self._rag_disabled():
             self._initialization_error = "RAG disabled via DISABLE_RAG env var"
             print("RAG disabled — chat will answer via LLM only (no citations)")
             return
 
         try:
-            # Dynamic import without sys.path pollution
-            rag_pipeline_path = DATA_DIR / "rag_pipeline.py"
-            spec = importlib.util.spec_from_file_location("rag_pipeline", rag_pipeline_path)
-            if spec is None or spec.loader is None:
-                raise ImportError(f"RAG pipeline not found at {rag_pipeline_path}")
-
-            rag_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(rag_module)
-            JurisGPTRAG = rag_module.JurisGPTRAG
-            vector_store_type = os.getenv("JURISGPT_VECTOR_STORE", "lexical")
-            llm_type = os.getenv("JURISGPT_LLM_TYPE", "local_legal_llama")
-            hybrid_search = os.getenv("RAG_HYBRID_SEARCH", "false").lower() == "true"
-            use_reranker = os.getenv("RAG_USE_RERANKER", "false").lower() == "true"
-            self.rag = JurisGPTRAG(
-                vector_store_type=vector_store_type,
-                llm_type=llm_type,
-                hybrid_search=hybrid_search,
-                use_reranker=use_reranker,
-            )
+            self.rag = self._build_rag()
             self._initialized = True
             print("JurisGPT RAG Pipeline initialized")
-        except ImportError as e:
-            self._initialization_error = f"RAG dependencies not installed: {e}"
-            print(f"RAG not available: {self._initialization_error}")
-        except FileNotFoundError as e:
-            self._initialization_error = f"Vector store not found: {e}"
-            print(f"RAG not available: {self._initialization_error}")
         except Exception as e:
-            self._initialization_error = f"RAG initialization failed: {e}"
+            self._initialization_error = self._describe_init_error(e)
             print(f"RAG not available: {self._initialization_error}")
 
     def _get_openai_client(self):
         """Get or create OpenAI client."""
         if self._openai_client is None:
             try:
-                from openai import OpenAI
                 api_key = settings.openai_api_key
                 if api_key and not api_key.startswith("sk-placeholder"):
-                    self._openai_client = OpenAI(api_key=api_key)
+                    self._openai_client = provider_clients.openai(api_key=api_key)
                     print("OpenAI client initialized successfully")
                 else:
                     print("OpenAI API key not configured or is placeholder")
@@ -321,8 +498,9 @@ class JurisGPTChatbotService:
 
         # 1. Primary: RAG pipeline (uses local LLM or OpenAI internally)
         self._lazy_init()
-        if self._initialized and self.rag:
-            return self._get_rag_response(request)
+        with self.rag_lease() as rag:
+            if self._initialized and rag:
+                return self._get_rag_response(request, rag)
 
         # 2. Fallback: Direct OpenAI (no RAG citations)
         client = self._get_openai_client()
@@ -332,67 +510,113 @@ class JurisGPTChatbotService:
         # 3. Final fallback to hardcoded responses
         return self._get_fallback_response(request.message)
 
-    def _get_rag_response(self, request: ChatRequest) -> ChatResponse:
+    async def aget_legal_response(self, request: ChatRequest) -> ChatResponse:
+        """``get_legal_response`` for async routes.
+
+        The RAG path awaits ``JurisGPTRAG.aquery`` (retrieval on its worker
+        pool, the LLM on the provider's async client); the remaining
+        blocking branches run in the threadpool. Cancelling the awaiting
+        task (the client went away) cancels the in-flight LLM call.
+        """
+        if self._is_greeting(request.message):
+            return self._get_greeting_response()
+
+        if self._is_document_generation_request(request.message):
+            return await run_in_threadpool(self._generate_document_response, request)
+
+        if not self._initialized:
+            await run_in_threadpool(self._lazy_init)
+        with self.rag_lease() as rag:
+            if self._initialized and rag:
+                return await self._aget_rag_response(request, rag)
+
+        client = self._get_openai_client()
+        if client and settings.openai_api_key and not settings.openai_api_key.startswith("sk-placeholder"):
+            return await run_in_threadpool(self._get_openai_response, request)
+
+        return self._get_fallback_response(request.message)
+
+    def _get_rag_response(self, request: ChatRequest, rag=None) -> ChatResponse:
         """Get response using RAG pipeline with structured citations."""
+        rag = rag or self.rag
         try:
             # Build enhanced query with context
             enhanced_query = self._build_enhanced_query(request)
 
             # Get RAG response
-            rag_response = self.rag.query(enhanced_query)
-
-            # Convert citations to response format
-            citations = [
-                CitationModel(
-                    title=c.title,
-                    content=c.content[:300] + "..." if len(c.content) > 300 else c.content,
-                    doc_type=c.doc_type,
-                    source=c.source,
-                    relevance=c.relevance,
-                    section=c.section,
-                    act=c.act,
-                    url=c.url
-                )
-                for c in rag_response.citations[:5]
-            ]
-
-            # Legacy sources format
-            sources = [
-                {
-                    "title": c.title,
-                    "content": c.content,
-                    "doc_type": c.doc_type,
-                    "source": c.source,
-                    "relevance": f"{c.relevance:.0%}"
-                }
-                for c in citations
-            ]
+            return self._rag_chat_response(rag.query(enhanced_query), rag)
+        except Exception as e:
+            return self._rag_error_response(e)
 
-            return ChatResponse(
-                success=True,
-                answer=rag_response.answer,
-                citations=citations,
-                confidence=rag_response.confidence,
-                limitations=rag_response.limitations,
-                follow_up_questions=rag_response.follow_up_questions,
-                grounded=rag_response.grounded,
-                model_used=getattr(rag_response, "model_used", None),
-                corpus_as_of=getattr(self.rag, "corpus_as_of", None),
-                # Legacy fields
-                message=rag_response.answer,
-                sources=sources,
-                suggestions=rag_response.follow_up_questions
-            )
+    async def _aget_rag_response(self, request: ChatRequest, rag) -> ChatResponse:
+        try:
+            enhanced_query = self._build_enhanced_query(request)
+            if hasattr(rag, "aquery"):
+                rag_response = await rag.aquery(enhanced_query)
+            else:
+                rag_response = await run_in_threadpool(rag.query, enhanced_query)
+            return self._rag_chat_response(rag_response, rag)
         except Exception as e:
-            return ChatResponse(
-                success=False,
-                answer="I encountered an error processing your request.",
-                message="I encountered an error processing your request.",
-                confidence="insufficient",
-                limitations="An error occurred during processing.",
-                grounded=False,
-                error=str(e)
+            return self._rag_error_response(e)
+
+    @staticmethod
+    def _rag_chat_response(rag_response, rag) -> ChatResponse:
+        """Convert a pipeline ``RAGResponse`` to the API response model."""
+        # Convert citations to response format
+        citations = [
+            CitationModel(
+                title=c.title,
+                content=c.content[:300] + "..." if len(c.content) > 300 else c.content,
+                doc_type=c.doc_type,
+                source=c.source,
+                relevance=c.relevance,
+                section=c.section,
+                act=c.act,
+                url=c.url
             )
+            for c in rag_response.citations[:5]
+        ]
+
+        # Legacy sources format
+        sources = [
+            {
+                "title": c.title,
+                "content": c.content,
+                "doc_type": c.doc_type,
+                "source": c.source,
+                "relevance": f"{c.relevance:.0%}"
+            }
+            for c in citations
+        ]
+
+        return ChatResponse(
+            success=True,
+            answer=rag_response.answer,
+            citations=citations,
+            confidence=rag_response.confidence,
+            limitations=rag_response.limitations,
+            follow_up_questions=rag_response.follow_up_questions,
+            grounded=rag_response.grounded,
+            model_used=getattr(rag_response, "model_used", None),
+            corpus_as_of=getattr(rag, "corpus_as_of", None),
+            served_from_cache=getattr(rag_response, "served_from_cache", False),
+            # Legacy fields
+            message=rag_response.answer,
+            sources=sources,
+            suggestions=rag_response.follow_up_questions
+        )
+
+    @staticmethod
+    def _rag_error_response(error: Exception) -> ChatResponse:
+        return ChatResponse(
+            success=False,
+            answer="I encountered an error processing your request.",
+            message="I encountered an error processing your request.",
+            confidence="insufficient",
+            limitations="An error occurred during processing.",
+            grounded=False,
+            error=str(error)
+        )
 
     def _build_enhanced_query(self, request: ChatRequest) -> str:
         """Build query with context information."""
@@ -606,8 +830,9 @@ Format responses in markdown for readability."""
 
         # Try to use RAG pipeline's LLM (Claude via PageGrid)
         self._lazy_init()
-        if self._initialized and self.rag and self.rag.llm is not None:
-            return self._generate_document_with_claude(request, doc_type)
+        with self.rag_lease() as rag:
+            if self._initialized and rag and rag.llm is not None:
+                return self._generate_document_with_claude(request, doc_type, rag)
 
         # Fallback to OpenAI if PageGrid not available
         client = self._get_openai_client()
@@ -715,8 +940,9 @@ I'll then create a complete, legally-compliant document for Indian law."""
             document_type=doc_type,
         )
 
-    def _generate_document_with_claude(self, request: ChatRequest, doc_type: str) -> ChatResponse:
+    def _generate_document_with_claude(self, request: ChatRequest, doc_type: str, rag=None) -> ChatResponse:
         """Generate document using Claude via PageGrid."""
+        rag = rag or self.rag
         system_prompt = """You are JurisGPT, an expert legal document drafting assistant for Indian law.
 
 DOCUMENT GENERATION RULES:
@@ -771,7 +997,7 @@ After the document, provide:
                 ("human", "{query}")
             ])
 
-            chain = prompt | self.rag.llm
+            chain = prompt | rag.llm
             response = chain.invoke({"query": full_prompt})
             answer = response.content
 
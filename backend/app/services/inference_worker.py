@@ -0,0 +1,307 @@
+"""
+Single-owner inference worker for the local GGUF model.
+
+``llama_cpp.Llama`` is not thread-safe: its context (KV cache, sampler,
+the prompt-prefix state ``LocalLegalLLM`` keeps) belongs to whichever
+thread calls it, and every call used to run on whichever threadpool worker
+served the request, so two concurrent chats raced on one context.
+``InferenceWorker`` gives the model a single owner thread. Requests are
+jobs in a bounded priority queue, served lowest priority value first and
+then in arrival order:
+
+- a full queue rejects at once with ``InferenceQueueFull``;
+- a job whose deadline passes while it is queued fails with
+  ``InferenceDeadlineExceeded`` without running; a running job stops
+  generating at its deadline and keeps what it produced (``truncated``);
+- a cancelled job (its SSE client went away, its request task was
+  cancelled) leaves the queue, or stops after its current token.
+
+The priority of a request comes from ``inference_priority``, which the
+chat routes set from the admission priority, so authenticated chat is
+served ahead of the public demo here as well. ``stats`` reports queue
+depth, waits and outcomes.
+"""
+
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first (same scale as the chat admission priorities).
+PRIORITY_DEFAULT = 0
+# Model housekeeping (prefix priming, unload) goes ahead of generation.
+PRIORITY_MAINTENANCE = -10
+
+# How often a waiting caller checks whether its job was cancelled.
+CANCEL_POLL_SECONDS = 0.1
+# Recent samples kept for wait / run time statistics.
+SAMPLE_WINDOW = 256
+
+# Priority of inference requested from the current request context.
+inference_priority: ContextVar[int] = ContextVar("inference_priority", default=PRIORITY_DEFAULT)
+
+
+class InferenceQueueFull(RuntimeError):
+    """The worker's queue is full."""
+
+
+class InferenceDeadlineExceeded(TimeoutError):
+    """The job's deadline passed before it started."""
+
+
+class InferenceCancelled(RuntimeError):
+    """The job was cancelled before it started."""
+
+
+_END = object()
+
+
+class InferenceJob:
+    """One queued call; ``run(job)`` executes on the worker thread.
+
+    ``run`` streams output with ``emit`` and should check ``should_stop``
+    between tokens. The job is cancelled by ``cancel()`` or by setting the
+    caller's ``cancel`` event.
+    """
+
+    def __init__(
+        self,
+        run: Callable[["InferenceJob"], Any],
+        priority: int,
+        deadline: Optional[float],
+        cancel: Optional[threading.Event],
+    ):
+        self.run = run
+        self.priority = priority
+        self.deadline = deadline  # time.monotonic() value, or None
+        self._cancel_events = [threading.Event()] + ([cancel] if cancel is not None else [])
+        self.submitted_at = time.monotonic()
+        self.started = False
+        self.truncated = False
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self._output: "queue.Queue[Any]" = queue.Queue()
+        self._done = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return any(event.is_set() for event in self._cancel_events)
+
+    def cancel(self) -> None:
+        self._cancel_events[0].set()
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        return self.deadline is not None and (now or time.monotonic()) >= self.deadline
+
+    def should_stop(self) -> bool:
+        """True once the job is cancelled or past its deadline."""
+        if self.cancelled:
+            return True
+        if self.expired():
+            self.truncated = True
+            return True
+        return False
+
+    def emit(self, item: Any) -> None:
+        self._output.put(item)
+
+    def _finish(self, value: Any = None, error: Optional[BaseException] = None) -> None:
+        self.value = value
+        self.error = error
+        self._output.put(_END)
+        self._done.set()
+
+    def _dropped(self, now: Optional[float] = None) -> Optional[Tuple[str, BaseException]]:
+        """``(outcome, error)`` if the job must not start any more, else None.
+
+        Both conditions are final, so a caller that sees one can give up
+        on the job knowing the worker will skip it too.
+        """
+        if self.started:
+            return None
+        if self.expired(now):
+            waited = (now or time.monotonic()) - self.submitted_at
+            return "expired", InferenceDeadlineExceeded(f"inference deadline passed after {waited:.1f}s in the queue")
+        if self.cancelled:
+            return "cancelled", InferenceCancelled("inference job cancelled while queued")
+        return None
+
+    def result(self) -> Any:
+        """Wait for ``run``'s return value (or raise its error)."""
+        while not self._done.wait(CANCEL_POLL_SECONDS):
+            dropped = self._dropped()
+            if dropped is not None:
+                raise dropped[1]
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def stream(self) -> Iterator[Any]:
+        """Items passed to ``emit``, as they are produced.
+
+        Stops early, without an error, once the job is cancelled; raises
+        ``InferenceDeadlineExceeded`` if the deadline passes while queued.
+        """
+        while True:
+            try:
+                item = self._output.get(timeout=CANCEL_POLL_SECONDS)
+            except queue.Empty:
+                if self.cancelled:
+                    return
+                dropped = self._dropped()
+                if dropped is not None:
+                    raise dropped[1]
+                continue
+            if item is _END:
+                if self.error is not None:
+                    raise self.error
+                return
+            yield item
+
+
+class InferenceWorker:
+    """Owner thread for one model, fed by a bounded priority queue."""
+
+    def __init__(self, name: str, max_queue: int = 8):
+        self.name = name
+        self.max_queue = max(1, max_queue)
+        self._cond = threading.Condition()
+        # (priority, arrival, job)
+        self._queue: List[Tuple[int, int, InferenceJob]] = []
+        self._arrivals = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._running: Optional[InferenceJob] = None
+        self._stopping = False
+        self._wait_seconds: Deque[float] = deque(maxlen=SAMPLE_WINDOW)
+        self._run_seconds: Deque[float] = deque(maxlen=SAMPLE_WINDOW)
+        self._counters = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "cancelled": 0,
+            "expired": 0,
+            "truncated": 0,
+            "failed": 0,
+        }
+
+    def submit(
+        self,
+        run: Callable[[InferenceJob], Any],
+        *,
+        priority: int = PRIORITY_DEFAULT,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> InferenceJob:
+        """Queue ``run``; raises ``InferenceQueueFull`` when the queue is full.
+
+        ``timeout`` (seconds from now) bounds queue wait plus run time.
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        job = InferenceJob(run, priority, deadline, cancel)
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError(f"inference worker {self.name} is stopped")
+            self._prune()
+            if len(self._queue) >= self.max_queue:
+                self._counters["rejected"] += 1
+                raise InferenceQueueFull(f"{self.name}: {len(self._queue)} inference jobs already queued")
+            heapq.heappush(self._queue, (priority, next(self._arrivals), job))
+            self._counters["submitted"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._serve, name=f"{self.name}-worker", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return job
+
+    def call(self, fn: Callable[[], Any], priority: int = PRIORITY_MAINTENANCE) -> Any:
+        """Run ``fn()`` on the owner thread and return its result."""
+        if threading.current_thread() is self._thread:
+            return fn()
+        return self.submit(lambda job: fn(), priority=priority).result()
+
+    def _drop(self, job: InferenceJob, now: float) -> bool:
+        """Finish ``job`` unrun if it was cancelled or expired (caller holds the lock)."""
+        dropped = job._dropped(now)
+        if dropped is None:
+            return False
+        outcome, error = dropped
+        self._counters[outcome] += 1
+        job._finish(error=error)
+        return True
+
+    def _prune(self) -> None:
+        """Drop cancelled and expired jobs from the queue (caller holds the lock)."""
+        now = time.monotonic()
+        kept = [entry for entry in self._queue if not self._drop(entry[2], now)]
+        if len(kept) != len(self._queue):
+            heapq.heapify(kept)
+            self._queue = kept
+
+    def _serve(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    pending, self._queue = self._queue, []
+                    for _, _, job in pending:
+                        job._finish(error=InferenceCancelled(f"inference worker {self.name} stopped"))
+                    return
+                _, _, job = heapq.heappop(self._queue)
+                now = time.monotonic()
+                if self._drop(job, now):
+                    continue
+                job.started = True
+                self._running = job
+                self._wait_seconds.append(now - job.submitted_at)
+
+            try:
+                value = job.run(job)
+            except Exception as exc:
+                outcome = "failed"
+                logger.warning("Inference job on %s failed: %s", self.name, exc)
+                job._finish(error=exc)
+            else:
+                outcome = "truncated" if job.truncated else "completed"
+                if job.truncated:
+                    logger.warning("Inference job on %s stopped at its deadline", self.name)
+                job._finish(value)
+            with self._cond:
+                self._running = None
+                self._counters[outcome] += 1
+                self._run_seconds.append(time.monotonic() - now)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Fail queued jobs, let the running one finish and end the thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            self._prune()
+            by_priority: Dict[int, int] = {}
+            for priority, _, _ in self._queue:
+                by_priority[priority] = by_priority.get(priority, 0) + 1
+            waits = sorted(self._wait_seconds)
+            runs = list(self._run_seconds)
+            return {
+                "queue_depth": len(self._queue),
+                "queue_depth_by_priority": by_priority,
+                "max_queue": self.max_queue,
+                "busy": self._running is not None,
+                **self._counters,
+                "mean_wait_ms": round(1000 * sum(waits) / len(waits), 1) if waits else 0.0,
+                "p95_wait_ms": round(1000 * waits[int(0.95 * (len(waits) - 1))], 1) if waits else 0.0,
+                "mean_run_ms": round(1000 * sum(runs) / len(runs), 1) if runs else 0.0,
+            }
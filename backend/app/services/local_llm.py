@@ -4,14 +4,25 @@ Wraps llama-cpp-python for local GGUF model inference.
 
 Uses invincibleambuj/Ambuj-Tripathi-Indian-Legal-Llama-GGUF
 (Llama 3.2 fine-tuned on Indian law).
+
+``llama_cpp.Llama`` is not thread-safe, so every call that touches the
+model's context runs on the model's own ``InferenceWorker`` thread, queued
+by priority with a per-request token cap and deadline (see
+inference_worker.py).
 """
 
 import logging
 import os
+import threading
 from pathlib import Path
-from typing import Iterator, Optional
+from typing import Any, Dict, Iterator, List, Optional, Union
 
 from app.config import settings
+from app.services.inference_worker import (
+    InferenceJob,
+    InferenceWorker,
+    inference_priority,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -30,13 +41,30 @@ class LocalLegalLLM:
         n_ctx: int = 0,
         n_gpu_layers: int = 0,
         n_threads: int = 0,
+        max_queue: int = 0,
+        max_tokens: int = 0,
+        deadline_seconds: float = 0,
     ):
         self._llm = None
         self._model_path = model_path or settings.local_llm_model_path
         self._n_ctx = n_ctx or settings.local_llm_context_size
         self._n_gpu_layers = n_gpu_layers or settings.local_llm_gpu_layers
         self._n_threads = n_threads or settings.local_llm_threads
+        self._max_tokens = max_tokens or settings.local_llm_max_tokens
+        self._deadline_seconds = deadline_seconds or settings.local_llm_deadline_seconds
         self._loaded = False
+        self._load_lock = threading.Lock()
+        # The only thread that calls into the model's context
+        self._worker = InferenceWorker(
+            f"local-llm-{Path(self._model_path).stem}",
+            max_queue=max_queue or settings.local_llm_max_queue,
+        )
+        # Fixed prompt prefix (see set_prompt_prefix), its tokens and the
+        # llama.cpp state (KV cache) right after evaluating them
+        self._prompt_prefix: Optional[str] = None
+        self._prefix_tokens: Optional[List[int]] = None
+        self._prefix_state: Any = None
+        self._prefix_counters = {"evaluated": 0, "reused": 0, "restored": 0}
 
     # ------------------------------------------------------------------
     # Lazy loading – model is heavy, only load when first needed
@@ -44,7 +72,11 @@ class LocalLegalLLM:
     def _ensure_loaded(self) -> None:
         if self._loaded:
             return
+        with self._load_lock:
+            if not self._loaded:
+                self._load()
 
+    def _load(self) -> None:
         resolved = Path(self._model_path).expanduser().resolve()
         if not resolved.exists():
             raise FileNotFoundError(
@@ -70,12 +102,142 @@ class LocalLegalLLM:
             n_threads=self._n_threads,
             verbose=False,
         )
-        self._loaded = True
         logger.info("Local LLM loaded successfully.")
+        self._prime_prefix()
+        # Set last: other threads skip the lock once it is True
+        self._loaded = True
+
+    # ------------------------------------------------------------------
+    # Prompt prefix
+    # ------------------------------------------------------------------
+    def set_prompt_prefix(self, prefix: str) -> None:
+        """Register the fixed instructions every prompt starts with.
+
+        The prefix is tokenized and evaluated once (at load, or now if the
+        model is already loaded) and the resulting llama.cpp state is kept.
+        Prompts that start with it are passed as ``prefix tokens + suffix
+        tokens`` with the prefix already in the KV cache, so only the
+        per-request suffix is tokenized and evaluated.
+        """
+        def register():
+            self._prompt_prefix = prefix
+            self._prefix_tokens = None
+            self._prefix_state = None
+            if self._loaded:
+                self._prime_prefix()
+
+        if self._loaded:
+            self._worker.call(register)
+        else:
+            register()
+
+    def _prime_prefix(self) -> None:
+        """Evaluate the prefix once and snapshot the state after it."""
+        if not self._prompt_prefix or self._llm is None:
+            return
+        try:
+            self._prefix_tokens = self._llm.tokenize(self._prompt_prefix.encode("utf-8"), add_bos=True)
+            self._llm.reset()
+            self._llm.eval(self._prefix_tokens)
+            self._prefix_state = self._llm.save_state()
+            self._prefix_counters["evaluated"] += 1
+            logger.info("Local LLM prompt prefix cached (%d tokens).", len(self._prefix_tokens))
+        except Exception as exc:
+            # Still correct without the snapshot, just slower.
+            logger.warning("Local LLM prompt prefix not cached: %s", exc)
+            self._prefix_state = None
+
+    def _prompt_input(self, prompt: str) -> Union[str, List[int]]:
+        """``prompt`` as llama.cpp input, with the prefix in the KV cache if it has the prefix.
+
+        llama.cpp only evaluates the tokens after the longest prefix shared
+        with what is already in its context. That is the prefix after any
+        earlier request that used it; otherwise the saved prefix state is
+        restored first.
+        """
+        prefix = self._prompt_prefix
+        if not prefix or not prompt.startswith(prefix):
+            return prompt
+        assert self._llm is not None
+        if self._prefix_tokens is None:
+            self._prefix_tokens = self._llm.tokenize(prefix.encode("utf-8"), add_bos=True)
+        if self._prefix_state is not None:
+            evaluated = list(self._llm.input_ids[: self._llm.n_tokens][: len(self._prefix_tokens)])
+            if evaluated == self._prefix_tokens:
+                self._prefix_counters["reused"] += 1
+            else:
+                self._llm.load_state(self._prefix_state)
+                self._prefix_counters["restored"] += 1
+        suffix = prompt[len(prefix):].encode("utf-8")
+        return self._prefix_tokens + self._llm.tokenize(suffix, add_bos=False)
+
+    def prefix_stats(self) -> Dict[str, int]:
+        """Prefix KV-cache reuse counters."""
+        return {
+            "prefix_tokens": len(self._prefix_tokens or []),
+            **{f"prefix_{name}": value for name, value in self._prefix_counters.items()},
+        }
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
+    def count_tokens(self, text: str) -> int:
+        """Number of model tokens in *text* (loads the model).
+
+        Runs on the calling thread: tokenizing only reads the vocabulary,
+        not the context the worker is generating with.
+        """
+        self._ensure_loaded()
+        assert self._llm is not None
+        return len(self._llm.tokenize(text.encode("utf-8"), add_bos=False))
+
+    def _submit(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        stop: Optional[list[str]],
+        priority: Optional[int],
+        deadline_seconds: Optional[float],
+        cancel: Optional[threading.Event],
+    ) -> InferenceJob:
+        """Queue a streamed completion of *prompt* on the model's worker."""
+        max_tokens = min(max_tokens, self._max_tokens)
+
+        def run(job: InferenceJob) -> None:
+            self._ensure_loaded()
+            assert self._llm is not None
+            stream = self._llm(
+                self._prompt_input(prompt),
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                stop=stop or [],
+                echo=False,
+                stream=True,
+            )
+            try:
+                for chunk in stream:
+                    choices = chunk.get("choices", [])
+                    if choices:
+                        token = choices[0].get("text", "")
+                        if token:
+                            job.emit(token)
+                    if job.should_stop():
+                        break
+            finally:
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    close()
+
+        return self._worker.submit(
+            run,
+            priority=inference_priority.get() if priority is None else priority,
+            timeout=self._deadline_seconds if deadline_seconds is None else deadline_seconds,
+            cancel=cancel,
+        )
+
     def generate(
         self,
         prompt: str,
@@ -84,23 +246,20 @@ class LocalLegalLLM:
         temperature: float = 0.3,
         top_p: float = 0.9,
         stop: Optional[list[str]] = None,
+        priority: Optional[int] = None,
+        deadline_seconds: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
     ) -> str:
-        """Generate a complete response for *prompt*."""
-        self._ensure_loaded()
-        assert self._llm is not None
+        """Generate a complete response for *prompt*.
 
-        result = self._llm(
-            prompt,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            top_p=top_p,
-            stop=stop or [],
-            echo=False,
-        )
-        choices = result.get("choices", [])
-        if not choices:
-            return ""
-        return choices[0].get("text", "").strip()
+        Waits for the model's worker. *priority* defaults to the request's
+        ``inference_priority``, *deadline_seconds* (queue wait + generation)
+        to ``LOCAL_LLM_DEADLINE_SECONDS``; setting *cancel* abandons the
+        request. Raises ``InferenceQueueFull`` / ``InferenceDeadlineExceeded``
+        when it cannot be served.
+        """
+        job = self._submit(prompt, max_tokens, temperature, top_p, stop, priority, deadline_seconds, cancel)
+        return "".join(job.stream()).strip()
 
     def stream_generate(
         self,
@@ -110,26 +269,34 @@ class LocalLegalLLM:
         temperature: float = 0.3,
         top_p: float = 0.9,
         stop: Optional[list[str]] = None,
+        priority: Optional[int] = None,
+        deadline_seconds: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+        truncated: Optional[threading.Event] = None,
     ) -> Iterator[str]:
-        """Yield tokens one at a time for SSE streaming."""
-        self._ensure_loaded()
-        assert self._llm is not None
+        """Yield tokens one at a time for SSE streaming.
 
-        stream = self._llm(
-            prompt,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            top_p=top_p,
-            stop=stop or [],
-            echo=False,
-            stream=True,
-        )
-        for chunk in stream:
-            choices = chunk.get("choices", [])
-            if choices:
-                token = choices[0].get("text", "")
-                if token:
-                    yield token
+        Same queueing as ``generate``. Generation stops after the current
+        token once *cancel* is set or the iterator is closed (the client
+        went away). *truncated* is set when generation stopped at its
+        deadline, so the streamed answer is incomplete.
+        """
+        job = self._submit(prompt, max_tokens, temperature, top_p, stop, priority, deadline_seconds, cancel)
+        try:
+            yield from job.stream()
+        finally:
+            job.cancel()
+            if job.truncated and truncated is not None:
+                truncated.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Inference queue metrics and prefix KV-cache reuse counters."""
+        return {**self._worker.stats(), **self.prefix_stats()}
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the model is in memory (``count_tokens`` will not load it)."""
+        return self._loaded
 
     @property
     def is_available(self) -> bool:
@@ -138,6 +305,12 @@ class LocalLegalLLM:
         return resolved.exists()
 
     def unload(self) -> None:
-        """Release model memory."""
-        self._llm = None
-        self._loaded = False
+        """Release model memory (after the request being generated, if any)."""
+
+        def release():
+            self._llm = None
+            self._loaded = False
+            self._prefix_tokens = None
+            self._prefix_state = None
+
+        self._worker.call(release)
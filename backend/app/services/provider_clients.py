@@ -0,0 +1,145 @@
+"""
+Shared, long-lived LLM provider clients.
+
+Every ``OpenAI(...)`` / ``anthropic.Anthropic(...)`` constructed per call
+sets up its own HTTP connection pool, so each request paid a fresh TCP +
+TLS handshake to the provider. The registry here keeps one keep-alive
+pool per provider (HTTP/2 when ``h2`` is installed, limits and timeouts
+from settings) and hands out SDK clients built on it, cached per API key
+and base URL. It is injected into ``JurisGPTRAG`` (chat model and citation
+verifier) and used by the analyzer / generator services and the chat
+fallback.
+
+Sync and async SDK clients get separate pools: an ``httpx.AsyncClient``
+belongs to the event loop that first uses it.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("anthropic", "openai")
+
+
+class ProviderClients:
+    """One pooled HTTP client per provider, and SDK clients built on it."""
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 120.0,
+        http2: bool = True,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.http2 = http2 and self._h2_available()
+        self._lock = threading.Lock()
+        self._http: Dict[Tuple[str, bool], Any] = {}
+        self._sdk: Dict[Tuple[str, bool, Optional[str], Optional[str], int], Any] = {}
+
+    @staticmethod
+    def _h2_available() -> bool:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.info("h2 not installed; LLM provider pools use HTTP/1.1 keep-alive")
+            return False
+        return True
+
+    def http_client(self, provider: str, asynchronous: bool = False):
+        """The shared ``httpx`` client (sync or async) for ``provider``."""
+        if provider not in PROVIDERS:
+            raise ValueError(f"unknown provider {provider!r}, expected one of {PROVIDERS}")
+        key = (provider, asynchronous)
+        with self._lock:
+            client = self._http.get(key)
+            if client is None or client.is_closed:
+                factory = httpx.AsyncClient if asynchronous else httpx.Client
+                client = factory(limits=self.limits, timeout=self.timeout, http2=self.http2)
+                self._http[key] = client
+            return client
+
+    def _sdk_client(self, provider: str, asynchronous: bool, api_key, base_url, max_retries: int):
+        key = (provider, asynchronous, api_key, base_url, max_retries)
+        with self._lock:
+            client = self._sdk.get(key)
+        if client is not None:
+            return client
+
+        if provider == "anthropic":
+            import anthropic
+
+            factory = anthropic.AsyncAnthropic if asynchronous else anthropic.Anthropic
+        else:
+            import openai
+
+            factory = openai.AsyncOpenAI if asynchronous else openai.OpenAI
+        kwargs: Dict[str, Any] = {"max_retries": max_retries, "timeout": self.timeout}
+        if api_key:
+            kwargs["api_key"] = api_key
+        if base_url:
+            kwargs["base_url"] = base_url
+        client = factory(http_client=self.http_client(provider, asynchronous), **kwargs)
+        with self._lock:
+            return self._sdk.setdefault(key, client)
+
+    def anthropic(self, api_key: Optional[str] = None, base_url: Optional[str] = None, max_retries: int = 2):
+        return self._sdk_client("anthropic", False, api_key, base_url, max_retries)
+
+    def async_anthropic(self, api_key: Optional[str] = None, base_url: Optional[str] = None, max_retries: int = 2):
+        return self._sdk_client("anthropic", True, api_key, base_url, max_retries)
+
+    def openai(self, api_key: Optional[str] = None, base_url: Optional[str] = None, max_retries: int = 2):
+        return self._sdk_client("openai", False, api_key, base_url, max_retries)
+
+    def async_openai(self, api_key: Optional[str] = None, base_url: Optional[str] = None, max_retries: int = 2):
+        return self._sdk_client("openai", True, api_key, base_url, max_retries)
+
+    async def aclose(self):
+        """Close every pool (application shutdown)."""
+        with self._lock:
+            clients = list(self._http.values())
+            self._http.clear()
+            self._sdk.clear()
+        for client in clients:
+            if isinstance(client, httpx.AsyncClient):
+                await client.aclose()
+            else:
+                client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "http2": self.http2,
+                "max_connections": self.limits.max_connections,
+                "pools": sorted(
+                    f"{provider}-{'async' if asynchronous else 'sync'}"
+                    for (provider, asynchronous), client in self._http.items()
+                    if not client.is_closed
+                ),
+                "sdk_clients": len(self._sdk),
+            }
+
+
+# Global registry (one per worker process)
+provider_clients = ProviderClients(
+    max_connections=settings.llm_max_connections,
+    max_keepalive_connections=settings.llm_max_keepalive_connections,
+    keepalive_expiry=settings.llm_keepalive_expiry_seconds,
+    connect_timeout=settings.llm_connect_timeout_seconds,
+    read_timeout=settings.llm_read_timeout_seconds,
+    http2=settings.llm_http2,
+)
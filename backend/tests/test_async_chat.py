@@ -0,0 +1,180 @@
+"""Tests for the async chat path (aget_legal_response / _run_until_disconnect).
+
+A fake pipeline with an async ``aquery`` stands in for JurisGPTRAG, so no
+corpus or LLM is loaded.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.routes.chatbot import _run_until_disconnect
+from app.services.chatbot_service import ChatRequest, JurisGPTChatbotService
+
+
+class _FakeAsyncRag:
+    corpus_as_of = "2026-01-01"
+
+    def __init__(self) -> None:
+        self.queries = []
+
+    async def aquery(self, query: str):
+        self.queries.append(query)
+        await asyncio.sleep(0)
+        citation = SimpleNamespace(
+            title="Companies Act, 2013 - Section 7",
+            content="Incorporation of company.",
+            doc_type="statute",
+            source="Companies Act, 2013",
+            relevance=0.9,
+            section="7",
+            act="Companies Act, 2013",
+            url=None,
+        )
+        return SimpleNamespace(
+            answer="File the incorporation documents [1].",
+            citations=[citation],
+            confidence="high",
+            limitations="",
+            follow_up_questions=[],
+            grounded=True,
+            model_used="anthropic",
+            served_from_cache=False,
+        )
+
+    def query(self, query: str):
+        raise AssertionError("async routes must not call the blocking query()")
+
+
+@pytest.fixture
+def service(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delenv("DISABLE_RAG", raising=False)
+    service = JurisGPTChatbotService()
+    service.rag = _FakeAsyncRag()
+    service._initialized = True
+    service._init_attempted = True
+    return service
+
+
+async def test_aget_legal_response_awaits_pipeline(service: JurisGPTChatbotService):
+    response = await service.aget_legal_response(
+        ChatRequest(message="How do I incorporate a private company?")
+    )
+
+    assert response.success
+    assert response.answer == "File the incorporation documents [1]."
+    assert response.citations[0].section == "7"
+    assert response.corpus_as_of == "2026-01-01"
+    assert service.rag.queries
+
+
+async def test_pending_answer_is_cancelled_when_client_disconnects():
+    cancelled = asyncio.Event()
+
+    async def slow_answer():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    class _GoneRequest:
+        async def is_disconnected(self) -> bool:
+            return True
+
+    with pytest.raises(HTTPException) as excinfo:
+        await _run_until_disconnect(_GoneRequest(), slow_answer())
+    assert excinfo.value.status_code == 499
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+
+async def test_finished_answer_is_returned_while_connected():
+    class _ConnectedRequest:
+        async def is_disconnected(self) -> bool:
+            return False
+
+    async def answer():
+        return "ok"
+
+    assert await _run_until_disconnect(_ConnectedRequest(), answer()) == "ok"
+
+
+class _FakeStreamingRag(_FakeAsyncRag):
+    llm = object()  # a configured chat model
+    local_llm = None
+    cached = None  # an answer-cache hit to replay
+
+    async def astream_query_events(self, query: str):
+        if self.cached is not None:
+            yield "response", self.cached
+            return
+        yield "citations", (await self.aquery(query)).citations
+        async for event in self.astream_answer_events(query, []):
+            yield event
+
+    def _assess_confidence(self, query, citations):
+        return "high"
+
+    def _generate_limitations(self, query, citations, confidence):
+        return ""
+
+    def _generate_follow_ups(self, query, citations):
+        return []
+
+    def streaming_model(self, citations, confidence):
+        return "anthropic"
+
+    async def astream_answer_events(self, query, citations):
+        yield "token", "File the documents "
+        yield "token", "[9]."
+        yield "correction", "File the documents [1]."
+
+
+def test_stream_sends_citations_before_cloud_llm_tokens(client, bypass_csrf, monkeypatch):
+    from app.main import app
+    from app.routes.auth import require_auth
+    from app.services import chatbot_service as cs_module
+
+    from tests.test_regressions import _parse_sse_events
+
+    service = cs_module.chatbot_service
+    monkeypatch.setattr(service, "rag", _FakeStreamingRag())
+    monkeypatch.setattr(service, "_lazy_init", lambda: None)
+    monkeypatch.setattr(service, "_is_document_generation_request", lambda message: False)
+    monkeypatch.setitem(app.dependency_overrides, require_auth, lambda: {"id": "user-1"})
+
+    response = client.post("/api/chat/stream", json={"message": "How do I incorporate?"})
+
+    events = _parse_sse_events(response.content)
+    assert [name for name, _ in events] == ["citations", "metadata", "token", "token", "correction", "done"]
+    assert events[0][1][0]["section"] == "7"
+    assert events[1][1]["model_used"] == "anthropic"
+    assert events[4][1] == {"answer": "File the documents [1]."}
+
+
+def test_stream_replays_a_cached_answer_as_one_token(client, bypass_csrf, monkeypatch):
+    from app.main import app
+    from app.routes.auth import require_auth
+    from app.services import chatbot_service as cs_module
+
+    from tests.test_regressions import _parse_sse_events
+
+    rag = _FakeStreamingRag()
+    rag.cached = asyncio.run(rag.aquery("How do I incorporate?"))
+    service = cs_module.chatbot_service
+    monkeypatch.setattr(service, "rag", rag)
+    monkeypatch.setattr(service, "_lazy_init", lambda: None)
+    monkeypatch.setattr(service, "_is_document_generation_request", lambda message: False)
+    monkeypatch.setitem(app.dependency_overrides, require_auth, lambda: {"id": "user-1"})
+
+    response = client.post("/api/chat/stream", json={"message": "How do I incorporate?"})
+
+    events = _parse_sse_events(response.content)
+    assert [name for name, _ in events] == ["citations", "metadata", "token", "done"]
+    assert events[0][1][0]["section"] == "7"
+    assert events[1][1]["model_used"] == "anthropic"
+    assert events[2][1] == {"token": "File the incorporation documents [1]."}
@@ -0,0 +1,82 @@
+"""Tests for chat admission control (app/services/chat_admission.py)."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.services.chat_admission import (
+    PRIORITY_AUTHENTICATED,
+    PRIORITY_DEMO,
+    ChatAdmission,
+    ChatQueueFull,
+)
+
+
+async def test_waiters_are_admitted_by_priority_then_arrival():
+    admission = ChatAdmission(max_concurrent=1, max_queue=3)
+    running = await admission.acquire(PRIORITY_AUTHENTICATED)
+    order = []
+
+    async def request(name: str, priority: int):
+        async with admission.slot(priority):
+            order.append(name)
+
+    waiters = [
+        asyncio.create_task(request("demo-1", PRIORITY_DEMO)),
+        asyncio.create_task(request("demo-2", PRIORITY_DEMO)),
+        asyncio.create_task(request("chat", PRIORITY_AUTHENTICATED)),
+    ]
+    await asyncio.sleep(0)
+    assert admission.stats()["queue_depth"] == 3
+    assert admission.stats()["queue_depth_by_priority"] == {PRIORITY_AUTHENTICATED: 1, PRIORITY_DEMO: 2}
+
+    running.release()
+    await asyncio.gather(*waiters)
+    assert order == ["chat", "demo-1", "demo-2"]
+    stats = admission.stats()
+    assert (stats["running"], stats["queue_depth"], stats["admitted"]) == (0, 0, 4)
+
+
+async def test_full_queue_rejects_immediately_with_retry_after():
+    admission = ChatAdmission(max_concurrent=1, max_queue=1)
+    running = await admission.acquire()
+    queued = asyncio.create_task(admission.acquire(PRIORITY_DEMO))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ChatQueueFull) as excinfo:
+        await admission.acquire(PRIORITY_DEMO)
+    assert excinfo.value.retry_after >= 1
+    assert admission.stats()["rejected"] == 1
+
+    running.release()
+    (await queued).release()
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    admission = ChatAdmission(max_concurrent=1, max_queue=2)
+    running = await admission.acquire()
+    waiter = asyncio.create_task(admission.acquire())
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert admission.stats()["queue_depth"] == 0
+
+    running.release()
+    assert admission.stats()["running"] == 0
+
+
+def test_demo_route_returns_503_when_queue_is_full(client, bypass_csrf, monkeypatch):
+    from app.routes import chatbot as chatbot_routes
+
+    full = ChatAdmission(max_concurrent=1, max_queue=0)
+    full._running = 1  # the only slot is taken
+    monkeypatch.setattr(chatbot_routes, "chat_admission", full)
+
+    response = client.post("/api/demo/message", json={"message": "What is Section 7?"})
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,116 @@
+"""Tests for zero-downtime corpus reloads in JurisGPTChatbotService.
+
+A full reload builds the new pipeline on a background thread while the old
+one keeps answering, swaps it in with one assignment, and only releases the
+old pipeline once the requests holding it have finished.
+
+_build_rag is replaced by a fake so no JurisGPTRAG (and no corpus) is loaded.
+"""
+
+from __future__ import annotations
+
+import threading
+from types import SimpleNamespace
+from typing import List, Optional
+
+import pytest
+
+from app.services.chatbot_service import JurisGPTChatbotService
+
+
+class _FakeRag:
+    def __init__(self, version: str) -> None:
+        self.corpus_version = version
+        self.corpus_as_of = "2026-01-01"
+        self.cache_cleared = False
+
+    def clear_response_cache(self) -> None:
+        self.cache_cleared = True
+
+    def get_corpus_stats(self) -> SimpleNamespace:
+        return SimpleNamespace(total_documents=3, loaded_files=["a.json"], load_timings={"a.json": 0.01})
+
+
+@pytest.fixture
+def service(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delenv("DISABLE_RAG", raising=False)
+    service = JurisGPTChatbotService()
+    service.rag = _FakeRag("old")
+    service._initialized = True
+    service._init_attempted = True
+    return service
+
+
+def _gated_build(service: JurisGPTChatbotService, release: threading.Event, error: Optional[Exception] = None):
+    phases: List[str] = []
+
+    def _build_rag(progress=None):
+        progress("corpus")
+        phases.append("corpus")
+        release.wait(timeout=5)
+        if error is not None:
+            raise error
+        return _FakeRag("new")
+
+    service._build_rag = _build_rag
+    return phases
+
+
+def test_full_reload_swaps_after_in_flight_requests(service):
+    release = threading.Event()
+    _gated_build(service, release)
+    old_rag = service.rag
+
+    with service.rag_lease() as pinned:
+        started = service.reload_corpus(full=True)
+        assert started["success"] and started["state"] == "building"
+        # The old pipeline keeps serving while the new one builds.
+        assert service.rag is old_rag
+
+        release.set()
+        service._reload_thread.join(timeout=5)
+        assert service.rag.corpus_version == "new"
+        assert pinned is old_rag and not old_rag.cache_cleared
+        assert service.reload_status()["draining_requests"] == 1
+
+    assert old_rag.cache_cleared
+    status = service.reload_status()
+    assert status["state"] == "ready"
+    assert status["draining_requests"] == 0
+    assert status["previous_corpus_version"] == "old"
+    assert status["corpus_version"] == status["serving_corpus_version"] == "new"
+    assert status["load_timings"] == {"a.json": 0.01}
+
+
+def test_reload_status_reports_build_phase_and_single_build(service):
+    release = threading.Event()
+    phases = _gated_build(service, release)
+
+    service.reload_corpus(full=True)
+    while not phases:
+        threading.Event().wait(0.01)
+    status = service.reload_status()
+    assert status["state"] == "building" and status["phase"] == "corpus"
+    assert status["elapsed_seconds"] >= 0
+
+    # A second request while building reports the running build.
+    thread = service._reload_thread
+    assert service.reload_corpus(full=True)["state"] == "building"
+    assert service._reload_thread is thread
+
+    release.set()
+    thread.join(timeout=5)
+    assert phases == ["corpus"]
+
+
+def test_failed_reload_keeps_serving_previous_corpus(service):
+    release = threading.Event()
+    release.set()
+    _gated_build(service, release, error=FileNotFoundError("corpus.json"))
+    old_rag = service.rag
+
+    result = service.reload_corpus(full=True, wait=True)
+    assert not result["success"]
+    assert result["error"].startswith("Vector store not found")
+    assert service.rag is old_rag and not old_rag.cache_cleared
+    assert service.reload_status()["state"] == "failed"
@@ -0,0 +1,141 @@
+"""Tests for the local-model inference worker (app/services/inference_worker.py)."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from app.services.inference_worker import (
+    InferenceCancelled,
+    InferenceDeadlineExceeded,
+    InferenceQueueFull,
+    InferenceWorker,
+)
+
+
+@pytest.fixture
+def worker():
+    worker = InferenceWorker("test", max_queue=3)
+    yield worker
+    worker.stop(timeout=5)
+
+
+def _blocker(worker: InferenceWorker):
+    """Submit a job that holds the worker until the returned event is set."""
+    started, release = threading.Event(), threading.Event()
+
+    def run(job):
+        started.set()
+        release.wait(5)
+
+    job = worker.submit(run)
+    assert started.wait(5)
+    return job, release
+
+
+def test_jobs_run_on_one_thread_by_priority_then_arrival(worker):
+    blocker, release = _blocker(worker)
+    order, threads = [], set()
+
+    def record(name):
+        def run(job):
+            order.append(name)
+            threads.add(threading.get_ident())
+        return run
+
+    jobs = [
+        worker.submit(record("demo-1"), priority=10),
+        worker.submit(record("demo-2"), priority=10),
+        worker.submit(record("chat"), priority=0),
+    ]
+    stats = worker.stats()
+    assert (stats["queue_depth"], stats["busy"]) == (3, True)
+    assert stats["queue_depth_by_priority"] == {0: 1, 10: 2}
+
+    release.set()
+    for job in [blocker, *jobs]:
+        job.result()
+    assert order == ["chat", "demo-1", "demo-2"]
+    assert len(threads) == 1 and threading.get_ident() not in threads
+    assert worker.stats()["completed"] == 4
+
+
+def test_full_queue_rejects_at_once(worker):
+    blocker, release = _blocker(worker)
+    for _ in range(3):
+        worker.submit(lambda job: None)
+
+    with pytest.raises(InferenceQueueFull):
+        worker.submit(lambda job: None)
+    assert worker.stats()["rejected"] == 1
+    release.set()
+    blocker.result()
+
+
+def test_cancelled_job_leaves_the_queue_without_running(worker):
+    blocker, release = _blocker(worker)
+    cancel = threading.Event()
+    ran = []
+    job = worker.submit(lambda job: ran.append(True), cancel=cancel)
+
+    cancel.set()
+    with pytest.raises(InferenceCancelled):
+        job.result()
+    assert list(job.stream()) == []
+    assert worker.stats()["queue_depth"] == 0
+
+    release.set()
+    blocker.result()
+    assert ran == [] and worker.stats()["cancelled"] == 1
+
+
+def test_running_job_stops_streaming_when_cancelled(worker):
+    emitted = threading.Event()
+
+    def run(job):
+        for token in range(1000):
+            if job.should_stop():
+                return
+            job.emit(token)
+            emitted.set()
+            threading.Event().wait(0.01)
+
+    job = worker.submit(run)
+    tokens = job.stream()
+    assert next(tokens) == 0
+    job.cancel()
+    rest = list(tokens)
+    job.result()
+    assert len(rest) < 999
+    assert worker.stats()["completed"] == 1
+
+
+def test_deadline_fails_queued_jobs_and_truncates_running_ones(worker):
+    blocker, release = _blocker(worker)
+    queued = worker.submit(lambda job: None, timeout=0.05)
+    with pytest.raises(InferenceDeadlineExceeded):
+        list(queued.stream())
+    release.set()
+    blocker.result()
+
+    def run(job):
+        while not job.should_stop():
+            job.emit("x")
+            threading.Event().wait(0.01)
+
+    running = worker.submit(run, timeout=0.1)
+    assert running.result() is None
+    assert running.truncated
+    stats = worker.stats()
+    assert (stats["expired"], stats["truncated"]) == (1, 1)
+
+
+def test_errors_reach_the_caller(worker):
+    def run(job):
+        raise ValueError("bad prompt")
+
+    with pytest.raises(ValueError, match="bad prompt"):
+        worker.submit(run).result()
+    assert worker.call(lambda: "still serving") == "still serving"
+    assert worker.stats()["failed"] == 1
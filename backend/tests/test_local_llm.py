@@ -0,0 +1,197 @@
+"""Tests for LocalLegalLLM prompt handling (app/services/local_llm.py).
+
+A fake ``llama_cpp.Llama`` (one token per character) stands in for the
+GGUF model.
+"""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from app.services.inference_worker import inference_priority
+from app.services.local_llm import LocalLegalLLM
+
+
+class _FakeLlama:
+    """Keeps a token context like llama.cpp: a call only evaluates the
+    tokens after the longest prefix shared with the current context."""
+
+    def __init__(self) -> None:
+        self.tokenized = []
+        self.prompts = []
+        self.context = []
+        self.evaluated = 0
+        self.calls = []
+        self.threads = set()
+        self.active = self.max_active = 0
+
+    @property
+    def n_tokens(self):
+        return len(self.context)
+
+    @property
+    def input_ids(self):
+        return list(self.context)
+
+    def tokenize(self, text: bytes, add_bos: bool = True):
+        self.tokenized.append(text)
+        return ([1] if add_bos else []) + list(text)
+
+    def reset(self):
+        self.context = []
+
+    def eval(self, tokens):
+        self.context.extend(tokens)
+        self.evaluated += len(tokens)
+
+    def save_state(self):
+        return list(self.context)
+
+    def load_state(self, state):
+        self.context = list(state)
+
+    def __call__(self, prompt, **kwargs):
+        self.threads.add(threading.get_ident())
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        threading.Event().wait(0.005)
+        self.active -= 1
+        self.prompts.append(prompt)
+        tokens = prompt if isinstance(prompt, list) else self.tokenize(prompt.encode())
+        shared = 0
+        while shared < min(len(tokens), len(self.context)) and tokens[shared] == self.context[shared]:
+            shared += 1
+        self.context = self.context[:shared]
+        self.eval(tokens[shared:] + [0])  # prompt suffix + one generated token
+        self.calls.append(kwargs)
+        if kwargs.get("stream"):
+            return iter([{"choices": [{"text": "ok"}]}])
+        return {"choices": [{"text": "ok"}]}
+
+
+@pytest.fixture
+def llm():
+    llm = LocalLegalLLM(model_path="unused.gguf")
+    llm._llm = _FakeLlama()
+    llm._loaded = True
+    yield llm
+    llm._worker.stop(timeout=5)
+
+
+def test_prefix_is_evaluated_once_and_reused(llm):
+    llm.set_prompt_prefix("RULES\n\n")
+    fake = llm._llm
+    assert fake.evaluated == len(b"RULES\n\n") + 1
+
+    assert llm.generate("RULES\n\nQ1") == "ok"
+    assert list(llm.stream_generate("RULES\n\nX2")) == ["ok"]
+
+    assert fake.tokenized == [b"RULES\n\n", b"Q1", b"X2"]
+    assert fake.prompts[0] == [1] + list(b"RULES\n\nQ1")
+    assert fake.prompts[1] == [1] + list(b"RULES\n\nX2")
+    # After priming, each request evaluates only its suffix (+ the generated token).
+    assert fake.evaluated == len(b"RULES\n\n") + 1 + 2 * (len(b"Q1") + 1)
+    assert llm.prefix_stats()["prefix_reused"] == 2
+
+
+def test_prefix_state_is_restored_after_an_unrelated_prompt(llm):
+    llm.set_prompt_prefix("RULES\n\n")
+    fake = llm._llm
+    llm.generate("Other prompt")
+    before = fake.evaluated
+
+    llm.generate("RULES\n\nQ1")
+
+    assert fake.evaluated - before == len(b"Q1") + 1
+    assert llm.prefix_stats()["prefix_restored"] == 1
+
+
+def test_prompt_without_the_prefix_is_passed_as_text(llm):
+    llm.set_prompt_prefix("RULES\n\n")
+
+    llm._llm.tokenized.clear()
+
+    llm.generate("Other prompt")
+
+    assert llm._llm.prompts == ["Other prompt"]
+    assert llm._llm.tokenized == [b"Other prompt"]  # by llama.cpp itself
+
+
+def test_count_tokens_uses_the_model_tokenizer(llm):
+    assert llm.count_tokens("Section 7") == len(b"Section 7")
+
+
+def test_concurrent_requests_are_served_one_at_a_time_on_the_worker(llm):
+    fake = llm._llm
+    results = []
+    callers = [
+        threading.Thread(target=lambda i=i: results.append(llm.generate(f"Q{i}")))
+        for i in range(4)
+    ]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join(5)
+
+    assert results == ["ok"] * 4
+    assert fake.max_active == 1
+    assert len(fake.threads) == 1 and threading.get_ident() not in fake.threads
+    assert llm.stats()["completed"] == 4
+
+
+def test_max_tokens_is_capped_and_priority_comes_from_the_request(llm):
+    llm._max_tokens = 256
+    token = inference_priority.set(10)
+    try:
+        llm.generate("Q", max_tokens=4096)
+    finally:
+        inference_priority.reset(token)
+
+    assert llm._llm.calls[-1]["max_tokens"] == 256
+    assert llm.stats()["queue_depth"] == 0
+
+
+def test_stream_stops_generating_when_cancelled(llm):
+    produced = []
+
+    def endless(prompt, **kwargs):
+        def chunks():
+            for i in range(10_000):
+                produced.append(i)
+                threading.Event().wait(0.001)
+                yield {"choices": [{"text": f"t{i} "}]}
+        return chunks()
+
+    llm._llm = type("_Endless", (), {"__call__": staticmethod(endless)})()
+    cancel = threading.Event()
+    tokens = llm.stream_generate("Q", cancel=cancel)
+    assert next(tokens) == "t0 "
+    cancel.set()
+    list(tokens)
+    llm._worker.call(lambda: None)  # wait for the worker to wind down
+
+    assert len(produced) < 10_000
+    assert not llm.stats()["busy"]
+
+
+
+
+def test_stream_reports_when_it_stopped_at_its_deadline(llm):
+    finished = threading.Event()
+    assert list(llm.stream_generate("Q", truncated=finished)) == ["ok"]
+    assert not finished.is_set()
+
+    def endless(prompt, **kwargs):
+        def chunks():
+            for i in range(10_000):
+                threading.Event().wait(0.001)
+                yield {"choices": [{"text": f"t{i} "}]}
+        return chunks()
+
+    llm._llm = type("_Endless", (), {"__call__": staticmethod(endless)})()
+    truncated = threading.Event()
+    tokens = list(llm.stream_generate("Q", deadline_seconds=0.05, truncated=truncated))
+    assert 0 < len(tokens) < 10_000
+    assert truncated.is_set()
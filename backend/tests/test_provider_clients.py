@@ -0,0 +1,93 @@
+"""Tests for the shared LLM provider client registry (app/services/provider_clients.py).
+
+A local stub HTTP server stands in for the provider, so connection reuse
+can be observed directly.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.provider_clients import ProviderClients
+
+COMPLETION = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [
+        {"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}
+    ],
+}
+
+
+@pytest.fixture
+def stub_provider():
+    connections = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            connections.append(self.client_address)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            body = json.dumps(COMPLETION).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/v1", connections
+    server.shutdown()
+    server.server_close()
+
+
+def _ask(client):
+    return client.chat.completions.create(
+        model="gpt-4o-mini", messages=[{"role": "user", "content": "hi"}]
+    ).choices[0].message.content
+
+
+def test_requests_reuse_one_keep_alive_connection(stub_provider):
+    pytest.importorskip("openai")
+    base_url, connections = stub_provider
+    clients = ProviderClients(max_connections=4, http2=False)
+
+    first = clients.openai(api_key="sk-test", base_url=base_url)
+    assert clients.openai(api_key="sk-test", base_url=base_url) is first
+    assert [_ask(clients.openai(api_key="sk-test", base_url=base_url)) for _ in range(5)] == ["ok"] * 5
+
+    assert len(connections) == 1
+    assert clients.stats()["pools"] == ["openai-sync"]
+
+
+async def test_async_clients_share_the_provider_pool(stub_provider):
+    pytest.importorskip("openai")
+    base_url, connections = stub_provider
+    clients = ProviderClients(http2=False)
+
+    for api_key in ("sk-one", "sk-two"):
+        client = clients.async_openai(api_key=api_key, base_url=base_url)
+        response = await client.chat.completions.create(
+            model="gpt-4o-mini", messages=[{"role": "user", "content": "hi"}]
+        )
+        assert response.choices[0].message.content == "ok"
+
+    assert len(connections) == 1
+    assert clients.stats()["sdk_clients"] == 2
+    await clients.aclose()
+    assert clients.stats()["pools"] == []
@@ -161,7 +161,7 @@ class TestChatStreamSSEContract:
             cs_module.chatbot_service, "rag", None
         ), patch.object(
             cs_module.chatbot_service,
-            "get_legal_response",
+            "aget_legal_response",
             return_value=mock_response,
         ):
             response = client.post(
@@ -209,7 +209,7 @@ class TestChatStreamSSEContract:
             cs_module.chatbot_service, "rag", None
         ), patch.object(
             cs_module.chatbot_service,
-            "get_legal_response",
+            "aget_legal_response",
             return_value=mock_response,
         ):
             response = client.post(
@@ -249,7 +249,7 @@ class TestChatStreamSSEContract:
             cs_module.chatbot_service, "rag", None
         ), patch.object(
             cs_module.chatbot_service,
-            "get_legal_response",
+            "aget_legal_response",
             return_value=mock_response,
         ):
             response = client.post(
@@ -296,7 +296,7 @@ class TestChatStreamSSEContract:
             return_value=True,
         ), patch.object(
             cs_module.chatbot_service,
-            "get_legal_response",
+            "aget_legal_response",
             return_value=mock_response,
         ):
             response = client.post(
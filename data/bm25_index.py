@@ -0,0 +1,740 @@
+"""
+Compact inverted index + BM25 engine for the JurisGPT lexical corpus.
+
+This is the one token structure behind lexical retrieval: the BM25 scorer,
+the coverage scorer and candidate selection in ``rag_pipeline.py`` all read
+its posting lists, and corpus records no longer carry their own token lists
+and sets.
+
+Tokens are interned to integer term ids. Each term's posting list is stored
+as delta-encoded doc ids packed as varints into one shared ``uint8`` buffer,
+with a parallel ``uint16`` term-frequency array, and decoded with vectorized
+NumPy on demand. BM25 weights are computed from the term frequencies at query
+time, so only the posting lists of the query's own terms are touched and the
+top k are selected with ``argpartition``.
+
+Scoring is the same Okapi BM25 variant as ``rank_bm25.BM25Okapi`` (k1=1.5,
+b=0.75, negative IDFs floored to ``epsilon * average_idf``), so rankings
+match the previous ``rank_bm25`` index.
+"""
+
+import logging
+import threading
+from bisect import bisect_left
+from collections import Counter
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Term frequencies are stored as uint16; BM25 saturates long before this.
+MAX_TERM_FREQUENCY = np.iinfo(np.uint16).max
+
+
+def varint_sizes(values: np.ndarray) -> np.ndarray:
+    """Encoded byte length of every value."""
+    values = np.asarray(values, dtype=np.uint64)
+    sizes = np.ones(len(values), dtype=np.int64)
+    remaining = values >> np.uint64(7)
+    while remaining.any():
+        sizes += remaining > 0
+        remaining >>= np.uint64(7)
+    return sizes
+
+
+def encode_varints(values: np.ndarray) -> np.ndarray:
+    """LEB128-style varint encoding of non-negative ints (7 bits per byte,
+    high bit set on every byte but the last)."""
+    values = np.asarray(values, dtype=np.uint64)
+    if not len(values):
+        return np.zeros(0, dtype=np.uint8)
+    byte_counts = varint_sizes(values)
+    starts = np.cumsum(byte_counts) - byte_counts
+    encoded = np.zeros(int(byte_counts.sum()), dtype=np.uint8)
+    for shift in range(int(byte_counts.max())):
+        present = byte_counts > shift
+        chunk = (values[present] >> np.uint64(7 * shift)) & np.uint64(0x7F)
+        more = byte_counts[present] > shift + 1
+        encoded[starts[present] + shift] = chunk.astype(np.uint8) | (more.astype(np.uint8) << 7)
+    return encoded
+
+
+def decode_varints(encoded: np.ndarray) -> np.ndarray:
+    """Inverse of ``encode_varints``."""
+    if not len(encoded):
+        return np.zeros(0, dtype=np.int64)
+    encoded = np.asarray(encoded, dtype=np.uint8)
+    ends = np.flatnonzero(encoded < 0x80)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    shifts = 7 * (np.arange(len(encoded)) - np.repeat(starts, ends - starts + 1))
+    parts = (encoded & 0x7F).astype(np.int64) << shifts
+    return np.add.reduceat(parts, starts)
+
+
+class BM25Index:
+    """Okapi BM25 over compressed term-major posting lists.
+
+    For vocabulary term ``t``, ``posting_bytes[byte_ptr[t]:byte_ptr[t + 1]]`` holds
+    the varint-encoded gaps between the ascending ids of the documents that
+    contain it, and ``tfs[indptr[t]:indptr[t + 1]]`` the term's frequency in
+    each of those documents.
+
+    The index can also be updated in place (``add_documents`` /
+    ``remove_documents``): new documents go to an uncompressed delta segment
+    and removed ones are tombstoned, with document frequencies, lengths and
+    IDF kept exact, so scores always equal those of a full rebuild over the
+    live documents. Doc ids are never reused or renumbered; ``compact``
+    (run in a background thread once the delta grows past
+    ``compaction_ratio`` of the index) folds the delta into the compressed
+    arrays and drops tombstoned postings. Queries hold the index lock only
+    to snapshot what they read, so they score concurrently.
+    """
+
+    ARRAY_NAMES = ("indptr", "byte_ptr", "posting_bytes", "tfs", "doc_len", "idf")
+
+    # Delta postings / tombstoned documents, as a fraction of the compressed
+    # index, that trigger a background compaction (None: only ``compact()``).
+    compaction_ratio: Optional[float] = 0.1
+
+    def __init__(
+        self,
+        corpus_tokens: Iterable[Union[Sequence[str], Mapping[str, int]]],
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+        vocabulary: Optional[Dict[str, int]] = None,
+    ):
+        """Build the index from per-document token lists.
+
+        A document may also be given as a ``token -> term frequency`` mapping
+        (e.g. counted in a worker process, see ``corpus_loader.py``); the
+        result is the same as for its token list.
+
+        ``vocabulary`` lets several indexes share one ``token -> term id``
+        map (new tokens are appended to it), e.g. the title index reuses the
+        body vocabulary so a corpus snapshot stores it only once.
+        """
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.vocabulary: Dict[str, int] = vocabulary if vocabulary is not None else {}
+
+        term_ids: List[int] = []
+        posting_docs: List[int] = []
+        posting_tfs: List[int] = []
+        doc_lengths: List[int] = []
+
+        for doc_id, tokens in enumerate(corpus_tokens):
+            term_counts, doc_length = self._term_counts(tokens)
+            doc_lengths.append(doc_length)
+            for token, tf in term_counts.items():
+                term_id = self.vocabulary.setdefault(token, len(self.vocabulary))
+                term_ids.append(term_id)
+                posting_docs.append(doc_id)
+                posting_tfs.append(tf)
+
+        self.corpus_size = len(doc_lengths)
+        total_tokens = sum(doc_lengths)
+        self.avgdl = total_tokens / self.corpus_size if self.corpus_size else 0.0
+
+        self.doc_len = np.asarray(doc_lengths, dtype=np.uint32)
+        doc_freqs = self._set_postings(
+            np.asarray(term_ids, dtype=np.int64),
+            np.asarray(posting_docs, dtype=np.int64),
+            np.asarray(posting_tfs, dtype=np.int64),
+            len(self.vocabulary),
+        )
+        self.idf = self._compute_idf(doc_freqs)
+        self._length_norm = self._compute_length_norm()
+        self._init_update_state()
+
+    @classmethod
+    def from_arrays(
+        cls,
+        vocabulary: Dict[str, int],
+        arrays: Dict[str, np.ndarray],
+        params: Dict[str, Any],
+    ) -> "BM25Index":
+        """Rebuild an index from ``to_arrays()`` output without re-scoring.
+
+        The arrays may be read-only memory maps (see ``corpus_snapshot.py``);
+        they are used in place, not copied.
+        """
+        index = cls.__new__(cls)
+        index.vocabulary = vocabulary
+        index.k1 = params["k1"]
+        index.b = params["b"]
+        index.epsilon = params["epsilon"]
+        index.avgdl = params["avgdl"]
+        index.average_idf = params["average_idf"]
+        for name in cls.ARRAY_NAMES:
+            setattr(index, name, arrays[name])
+        index.corpus_size = len(index.doc_len)
+        index._length_norm = index._compute_length_norm()
+        index._init_update_state()
+        return index
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Return the index arrays and scalar parameters for serialization.
+
+        Pending updates are compacted first. An index with removed documents
+        cannot be serialized: their ids stay allocated, so rebuild instead.
+        """
+        self.compact()
+        with self._lock:
+            if self._removed:
+                raise ValueError("index has removed documents; rebuild it before serializing")
+            self._refresh_statistics()
+            arrays = {name: getattr(self, name) for name in self.ARRAY_NAMES}
+            params = {
+                "k1": self.k1,
+                "b": self.b,
+                "epsilon": self.epsilon,
+                "avgdl": self.avgdl,
+                "average_idf": self.average_idf,
+            }
+        return arrays, params
+
+    # ─── Index construction ──────────────────────────────────────────
+
+    @staticmethod
+    def _term_counts(tokens: Union[Sequence[str], Mapping[str, int]]) -> Tuple[Mapping[str, int], int]:
+        """``(token -> tf, document length)`` for a token list or term-count map."""
+        if isinstance(tokens, Mapping):
+            return tokens, sum(tokens.values())
+        return Counter(tokens), len(tokens)
+
+    def _set_postings(
+        self,
+        term_array: np.ndarray,
+        doc_ids: np.ndarray,
+        tfs: np.ndarray,
+        num_terms: int,
+    ) -> np.ndarray:
+        """Encode ``(term, doc, tf)`` postings into the compressed arrays.
+
+        Postings of one term must already be in ascending doc order. Returns
+        the per-term document frequencies.
+        """
+        # Group postings by term; the stable sort keeps each list's doc order.
+        order = np.argsort(term_array, kind="stable")
+        doc_ids = doc_ids[order]
+        doc_freqs = np.bincount(term_array, minlength=num_terms)
+        indptr = np.zeros(num_terms + 1, dtype=np.int64)
+        np.cumsum(doc_freqs, out=indptr[1:])
+
+        # Gap-encode each posting list: its first entry keeps the absolute
+        # doc id, every later one the distance to its predecessor.
+        gaps = np.diff(doc_ids, prepend=0)
+        list_starts = indptr[:-1][doc_freqs > 0]
+        gaps[list_starts] = doc_ids[list_starts]
+        byte_offsets = np.zeros(len(gaps) + 1, dtype=np.int64)
+        np.cumsum(varint_sizes(gaps), out=byte_offsets[1:])
+
+        self.tfs = np.minimum(tfs[order], MAX_TERM_FREQUENCY).astype(np.uint16)
+        self.posting_bytes = encode_varints(gaps)
+        self.byte_ptr = byte_offsets[indptr]
+        self.indptr = indptr
+        return doc_freqs
+
+    def _compute_idf(self, doc_freqs: np.ndarray, num_documents: Optional[int] = None) -> np.ndarray:
+        """ATIRE-style IDF with the ``BM25Okapi`` epsilon floor.
+
+        The average runs over terms that occur in at least one document,
+        like ``BM25Okapi`` (terms of removed documents, or of other indexes
+        sharing the vocabulary, do not count).
+        """
+        num_documents = self.corpus_size if num_documents is None else num_documents
+        present = doc_freqs > 0
+        if not present.any():
+            self.average_idf = 0.0
+            return np.zeros(len(doc_freqs), dtype=np.float64)
+        freqs = doc_freqs.astype(np.float64)
+        idf = np.log(num_documents - freqs + 0.5) - np.log(freqs + 0.5)
+        self.average_idf = float(idf[present].sum()) / int(present.sum())
+        idf[idf < 0] = self.epsilon * self.average_idf
+        return idf
+
+    def _compute_length_norm(self) -> np.ndarray:
+        """Per-document ``k1 * (1 - b + b * dl / avgdl)`` BM25 denominator term."""
+        avgdl = self.avgdl or 1.0
+        return self.k1 * (1 - self.b + self.b * self.doc_len.astype(np.float64) / avgdl)
+
+    # ─── Incremental updates ─────────────────────────────────────────
+
+    def _init_update_state(self):
+        self._lock = threading.RLock()
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        # term id -> (ascending doc ids, tfs) of documents added since the
+        # last compaction; their ids are above every compressed posting.
+        self._delta: Dict[int, Tuple[List[int], List[int]]] = {}
+        self._delta_postings = 0
+        self._removed: Set[int] = set()
+        self._unpurged: Set[int] = set()  # removed, still on posting lists
+        self._removed_mask: Optional[np.ndarray] = None
+        self._doc_freqs: Optional[np.ndarray] = None
+        self._statistics_stale = False
+
+    def _mutable_doc_freqs(self) -> np.ndarray:
+        """Live per-term document frequencies, sized to the shared vocabulary."""
+        if self._doc_freqs is None:
+            self._doc_freqs = np.diff(np.asarray(self.indptr)).astype(np.int64)
+        if len(self._doc_freqs) < len(self.vocabulary):
+            self._doc_freqs = np.concatenate([
+                self._doc_freqs,
+                np.zeros(len(self.vocabulary) - len(self._doc_freqs), dtype=np.int64),
+            ])
+        return self._doc_freqs
+
+    def _refresh_statistics(self):
+        """Recompute avgdl, IDF and length norms after updates (O(corpus) in
+        NumPy, done lazily once per batch of updates)."""
+        if not self._statistics_stale:
+            return
+        live = self.document_count
+        removed_length = int(self.doc_len[sorted(self._removed)].sum()) if self._removed else 0
+        total_length = int(self.doc_len.sum(dtype=np.int64)) - removed_length
+        self.avgdl = total_length / live if live else 0.0
+        self.idf = self._compute_idf(self._mutable_doc_freqs(), live)
+        self._length_norm = self._compute_length_norm()
+        self._statistics_stale = False
+
+    def add_documents(
+        self, corpus_tokens: Iterable[Union[Sequence[str], Mapping[str, int]]]
+    ) -> List[int]:
+        """Index more documents; returns their doc ids (appended after the
+        current ones). Costs time in proportion to the new documents."""
+        with self._lock:
+            first_id = self.corpus_size
+            doc_lengths: List[int] = []
+            touched: List[int] = []
+            for doc_id, tokens in enumerate(corpus_tokens, first_id):
+                term_counts, doc_length = self._term_counts(tokens)
+                doc_lengths.append(doc_length)
+                for token, tf in term_counts.items():
+                    term_id = self.vocabulary.setdefault(token, len(self.vocabulary))
+                    docs, tfs = self._delta.setdefault(term_id, ([], []))
+                    docs.append(doc_id)
+                    tfs.append(min(tf, MAX_TERM_FREQUENCY))
+                    touched.append(term_id)
+            if not doc_lengths:
+                return []
+
+            doc_freqs = self._mutable_doc_freqs()
+            np.add.at(doc_freqs, np.asarray(touched, dtype=np.int64), 1)
+            self._delta_postings += len(touched)
+            self.doc_len = np.concatenate([self.doc_len, np.asarray(doc_lengths, dtype=np.uint32)])
+            if self._removed_mask is not None:
+                self._removed_mask = np.concatenate(
+                    [self._removed_mask, np.zeros(len(doc_lengths), dtype=bool)]
+                )
+            self.corpus_size = len(self.doc_len)
+            self._statistics_stale = True
+            new_ids = list(range(first_id, self.corpus_size))
+        self._maybe_compact()
+        return new_ids
+
+    def remove_documents(
+        self,
+        doc_ids: Sequence[int],
+        corpus_tokens: Iterable[Union[Sequence[str], Mapping[str, int]]],
+    ):
+        """Tombstone documents so they stop matching and leave the statistics.
+
+        ``corpus_tokens`` are the removed documents' token lists (or term
+        counts), as they were indexed: the index keeps no document -> terms
+        map, so this is how their document frequencies are taken back out.
+        Already removed ids are ignored.
+        """
+        with self._lock:
+            doc_freqs = self._mutable_doc_freqs()
+            # Queries read the mask outside the lock, so it is replaced, not written.
+            removed_mask = None
+            for doc_id, tokens in zip(doc_ids, corpus_tokens):
+                doc_id = int(doc_id)
+                if not 0 <= doc_id < self.corpus_size:
+                    raise IndexError(f"doc id {doc_id} is not in the index")
+                if doc_id in self._removed:
+                    continue
+                term_counts, doc_length = self._term_counts(tokens)
+                if doc_length != int(self.doc_len[doc_id]):
+                    raise ValueError(f"tokens do not match indexed document {doc_id}")
+                term_ids = [self.vocabulary[token] for token in term_counts]
+                np.subtract.at(doc_freqs, np.asarray(term_ids, dtype=np.int64), 1)
+                self._removed.add(doc_id)
+                self._unpurged.add(doc_id)
+                if removed_mask is None:
+                    removed_mask = (
+                        np.zeros(self.corpus_size, dtype=bool)
+                        if self._removed_mask is None
+                        else self._removed_mask.copy()
+                    )
+                removed_mask[doc_id] = True
+            if removed_mask is not None:
+                self._removed_mask = removed_mask
+            self._statistics_stale = True
+        self._maybe_compact()
+
+    @property
+    def document_count(self) -> int:
+        """Number of live (not removed) documents."""
+        return self.corpus_size - len(self._removed)
+
+    @property
+    def has_pending_updates(self) -> bool:
+        """Whether a compaction would change the compressed arrays."""
+        return bool(self._delta or self._unpurged)
+
+    def _maybe_compact(self):
+        """Start a background compaction once the delta is large enough."""
+        ratio = self.compaction_ratio
+        if ratio is None:
+            return
+        with self._lock:
+            threshold = ratio * max(len(self.tfs), 1)
+            if self._delta_postings <= threshold and len(self._unpurged) <= ratio * self.corpus_size:
+                return
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return
+            self._compaction_thread = threading.Thread(
+                target=self.compact, name="bm25-compaction", daemon=True
+            )
+            self._compaction_thread.start()
+
+    def compact(self):
+        """Fold the delta segment into the compressed postings and drop
+        tombstoned postings. Queries and updates keep running meanwhile:
+        the new arrays are built from a copy and swapped in at the end."""
+        with self._compaction_lock:
+            with self._lock:
+                if not self.has_pending_updates:
+                    return
+                indptr, posting_bytes, tfs = self.indptr, self.posting_bytes, self.tfs
+                delta = {term_id: (list(docs), list(freqs)) for term_id, (docs, freqs) in self._delta.items()}
+                purged = set(self._unpurged)
+                first_new_id = self.corpus_size
+                num_terms = max(len(indptr) - 1, max(delta, default=-1) + 1)
+
+            # Absolute doc ids of every compressed posting: cumulative gaps,
+            # restarted at the first entry of each posting list.
+            list_lengths = np.diff(np.asarray(indptr))
+            gaps_sum = np.cumsum(decode_varints(posting_bytes))
+            list_base = np.concatenate([[0], gaps_sum])[np.asarray(indptr[:-1])]
+            doc_parts = [gaps_sum - np.repeat(list_base, list_lengths)]
+            term_parts = [np.repeat(np.arange(len(list_lengths), dtype=np.int64), list_lengths)]
+            tf_parts = [np.asarray(tfs, dtype=np.int64)]
+            for term_id, (docs, freqs) in delta.items():
+                doc_parts.append(np.asarray(docs, dtype=np.int64))
+                term_parts.append(np.full(len(docs), term_id, dtype=np.int64))
+                tf_parts.append(np.asarray(freqs, dtype=np.int64))
+            doc_ids = np.concatenate(doc_parts)
+            term_array = np.concatenate(term_parts)
+            term_freqs = np.concatenate(tf_parts)
+            if purged:
+                keep = ~np.isin(doc_ids, np.fromiter(purged, dtype=np.int64))
+                doc_ids, term_array, term_freqs = doc_ids[keep], term_array[keep], term_freqs[keep]
+
+            compacted = BM25Index.__new__(BM25Index)
+            compacted._set_postings(term_array, doc_ids, term_freqs, num_terms)
+
+            with self._lock:
+                self.indptr = compacted.indptr
+                self.byte_ptr = compacted.byte_ptr
+                self.posting_bytes = compacted.posting_bytes
+                self.tfs = compacted.tfs
+                # Keep only what arrived after the copy above was taken.
+                for term_id in list(self._delta):
+                    docs, freqs = self._delta[term_id]
+                    cut = bisect_left(docs, first_new_id)
+                    if cut == len(docs):
+                        del self._delta[term_id]
+                    elif cut:
+                        self._delta[term_id] = (docs[cut:], freqs[cut:])
+                self._delta_postings = sum(len(docs) for docs, _ in self._delta.values())
+                self._unpurged -= purged
+            logger.info("BM25 index compacted (%d postings)", len(compacted.tfs))
+
+    # ─── Scoring ─────────────────────────────────────────────────────
+
+    def _query_terms(self, query_tokens: Sequence[str]) -> List[Tuple[int, int]]:
+        """Map query tokens to ``(term_id, count)``; unknown tokens score 0."""
+        # A shared vocabulary can hold terms that this index never saw; those
+        # fall outside ``indptr`` and the delta and simply do not match.
+        num_terms = len(self.indptr) - 1
+        counts = Counter(token for token in query_tokens if token in self.vocabulary)
+        return [
+            (self.vocabulary[token], count)
+            for token, count in counts.items()
+            if self.vocabulary[token] < num_terms or self.vocabulary[token] in self._delta
+        ]
+
+    def _snapshot_postings(self, term_ids: Iterable[int]) -> Tuple[Dict[int, Any], Optional[np.ndarray]]:
+        """What decoding ``term_ids`` needs, as of now (caller holds ``_lock``).
+
+        Returns ``term id -> (varint bytes, tfs, delta)`` and the removed-
+        document mask (None while no removed document is on a posting list).
+        Compaction and ``remove_documents`` replace the arrays rather than
+        write to them, so views stay valid; delta lists grow in place and
+        are copied. Decoding can then run without the lock.
+        """
+        sources = {}
+        for term_id in term_ids:
+            if term_id + 1 < len(self.indptr):
+                encoded = self.posting_bytes[self.byte_ptr[term_id]:self.byte_ptr[term_id + 1]]
+                tfs = self.tfs[self.indptr[term_id]:self.indptr[term_id + 1]]
+            else:
+                encoded, tfs = None, None
+            delta = self._delta.get(term_id)
+            if delta is not None:
+                delta = (np.asarray(delta[0], dtype=np.int64), np.asarray(delta[1], dtype=np.uint16))
+            sources[term_id] = (encoded, tfs, delta)
+        return sources, self._removed_mask if self._unpurged else None
+
+    @staticmethod
+    def _decode_postings(source: Any, removed_mask: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """``(doc ids, tfs)`` of one term's live postings, doc ids ascending."""
+        encoded, tfs, delta = source
+        if encoded is not None:
+            doc_ids = np.cumsum(decode_varints(encoded))
+        else:
+            doc_ids = np.zeros(0, dtype=np.int64)
+            tfs = np.zeros(0, dtype=np.uint16)
+        if delta is not None:
+            doc_ids = np.concatenate([doc_ids, delta[0]])
+            tfs = np.concatenate([tfs, delta[1]])
+        if removed_mask is not None:
+            live = ~removed_mask[doc_ids]
+            doc_ids, tfs = doc_ids[live], tfs[live]
+        return doc_ids, tfs
+
+    def _term_weights(
+        self, idf: float, length_norm: np.ndarray, doc_ids: np.ndarray, tfs: np.ndarray
+    ) -> np.ndarray:
+        """BM25 weight of one occurrence of a term with ``idf`` in the query:
+        ``idf * tf * (k1 + 1) / (tf + k1 * norm)`` per posting."""
+        tfs = tfs.astype(np.float64)
+        return idf * (tfs * (self.k1 + 1) / (tfs + length_norm[doc_ids]))
+
+    def postings(self, token: str) -> np.ndarray:
+        """Ascending ids of the live documents that contain ``token``."""
+        term_id = self.vocabulary.get(token)
+        if term_id is None:
+            return np.zeros(0, dtype=np.int64)
+        with self._lock:
+            sources, removed_mask = self._snapshot_postings([term_id])
+        return self._decode_postings(sources[term_id], removed_mask)[0]
+
+    def _scoring_snapshot(self, queries: Sequence[Sequence[str]]):
+        """Per-query terms and everything scoring them reads, taken under
+        ``_lock`` so that scoring itself can run concurrently with other
+        queries and with updates."""
+        with self._lock:
+            self._refresh_statistics()
+            query_terms = [self._query_terms(tokens) for tokens in queries]
+            sources, removed_mask = self._snapshot_postings(
+                {term_id for terms in query_terms for term_id, _ in terms}
+            )
+            return query_terms, sources, removed_mask, self.idf, self._length_norm, self.corpus_size
+
+    def get_scores(self, query_tokens: Sequence[str]) -> np.ndarray:
+        """Dense score vector over the whole corpus (``BM25Okapi`` compatible)."""
+        (terms,), sources, removed_mask, idf, length_norm, corpus_size = self._scoring_snapshot([query_tokens])
+        scores = np.zeros(corpus_size, dtype=np.float64)
+        for term_id, count in terms:
+            doc_ids, tfs = self._decode_postings(sources[term_id], removed_mask)
+            scores[doc_ids] += count * self._term_weights(idf[term_id], length_norm, doc_ids, tfs)
+        return scores
+
+    def top_k(self, query_tokens: Sequence[str], k: int) -> List[Tuple[int, float]]:
+        """Return up to ``k`` ``(doc_id, score)`` pairs with a positive score.
+
+        Only documents on the query terms' posting lists are scored. Ties are
+        broken by ascending doc id, matching a stable descending sort of the
+        full ``get_scores`` vector.
+        """
+        if k <= 0:
+            return []
+        (terms,), sources, removed_mask, idf, length_norm, _ = self._scoring_snapshot([query_tokens])
+        if not terms:
+            return []
+
+        doc_parts = []
+        weight_parts = []
+        for term_id, count in terms:
+            doc_ids, tfs = self._decode_postings(sources[term_id], removed_mask)
+            doc_parts.append(doc_ids)
+            weight_parts.append(count * self._term_weights(idf[term_id], length_norm, doc_ids, tfs))
+        candidates, inverse = np.unique(np.concatenate(doc_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weight_parts))
+
+        positive = scores > 0
+        if not positive.all():
+            candidates, scores = candidates[positive], scores[positive]
+        if len(scores) > k:
+            # Keep everything tied with the k-th best score so tie-breaking
+            # by doc id below is exact.
+            kth_score = scores[np.argpartition(-scores, k - 1)[k - 1]]
+            keep = scores >= kth_score
+            candidates, scores = candidates[keep], scores[keep]
+        order = np.lexsort((candidates, -scores))[:k]
+        return [(int(candidates[i]), float(scores[i])) for i in order]
+
+    def top_k_many(
+        self, queries: Sequence[Sequence[str]], k: int
+    ) -> List[List[Tuple[int, float]]]:
+        """``top_k`` for a batch of queries in one vectorized pass.
+
+        Computes the (query x document) score matrix as a sparse product:
+        every posting list is decoded once for the whole batch, the
+        ``(query, doc, weight)`` contributions of all queries are summed with
+        a single ``bincount`` and one ``lexsort`` orders every query's hits.
+        Results are identical to calling ``top_k`` per query.
+        """
+        results: List[List[Tuple[int, float]]] = [[] for _ in queries]
+        if k <= 0:
+            return results
+
+        decoded: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        query_parts: List[np.ndarray] = []
+        doc_parts: List[np.ndarray] = []
+        weight_parts: List[np.ndarray] = []
+        query_terms, sources, removed_mask, idf, length_norm, corpus_size = self._scoring_snapshot(queries)
+        corpus_size = max(corpus_size, 1)
+        # Contributions are laid out query by query in each query's own
+        # term order, so the float sums match ``top_k`` exactly.
+        for query_idx, terms in enumerate(query_terms):
+            for term_id, count in terms:
+                if term_id not in decoded:
+                    doc_ids, tfs = self._decode_postings(sources[term_id], removed_mask)
+                    decoded[term_id] = (doc_ids, self._term_weights(idf[term_id], length_norm, doc_ids, tfs))
+                doc_ids, weights = decoded[term_id]
+                query_parts.append(np.full(len(doc_ids), query_idx, dtype=np.int64))
+                doc_parts.append(doc_ids)
+                weight_parts.append(count * weights)
+        if not doc_parts:
+            return results
+
+        keys = np.concatenate(query_parts) * corpus_size + np.concatenate(doc_parts)
+        cells, inverse = np.unique(keys, return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weight_parts))
+        positive = scores > 0
+        cells, scores = cells[positive], scores[positive]
+        query_ids, doc_ids = np.divmod(cells, corpus_size)
+
+        order = np.lexsort((doc_ids, -scores, query_ids))
+        query_ids, doc_ids, scores = query_ids[order], doc_ids[order], scores[order]
+        bounds = np.searchsorted(query_ids, np.arange(len(queries) + 1))
+        for query_idx in range(len(queries)):
+            start = bounds[query_idx]
+            end = min(bounds[query_idx + 1], start + k)
+            results[query_idx] = [
+                (int(doc_id), float(score))
+                for doc_id, score in zip(doc_ids[start:end], scores[start:end])
+            ]
+        return results
+
+    @property
+    def vocabulary_size(self) -> int:
+        return max(len(self.indptr) - 1, max(self._delta, default=-1) + 1)
+
+    def __repr__(self) -> str:
+        return (
+            f"BM25Index(documents={self.corpus_size}, terms={self.vocabulary_size}, "
+            f"postings={len(self.tfs)}, posting_bytes={len(self.posting_bytes)})"
+        )
+
+
+class SubstringIndex:
+    """Character-trigram index over a vocabulary for loose token matching.
+
+    Expands a token to every vocabulary token that equals it, contains it or
+    is contained in it — the containment cases only for strings of at least
+    ``min_length`` characters — without comparing against the whole
+    vocabulary. Containing tokens come from intersecting the trigram posting
+    lists and a final ``in`` check; contained tokens are the substrings of
+    the query token looked up directly.
+
+    ``update`` must not run alongside changes to the vocabulary or another
+    ``update``; ``matches`` may, and sees the index either before or after
+    an update.
+    """
+
+    def __init__(self, vocabulary: Dict[str, int], min_length: int = 5):
+        self.vocabulary = vocabulary
+        self.min_length = min_length
+        # (trigram -> sorted term ids, term id -> token), replaced as a whole
+        # by ``update`` so a concurrent ``matches`` reads a consistent pair.
+        self._postings: Tuple[Dict[str, np.ndarray], Dict[int, str]] = ({}, {})
+        self._indexed_terms = 0
+        self.update()
+
+    def update(self):
+        """Index the vocabulary tokens added since the last call.
+
+        Term ids are handed out in insertion order, so new tokens are the
+        tail of the vocabulary and their ids sort after every indexed one.
+        """
+        indexed = len(self.vocabulary)
+        new_tokens = list(islice(self.vocabulary.items(), self._indexed_terms, indexed))
+        self._indexed_terms = indexed
+        added_grams: Dict[str, List[int]] = {}
+        added_tokens: Dict[int, str] = {}
+        for token, term_id in new_tokens:
+            # Only a token of at least min_length characters can contain a
+            # query token of at least min_length characters.
+            if len(token) < self.min_length:
+                continue
+            added_tokens[term_id] = token
+            for gram in {token[i:i + 3] for i in range(len(token) - 2)}:
+                added_grams.setdefault(gram, []).append(term_id)
+        if not added_tokens:
+            return
+
+        grams, id_to_token = self._postings
+        grams, id_to_token = dict(grams), {**id_to_token, **added_tokens}
+        for gram, term_ids in added_grams.items():
+            added = np.sort(np.asarray(term_ids, dtype=np.int64))
+            existing = grams.get(gram)
+            grams[gram] = added if existing is None else np.concatenate([existing, added])
+        self._postings = (grams, id_to_token)
+
+    def matches(self, token: str) -> List[str]:
+        """Vocabulary tokens that loosely match ``token``, sorted."""
+        grams, id_to_token = self._postings
+        found = set()
+        if token in self.vocabulary:
+            found.add(token)
+        if len(token) < self.min_length:
+            return sorted(found)
+
+        # Tokens containing ``token``: candidates share all of its trigrams.
+        gram_lists = sorted(
+            (grams.get(token[i:i + 3]) for i in range(len(token) - 2)),
+            key=lambda term_ids: -1 if term_ids is None else len(term_ids),
+        )
+        if gram_lists[0] is not None:
+            candidates = gram_lists[0]
+            for term_ids in gram_lists[1:]:
+                if not len(candidates):
+                    break
+                candidates = np.intersect1d(candidates, term_ids, assume_unique=True)
+            for term_id in candidates.tolist():
+                if token in id_to_token[term_id]:
+                    found.add(id_to_token[term_id])
+
+        # Tokens contained in ``token``.
+        for length in range(self.min_length, len(token)):
+            for start in range(len(token) - length + 1):
+                part = token[start:start + length]
+                if part in self.vocabulary:
+                    found.add(part)
+        return sorted(found)
+
+    def __repr__(self) -> str:
+        grams, id_to_token = self._postings
+        return f"SubstringIndex(terms={len(id_to_token)}, trigrams={len(grams)})"
@@ -0,0 +1,266 @@
+"""
+Local first pass of the post-generation citation audit.
+
+``JurisGPTRAG._verify_citations`` used to send every Anthropic / OpenAI
+answer, with every retrieved source, to a second model. Most cited
+sentences are either plainly supported by the source they cite or plainly
+pinned to the wrong one, and neither needs a model to tell. This module
+splits the answer into sentences, scores each cited sentence against every
+retrieved source by IDF-weighted term coverage (the weights come from the
+BM25 index already in memory), and
+
+- keeps a marker whose source covers the sentence (``supported``);
+- renumbers the markers when only a different source covers it (by at
+  least ``margin`` over the best cited one);
+- strips the markers when no source comes close (``unsupported``);
+- leaves everything else *ambiguous*, for the remote verifier.
+
+Only ambiguous sentences go to the remote verifier, batched in one request
+(``remote_request``); an answer with none skips the second call entirely.
+"""
+
+import json
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+# Coverage (share of a sentence's term weight found in a source) at or above
+# which a source clearly states the sentence, and below which none does.
+SUPPORTED_COVERAGE = 0.7
+UNSUPPORTED_COVERAGE = 0.3
+# How much better another source must cover a sentence to take its marker.
+REASSIGN_MARGIN = 0.25
+# Sentences with fewer content terms are too short to judge locally.
+MIN_SENTENCE_TERMS = 3
+# Characters of each source shown to the remote verifier.
+REMOTE_SOURCE_CHARS = 1200
+
+MARKER_RE = re.compile(r"\s?\[(\d+(?:\s*,\s*\d+)*)\]")
+# A sentence ends at . ! or ? (plus any markers right after it) before
+# whitespace (taking a line break with it), or at a line break.
+BOUNDARY_RE = re.compile(r"[.!?](?:\s*\[\d+(?:\s*,\s*\d+)*\])*(?=\s)\n?|\n")
+# Words whose trailing period does not end a sentence ("Sec. 7", "v. Union").
+ABBREVIATIONS = frozenset({
+    "art", "arts", "cl", "co", "cr", "dr", "e.g", "etc", "i.e", "ltd", "mr",
+    "mrs", "ms", "no", "nos", "para", "paras", "pvt", "r", "rs", "s", "sec",
+    "ss", "st", "u/s", "v", "viz", "vol", "vs",
+})
+_LAST_WORD_RE = re.compile(r"(\S+)\.$")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split ``text`` into sentences; ``"".join`` of the result is ``text``."""
+    sentences = []
+    start = 0
+    for match in BOUNDARY_RE.finditer(text):
+        if match.group() != "\n":
+            word = _LAST_WORD_RE.search(text, start, match.start() + 1)
+            if word and word.group(1).lower() in ABBREVIATIONS:
+                continue
+        sentences.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        sentences.append(text[start:])
+    return sentences
+
+
+def cited_numbers(sentence: str) -> List[int]:
+    """Citation numbers referenced by ``[i]`` / ``[i, j]`` markers, in order."""
+    numbers: List[int] = []
+    for match in MARKER_RE.finditer(sentence):
+        for number in match.group(1).split(","):
+            if int(number) not in numbers:
+                numbers.append(int(number))
+    return numbers
+
+
+def _with_markers(sentence: str, numbers: Sequence[int]) -> str:
+    """``sentence`` with its markers replaced by one marker for ``numbers``."""
+    matches = list(MARKER_RE.finditer(sentence))
+    if not matches:
+        return sentence
+    marker = f" [{', '.join(str(n) for n in numbers)}]" if numbers else ""
+    # The new marker takes the place of the first one; the rest are dropped.
+    parts = [sentence[:matches[0].start()], marker]
+    for previous, match in zip(matches, matches[1:]):
+        parts.append(sentence[previous.end():match.start()])
+    parts.append(sentence[matches[-1].end():])
+    return "".join(parts)
+
+
+@dataclass
+class LocalVerification:
+    """Result of the local pass over one answer.
+
+    ``sentences`` are the answer's sentences with the clear cases already
+    fixed; ``ambiguous`` indexes the ones left for the remote verifier and
+    ``candidates`` the (1-based) sources each of them should be checked
+    against.
+    """
+
+    sentences: List[str]
+    ambiguous: List[int] = field(default_factory=list)
+    candidates: Dict[int, List[int]] = field(default_factory=dict)
+
+    @property
+    def answer(self) -> str:
+        return "".join(self.sentences)
+
+    def apply(self, corrections: Sequence[str]) -> str:
+        """The answer with ``corrections[k]`` in place of ambiguous sentence k."""
+        sentences = list(self.sentences)
+        for index, corrected in zip(self.ambiguous, corrections):
+            original = sentences[index]
+            stripped = original.strip()
+            if not stripped:
+                continue
+            lead = original[:len(original) - len(original.lstrip())]
+            trail = original[len(original.rstrip()):]
+            corrected = corrected.strip()
+            sentences[index] = f"{lead}{corrected}{trail}" if corrected else lead + trail.lstrip(" ")
+        return "".join(sentences)
+
+
+class CitationVerifier:
+    """Deterministic citation check by weighted term coverage."""
+
+    def __init__(
+        self,
+        tokenize: Callable[[str], List[str]],
+        supported: float = SUPPORTED_COVERAGE,
+        unsupported: float = UNSUPPORTED_COVERAGE,
+        margin: float = REASSIGN_MARGIN,
+    ):
+        self.tokenize = tokenize
+        self.supported = supported
+        self.unsupported = unsupported
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._counters = {
+            "answers": 0,
+            "sentences": 0,
+            "kept": 0,
+            "reassigned": 0,
+            "stripped": 0,
+            "ambiguous": 0,
+            "remote_calls": 0,
+        }
+
+    def _coverage(self, terms: Dict[str, float], source_terms: Set[str]) -> float:
+        total = sum(terms.values())
+        if not total:
+            return 0.0
+        return sum(weight for term, weight in terms.items() if term in source_terms) / total
+
+    def check(
+        self,
+        answer: str,
+        sources: Sequence[str],
+        weight: Callable[[str], float],
+    ) -> LocalVerification:
+        """Fix the clear cases in ``answer``; ``sources[i - 1]`` is citation ``[i]``."""
+        source_terms = [set(self.tokenize(source)) for source in sources]
+        verification = LocalVerification(sentences=split_sentences(answer))
+        counts = {"sentences": 0, "kept": 0, "reassigned": 0, "stripped": 0, "ambiguous": 0}
+
+        for index, sentence in enumerate(verification.sentences):
+            numbers = cited_numbers(sentence)
+            if not numbers:
+                continue
+            counts["sentences"] += 1
+            terms = {term: weight(term) for term in self.tokenize(MARKER_RE.sub("", sentence))}
+            valid = [n for n in numbers if 1 <= n <= len(sources)]
+            coverage = {n: self._coverage(terms, source_terms[n - 1]) for n in range(1, len(sources) + 1)}
+            ranked = sorted(coverage, key=lambda n: (-coverage[n], n))
+            best_cited = max((coverage[n] for n in valid), default=0.0)
+            supported = [n for n in valid if coverage[n] >= self.supported]
+
+            if len(terms) < MIN_SENTENCE_TERMS:
+                verdict = "kept" if supported == numbers else "ambiguous"
+            elif supported:
+                verdict = "kept"
+                if supported != numbers:
+                    # Drop the cited sources that do not state it.
+                    verification.sentences[index] = _with_markers(sentence, supported)
+            elif ranked and coverage[ranked[0]] >= self.supported and coverage[ranked[0]] - best_cited >= self.margin:
+                verdict = "reassigned"
+                verification.sentences[index] = _with_markers(sentence, [ranked[0]])
+            elif not ranked or coverage[ranked[0]] < self.unsupported:
+                verdict = "stripped"
+                verification.sentences[index] = _with_markers(sentence, [])
+            else:
+                verdict = "ambiguous"
+
+            counts[verdict] += 1
+            if verdict == "ambiguous":
+                verification.ambiguous.append(index)
+                verification.candidates[index] = sorted(set(valid) | set(ranked[:2]))
+
+        with self._lock:
+            self._counters["answers"] += 1
+            for name, value in counts.items():
+                self._counters[name] += value
+        return verification
+
+    def remote_request(
+        self,
+        verification: LocalVerification,
+        sources: Sequence[str],
+        titles: Sequence[str],
+        model: str,
+    ) -> Optional[Dict[str, Any]]:
+        """``messages.create`` arguments checking only the ambiguous sentences."""
+        if not verification.ambiguous:
+            return None
+        shown = sorted({n for index in verification.ambiguous for n in verification.candidates[index]})
+        source_text = "\n\n".join(
+            f"[{n}] {titles[n - 1]}\n{sources[n - 1].strip()[:REMOTE_SOURCE_CHARS]}" for n in shown
+        )
+        sentence_text = "\n".join(
+            f"{k}. {verification.sentences[index].strip()}"
+            for k, index in enumerate(verification.ambiguous, 1)
+        )
+        prompt = f"""You are auditing sentences from a legal answer for citation accuracy. Here are the relevant sources:
+
+{source_text}
+
+Here are the sentences:
+{sentence_text}
+
+Correct each sentence applying these rules, changing as little as possible:
+1. Keep a citation [i] only if source i actually states the sentence's claim (paraphrase ok).
+2. If the claim is stated by a DIFFERENT listed source, fix the citation number.
+3. If no listed source states the claim, remove the citation marker and either return an empty string or rephrase it as "Beyond the provided sources: ...".
+4. Do not add new information. Keep formatting and tone.
+
+Return ONLY a JSON array with exactly {len(verification.ambiguous)} strings, the corrected sentences in order."""
+        with self._lock:
+            self._counters["remote_calls"] += 1
+        return {
+            "model": model,
+            "max_tokens": 2000,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+
+    @staticmethod
+    def parse_corrections(verification: LocalVerification, text: str) -> Optional[List[str]]:
+        """The remote verifier's corrected sentences, or None if malformed."""
+        start, end = text.find("["), text.rfind("]")
+        if start < 0 or end <= start:
+            return None
+        try:
+            corrections = json.loads(text[start:end + 1])
+        except ValueError:
+            return None
+        if (
+            not isinstance(corrections, list)
+            or len(corrections) != len(verification.ambiguous)
+            or not all(isinstance(item, str) for item in corrections)
+        ):
+            return None
+        return corrections
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
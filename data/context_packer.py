@@ -0,0 +1,219 @@
+"""
+Token-budgeted packing of retrieved citations into the answer prompt.
+
+Whole ``Citation.content`` strings used to go into the prompt; for long
+Supreme Court judgments most of that is boilerplate (parties, counsel,
+procedural history) and it crowds the context window, inflating latency
+and cost. ``ContextPacker`` splits each citation into passages (sentences,
+short ones merged), scores them against the query with BM25 term
+saturation and the IDF weights of the in-memory lexical index, and fills a
+token budget greedily:
+
+1. the best passage of every source that has one, so as many distinct
+   sources as possible are represented;
+2. the lead passage of sources with no matching passage;
+3. the remaining matching passages, highest score first;
+4. anything that still fits, in document order (a short source is kept
+   whole).
+
+Passages are capped at ``MAX_PASSAGE_CHARS`` (statute text often has no
+sentence break for pages), and a source none of whose passages fit after
+step 2 gets its best passage cut down to its share of what is left, so no
+source is reduced to a bare header.
+
+Selected passages are rendered in document order (gaps marked with
+``…``) under the usual ``[i] title`` headers. Every citation keeps its
+header and its number, so ``[i]`` in the answer still lines up with the
+citation list the verifier and the UI use.
+"""
+
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sentences shorter than this are merged into the next passage.
+MIN_PASSAGE_CHARS = 120
+# Longer sentences are split at whitespace into pieces of at most this.
+MAX_PASSAGE_CHARS = 1000
+# BM25 parameters for passage scoring.
+PASSAGE_K1 = 1.2
+PASSAGE_B = 0.75
+# Characters per token when no tokenizer is available.
+APPROX_CHARS_PER_TOKEN = 4
+
+SENTENCE_BREAK_RE = re.compile(r"(?<=[.!?;])\s+(?=[\"'(\[A-Z0-9])|\n\s*\n")
+GAP_MARKER = "…"
+SOURCE_SEPARATOR = "\n\n---\n\n"
+
+
+def token_counter() -> Tuple[str, Callable[[str], int]]:
+    """``(name, count)``: tiktoken's ``cl100k_base`` if installed, else an estimate."""
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return "cl100k_base", lambda text: len(encoding.encode(text, disallowed_special=()))
+    except ImportError:
+        logger.info("tiktoken not installed; estimating context tokens at %d chars/token", APPROX_CHARS_PER_TOKEN)
+        return "approx", lambda text: len(text) // APPROX_CHARS_PER_TOKEN + 1
+
+
+def _pieces(sentence: str, limit: int = MAX_PASSAGE_CHARS) -> List[str]:
+    """``sentence`` split at whitespace into pieces of at most ``limit`` chars."""
+    pieces = []
+    while len(sentence) > limit:
+        cut = sentence.rfind(" ", 0, limit + 1)
+        if cut <= 0:
+            cut = limit
+        pieces.append(sentence[:cut].rstrip())
+        sentence = sentence[cut:].lstrip()
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+
+def _truncate(text: str, tokens: int, budget: int, count_tokens: Callable[[str], int]) -> str:
+    """A word-boundary prefix of ``text`` (``tokens`` long) that fits ``budget``."""
+    while text and tokens > budget:
+        keep = max(0, int(len(text) * budget / tokens) - 1)
+        cut = text.rfind(" ", 0, keep + 1)
+        text = text[:cut if cut > 0 else keep].rstrip()
+        tokens = count_tokens(text) if text else 0
+    return text
+
+
+def split_passages(text: str) -> List[str]:
+    """Split ``text`` into sentence passages, merging short sentences forward."""
+    passages: List[str] = []
+    pending = ""
+    sentences = [piece for part in SENTENCE_BREAK_RE.split(text) for piece in _pieces(part.strip())]
+    for sentence in sentences:
+        pending = f"{pending} {sentence}" if pending else sentence
+        if len(pending) >= MIN_PASSAGE_CHARS:
+            passages.append(pending)
+            pending = ""
+    if pending:
+        if passages and len(pending) < MIN_PASSAGE_CHARS // 2:
+            passages[-1] = f"{passages[-1]} {pending}"
+        else:
+            passages.append(pending)
+    return passages
+
+
+@dataclass
+class _Passage:
+    source: int  # 0-based citation index
+    position: int  # index within the source
+    text: str
+    tokens: int
+    score: float
+    truncated: bool = False
+
+
+class ContextPacker:
+    """Greedy, source-diverse selection of passages under a token budget."""
+
+    def __init__(
+        self,
+        tokenize: Callable[[str], List[str]],
+        count_tokens: Callable[[str], int],
+        budget: int,
+    ):
+        self.tokenize = tokenize
+        self.count_tokens = count_tokens
+        self.budget = budget
+
+    @staticmethod
+    def header(number: int, citation: Any) -> str:
+        return f"[{number}] {citation.title} ({citation.doc_type}, {citation.source})\nRelevance: {citation.relevance:.0%}\n"
+
+    def _passages(
+        self, query: str, citations: Sequence[Any], weight: Callable[[str], float]
+    ) -> List[List[_Passage]]:
+        query_terms = set(self.tokenize(query))
+        per_source: List[List[Tuple[str, Counter, int]]] = []
+        total_length = count = 0
+        for citation in citations:
+            entries = []
+            for text in split_passages(citation.content):
+                terms = Counter(self.tokenize(text))
+                length = sum(terms.values())
+                entries.append((text, terms, length))
+                total_length += length
+                count += 1
+            per_source.append(entries)
+        average_length = total_length / count if count else 1.0
+
+        passages = []
+        for source, entries in enumerate(per_source):
+            scored = []
+            for position, (text, terms, length) in enumerate(entries):
+                norm = PASSAGE_K1 * (1 - PASSAGE_B + PASSAGE_B * length / (average_length or 1.0))
+                score = sum(
+                    weight(term) * terms[term] * (PASSAGE_K1 + 1) / (terms[term] + norm)
+                    for term in query_terms
+                    if terms[term]
+                )
+                scored.append(_Passage(source, position, text, self.count_tokens(text), score))
+            passages.append(scored)
+        return passages
+
+    def pack(self, query: str, citations: Sequence[Any], weight: Callable[[str], float]) -> str:
+        """The numbered context block for ``citations`` within the token budget."""
+        headers = [self.header(number, citation) for number, citation in enumerate(citations, 1)]
+        remaining = self.budget - sum(self.count_tokens(header) for header in headers)
+        remaining -= self.count_tokens(SOURCE_SEPARATOR) * max(0, len(citations) - 1)
+
+        passages = self._passages(query, citations, weight)
+        chosen: Dict[int, List[_Passage]] = {source: [] for source in range(len(citations))}
+        taken = set()
+
+        def take(passage: _Passage) -> None:
+            nonlocal remaining
+            key = (passage.source, passage.position)
+            if key not in taken and passage.tokens <= remaining:
+                taken.add(key)
+                chosen[passage.source].append(passage)
+                remaining -= passage.tokens
+
+        best = [max(source, key=lambda p: (p.score, -p.position)) for source in passages if source]
+        for passage in sorted((p for p in best if p.score > 0), key=lambda p: (-p.score, p.source)):
+            take(passage)
+        for source in passages:
+            if source and not chosen[source[0].source]:
+                take(source[0])
+        # Sources still without text: their best passage, cut to a fair share.
+        empty = [passage for passage in best if not chosen[passage.source]]
+        marker_tokens = self.count_tokens(GAP_MARKER)
+        for left, passage in enumerate(empty):
+            share = remaining // (len(empty) - left) - marker_tokens
+            text = _truncate(passage.text, passage.tokens, share, self.count_tokens)
+            if text:
+                tokens = self.count_tokens(text) + marker_tokens
+                take(replace(passage, text=text, tokens=tokens, truncated=True))
+        rest = [p for source in passages for p in source if p.score > 0]
+        for passage in sorted(rest, key=lambda p: (-p.score, p.source, p.position)):
+            take(passage)
+        for source in passages:
+            for passage in source:
+                take(passage)
+
+        blocks = []
+        for source, header in enumerate(headers):
+            parts: List[str] = []
+            expected = 0
+            gap = False
+            for passage in sorted(chosen[source], key=lambda p: p.position):
+                if gap or passage.position != expected:
+                    parts.append(GAP_MARKER)
+                parts.append(passage.text)
+                expected = passage.position + 1
+                gap = passage.truncated
+            if parts and (gap or expected < len(passages[source])):
+                parts.append(GAP_MARKER)
+            blocks.append(header + " ".join(parts))
+        return SOURCE_SEPARATOR.join(blocks)
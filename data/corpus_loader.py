@@ -0,0 +1,119 @@
+"""
+Parallel corpus loading helpers for JurisGPTRAG cold starts.
+
+Building the lexical corpus from JSON used to be strictly serial: read and
+decode ~20 sample files, the HF corpus and the Obsidian vault one after
+another, then tokenize every record on one core. This module splits that
+into
+
+- ``load_sources``: runs the per-source loaders on a thread pool (file reads,
+  ``.gz`` decompression and the Obsidian walk release the GIL) and returns
+  their results in the order given, with per-source wall times;
+- ``count_document_terms``: tokenizes ``(body, title)`` text pairs in a
+  process pool, in chunks, returning per-document ``token -> tf`` counts in
+  input order, ready for ``BM25Index``.
+
+Results are always merged in input order, so document ids (and therefore the
+index and any snapshot built from it) do not depend on scheduling.
+
+Worker processes are only used with the ``fork`` start method: the tokenizer
+is handed to them through process memory rather than pickled, because
+``rag_pipeline`` is loaded by file path and is not importable by name in a
+fresh interpreter. Forking is only safe while the process is still
+single-threaded (a child inherits every other thread's locks — torch/OpenMP
+pools, executor workers — in whatever state they were in), so the pool is
+used only from the main thread before any other thread has started: a cold
+start from the CLI or at import. A build on the corpus-reload thread or a
+server threadpool, on other platforms, for small corpora, or if the pool
+fails, tokenizes in-process.
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Set in the parent just before the pool forks; read by the workers.
+_worker_tokenize: Optional[Callable[[str], List[str]]] = None
+
+
+def load_sources(
+    loaders: Sequence[Tuple[str, Callable[[], Any]]],
+    max_workers: int,
+) -> List[Tuple[str, Any, float]]:
+    """Run ``(name, loader)`` pairs concurrently.
+
+    Returns ``(name, result, seconds)`` in the order of ``loaders``; a loader
+    that raises propagates its exception, as it would when called serially.
+    """
+
+    def _timed(loader: Callable[[], Any]) -> Tuple[Any, float]:
+        started = time.perf_counter()
+        result = loader()
+        return result, time.perf_counter() - started
+
+    if max_workers <= 1 or len(loaders) <= 1:
+        timed = [_timed(loader) for _, loader in loaders]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="corpus-load") as pool:
+            timed = list(pool.map(_timed, [loader for _, loader in loaders]))
+    return [(name, result, seconds) for (name, _), (result, seconds) in zip(loaders, timed)]
+
+
+def _can_fork() -> bool:
+    """True while forking cannot inherit another thread's held locks."""
+    return (
+        "fork" in multiprocessing.get_all_start_methods()
+        and threading.current_thread() is threading.main_thread()
+        and threading.active_count() == 1
+    )
+
+
+def _count_chunk(texts: Sequence[Tuple[str, str]]) -> List[Tuple[Counter, Counter]]:
+    tokenize = _worker_tokenize
+    return [(Counter(tokenize(body)), Counter(tokenize(title))) for body, title in texts]
+
+
+def count_document_terms(
+    texts: Sequence[Tuple[str, str]],
+    tokenize: Callable[[str], List[str]],
+    *,
+    workers: int,
+    chunk_size: int,
+) -> Iterator[Tuple[Counter, Counter]]:
+    """Yield ``(body term counts, title term counts)`` for every text pair.
+
+    Counts are computed in ``workers`` forked processes, ``chunk_size``
+    documents per task, once there are at least two chunks of work and
+    forking is safe (``_can_fork``); otherwise lazily in-process.
+    """
+    global _worker_tokenize
+
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+    counted: Optional[List[List[Tuple[Counter, Counter]]]] = None
+    if workers > 1 and len(chunks) > 1 and not _can_fork():
+        logger.info("Tokenizing in-process: other threads are running, not forking workers")
+    elif workers > 1 and len(chunks) > 1:
+        _worker_tokenize = tokenize
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(chunks)),
+                mp_context=multiprocessing.get_context("fork"),
+            ) as pool:
+                counted = list(pool.map(_count_chunk, chunks))
+        except Exception as exc:
+            logger.warning("Parallel tokenization failed, tokenizing in-process: %s", exc)
+        finally:
+            _worker_tokenize = None
+
+    if counted is not None:
+        for chunk in counted:
+            yield from chunk
+        return
+    for body, title in texts:
+        yield Counter(tokenize(body)), Counter(tokenize(title))
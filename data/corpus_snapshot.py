@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Prebuilt corpus + index snapshot for fast JurisGPTRAG startup.
+
+Every cold start used to re-parse all corpus JSON files, re-tokenize every
+record and rebuild the BM25 postings from scratch before the first chat
+request could be answered. This module writes all of that once, as a
+versioned on-disk snapshot, and memory-maps it back at startup:
+
+- ``vocabulary.txt``          interned vocabulary, one token per line (line
+                              number == term id)
+- ``bm25_*.npy``              BM25 postings (varint doc-id gaps, term
+                              frequencies and their offsets), doc-length
+                              table and IDF
+- ``title_*.npy``             title postings over the same vocabulary
+- ``documents.bin``           UTF-8 JSON records (title, content, metadata,
+  ``document_offsets.npy``    ...) concatenated, with per-document offsets
+- ``manifest.json``           format version, source fingerprint and SHA-256
+                              checksum of every file above
+
+A snapshot is only used when its format version and source fingerprint match
+the current corpus files and every checksum verifies; otherwise
+``JurisGPTRAG`` falls back to the JSON path.
+
+Usage:
+    python data/corpus_snapshot.py [--output data/processed/corpus_snapshot]
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from bm25_index import BM25Index
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+VOCABULARY_NAME = "vocabulary.txt"
+DOCUMENTS_NAME = "documents.bin"
+
+# Record fields persisted in documents.bin.
+RECORD_FIELDS = ("title", "content", "doc_type", "source", "section", "act", "url", "metadata")
+
+
+def source_fingerprint(paths: Iterable[Path], extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Cheap staleness key for the corpus inputs: ``(size, mtime_ns)`` per file.
+
+    Content hashes of the source files would mean reading the whole corpus
+    on every boot, which is exactly what the snapshot avoids.
+    """
+    files = []
+    for path in sorted({Path(p) for p in paths}):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        files.append([str(path), stat.st_size, stat.st_mtime_ns])
+    return {"files": files, **(extra or {})}
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SnapshotDocuments(Sequence[Dict[str, Any]]):
+    """Corpus records decoded on demand from the memory-mapped blob.
+
+    Records added after loading (``JurisGPTRAG.add_documents``) are kept in
+    memory after the snapshot's own and are never written back to it.
+    """
+
+    def __init__(
+        self,
+        blob: np.ndarray,
+        offsets: np.ndarray,
+        doc_type_ids: np.ndarray,
+        doc_types: List[str],
+    ):
+        self._blob = blob
+        self._offsets = offsets
+        self._doc_type_ids = doc_type_ids
+        self._doc_types = doc_types
+        self._added: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1 + len(self._added)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("snapshot document index out of range")
+        if index >= len(self._offsets) - 1:
+            return self._added[index - len(self._offsets) + 1]
+        start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+        return json.loads(self._blob[start:end].tobytes().decode("utf-8"))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def extend(self, records: Iterable[Dict[str, Any]]):
+        self._added.extend(records)
+
+    def doc_type_counts(self) -> Dict[str, int]:
+        """Per-doc-type totals without decoding any snapshot record."""
+        counts = np.bincount(self._doc_type_ids, minlength=len(self._doc_types))
+        totals = Counter({
+            doc_type: int(count)
+            for doc_type, count in zip(self._doc_types, counts)
+            if count
+        })
+        totals.update(record.get("doc_type") or "unknown" for record in self._added)
+        return dict(totals)
+
+
+@dataclass
+class CorpusSnapshot:
+    """Everything ``JurisGPTRAG`` needs to serve lexical retrieval."""
+    documents: SnapshotDocuments
+    bm25_index: BM25Index
+    title_index: BM25Index
+    manifest: Dict[str, Any]
+
+
+def write_snapshot(
+    directory: Path,
+    *,
+    documents: Sequence[Dict[str, Any]],
+    bm25_index: BM25Index,
+    title_index: BM25Index,
+    fingerprint: Dict[str, Any],
+    metadata: Optional[Dict[str, Any]] = None,
+) -> Path:
+    """Write a snapshot of ``documents`` and their indexes to ``directory``.
+
+    The snapshot is assembled in a sibling temp directory and moved into
+    place at the end, so a crash mid-write never leaves a half-written
+    snapshot where the loader would find it.
+    """
+    directory = Path(directory)
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = directory.with_name(f".{directory.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir()
+
+    try:
+        vocabulary = bm25_index.vocabulary
+        id_to_token = [""] * len(vocabulary)
+        for token, term_id in vocabulary.items():
+            id_to_token[term_id] = token
+        (tmp_dir / VOCABULARY_NAME).write_text("\n".join(id_to_token), encoding="utf-8")
+
+        doc_types: List[str] = []
+        doc_type_lookup: Dict[str, int] = {}
+        doc_type_ids = np.zeros(len(documents), dtype=np.uint16)
+        document_offsets = np.zeros(len(documents) + 1, dtype=np.int64)
+
+        with (tmp_dir / DOCUMENTS_NAME).open("wb") as blob:
+            for doc_id, document in enumerate(documents):
+                record = {field: document.get(field) for field in RECORD_FIELDS}
+                encoded = json.dumps(record, ensure_ascii=False, default=str).encode("utf-8")
+                blob.write(encoded)
+                document_offsets[doc_id + 1] = document_offsets[doc_id] + len(encoded)
+
+                doc_type = document.get("doc_type") or "unknown"
+                if doc_type not in doc_type_lookup:
+                    doc_type_lookup[doc_type] = len(doc_types)
+                    doc_types.append(doc_type)
+                doc_type_ids[doc_id] = doc_type_lookup[doc_type]
+
+        arrays: Dict[str, np.ndarray] = {
+            "document_offsets": document_offsets,
+            "doc_type_ids": doc_type_ids,
+        }
+        bm25_arrays, bm25_params = bm25_index.to_arrays()
+        title_arrays, title_params = title_index.to_arrays()
+        arrays.update({f"bm25_{name}": value for name, value in bm25_arrays.items()})
+        arrays.update({f"title_{name}": value for name, value in title_arrays.items()})
+        for name, value in arrays.items():
+            np.save(tmp_dir / f"{name}.npy", np.ascontiguousarray(value))
+
+        checksums = {
+            path.name: _sha256(path)
+            for path in sorted(tmp_dir.iterdir())
+        }
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "document_count": len(documents),
+            "doc_types": doc_types,
+            "bm25_params": bm25_params,
+            "title_params": title_params,
+            "fingerprint": fingerprint,
+            "checksums": checksums,
+            **(metadata or {}),
+        }
+        (tmp_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+        old_dir = directory.with_name(f".{directory.name}.{os.getpid()}.old")
+        if directory.exists():
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    logger.info("Corpus snapshot written to %s (%d documents)", directory, len(documents))
+    return directory
+
+
+def load_snapshot(
+    directory: Path,
+    *,
+    fingerprint: Dict[str, Any],
+    verify_checksums: bool = True,
+) -> Optional[CorpusSnapshot]:
+    """Memory-map a snapshot, or return None when it is missing or stale.
+
+    Never raises for a bad snapshot: any mismatch is logged and the caller
+    falls back to building the corpus from JSON.
+    """
+    directory = Path(directory)
+    manifest_path = directory / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            logger.info("Corpus snapshot %s has an old format version, ignoring it", directory)
+            return None
+        if manifest.get("fingerprint") != fingerprint:
+            logger.info("Corpus snapshot %s is stale (corpus files changed), ignoring it", directory)
+            return None
+        if verify_checksums:
+            for name, expected in manifest["checksums"].items():
+                if _sha256(directory / name) != expected:
+                    logger.warning("Corpus snapshot checksum mismatch for %s, ignoring snapshot", name)
+                    return None
+
+        def _array(name: str) -> np.ndarray:
+            return np.load(directory / f"{name}.npy", mmap_mode="r")
+
+        id_to_token = (directory / VOCABULARY_NAME).read_text(encoding="utf-8").split("\n")
+        vocabulary = {token: term_id for term_id, token in enumerate(id_to_token)}
+
+        def _index(prefix: str, params: Dict[str, Any]) -> BM25Index:
+            return BM25Index.from_arrays(
+                vocabulary,
+                {name: _array(f"{prefix}_{name}") for name in BM25Index.ARRAY_NAMES},
+                params,
+            )
+
+        documents = SnapshotDocuments(
+            blob=np.memmap(directory / DOCUMENTS_NAME, dtype=np.uint8, mode="r")
+            if (directory / DOCUMENTS_NAME).stat().st_size
+            else np.zeros(0, dtype=np.uint8),
+            offsets=_array("document_offsets"),
+            doc_type_ids=_array("doc_type_ids"),
+            doc_types=manifest["doc_types"],
+        )
+        if len(documents) != manifest["document_count"]:
+            logger.warning("Corpus snapshot %s is inconsistent, ignoring it", directory)
+            return None
+
+        return CorpusSnapshot(
+            documents=documents,
+            bm25_index=_index("bm25", manifest["bm25_params"]),
+            title_index=_index("title", manifest["title_params"]),
+            manifest=manifest,
+        )
+    except Exception as exc:
+        logger.warning("Could not load corpus snapshot %s: %s", directory, exc)
+        return None
+
+
+def main():
+    """Build the snapshot from the JSON corpus."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the JurisGPT corpus snapshot")
+    parser.add_argument("--output", type=Path, default=None, help="Snapshot directory")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # Force the JSON path so an existing (possibly stale) snapshot is never
+    # used as the input for a new one.
+    os.environ["RAG_CORPUS_SNAPSHOT"] = "false"
+    from rag_pipeline import JurisGPTRAG
+
+    started = time.perf_counter()
+    rag = JurisGPTRAG(vector_store_type="lexical", llm_type="none")
+    path = rag.save_corpus_snapshot(args.output)
+    stats = Counter(doc.get("doc_type", "unknown") for doc in rag.local_corpus)
+    print(f"Snapshot: {path}")
+    print(f"Documents: {len(rag.local_corpus)} {dict(sorted(stats.items()))}")
+    print(f"Built in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""
+Memory-mapped dense (embedding) index aligned to the local corpus doc ids.
+
+Chroma and LangChain's FAISS wrapper each keep a pickled / SQLite copy of
+every document next to the vectors and pull in heavy imports; at 47k x 768
+fp32 the vectors alone are ~140 MB per worker. This index stores nothing but
+vectors, row ``i`` belonging to ``local_corpus[i]``, so a search returns doc
+ids and the text is read from the shared corpus store (the in-memory corpus
+or the memory-mapped corpus snapshot). Two storage kinds:
+
+- ``float16``: the raw vectors at half precision, scored exactly by a
+  chunked matrix product (2x smaller than fp32);
+- ``pq``: product-quantized codes, one byte per ``dim / subspaces``-wide
+  subspace (96 bytes per 768d vector by default, 32x smaller), scored by
+  asymmetric distance computation: the query's inner product with every
+  subspace centroid is tabulated once and summed per document. With
+  ``refine`` (the default) the float16 vectors are stored as well and the
+  best ``top_k * refine_factor`` PQ candidates are re-scored exactly; only
+  those rows of the float16 file are ever paged in, so the resident size
+  stays that of the codes.
+
+Vectors are expected L2-normalised, so scores are cosine similarities.
+Both kinds are plain ``.npy`` files opened with ``mmap_mode="r"``: workers
+on one host share the pages and nothing is deserialized at startup.
+
+Directory layout (written atomically, like corpus_snapshot.py)::
+
+    manifest.json       format version, kind, dim, count, model, alignment
+    vectors.npy         (count, dim) float16             -- "float16", refined "pq"
+    pq_codes.npy        (count, subspaces) uint8         -- kind "pq"
+    pq_codebooks.npy    (subspaces, 256, dim/subspaces) float32
+
+Build with ``python data/eval/build_dense_indexes.py --store dense``.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Collection, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DENSE_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+KINDS = ("float16", "pq")
+PQ_CENTROIDS = 256
+# Rows scored per block, bounding the fp32 copy of a float16 block.
+SCORE_CHUNK_ROWS = 8192
+# PQ candidates re-scored exactly per requested hit.
+REFINE_FACTOR = 10
+
+
+def index_name(model_name: str) -> str:
+    """Directory name of the index for an embedding model."""
+    return model_name.replace("/", "__")
+
+
+def alignment_digest(documents: Sequence[Dict[str, Any]], samples: int = 64) -> str:
+    """Cheap check that an index's rows still line up with ``documents``.
+
+    Hashes the corpus size plus the title, source and content length of
+    ``samples`` evenly spaced records, so it needs neither the vectors nor a
+    pass over the whole (possibly memory-mapped) corpus.
+    """
+    count = len(documents)
+    digest = hashlib.sha256(str(count).encode("utf-8"))
+    if count:
+        for doc_id in sorted({round(i * (count - 1) / max(samples - 1, 1)) for i in range(samples)}):
+            document = documents[doc_id]
+            digest.update(json.dumps(
+                [doc_id, document.get("title"), document.get("source"), len(document.get("content") or "")],
+                ensure_ascii=False,
+            ).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def train_product_quantizer(
+    vectors: np.ndarray,
+    subspaces: int,
+    iterations: int = 20,
+    sample_size: int = 20000,
+    seed: int = 0,
+) -> np.ndarray:
+    """k-means codebooks, ``(subspaces, 256, dim / subspaces)`` float32."""
+    count, dim = vectors.shape
+    if dim % subspaces:
+        raise ValueError(f"dim {dim} is not divisible into {subspaces} subspaces")
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(count, size=min(count, sample_size), replace=False)]
+    sample = np.asarray(sample, dtype=np.float32).reshape(len(sample), subspaces, dim // subspaces)
+    centroids = min(PQ_CENTROIDS, len(sample))
+
+    codebooks = np.zeros((subspaces, PQ_CENTROIDS, dim // subspaces), dtype=np.float32)
+    for sub in range(subspaces):
+        points = sample[:, sub, :]
+        centers = points[rng.choice(len(points), size=centroids, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = _nearest(points, centers)
+            sums = np.stack([
+                np.bincount(assignment, weights=points[:, d], minlength=centroids)
+                for d in range(points.shape[1])
+            ], axis=1)
+            sizes = np.bincount(assignment, minlength=centroids)
+            empty = sizes == 0
+            centers = np.where(empty[:, None], centers, sums / np.maximum(sizes, 1)[:, None])
+            if empty.any():
+                centers[empty] = points[rng.choice(len(points), size=int(empty.sum()))]
+        codebooks[sub, :centroids] = centers
+        codebooks[sub, centroids:] = centers[0]
+    return codebooks
+
+
+def _nearest(points: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    distances = (centers * centers).sum(axis=1)[None, :] - 2.0 * points @ centers.T
+    return distances.argmin(axis=1)
+
+
+def encode_product_quantizer(vectors: np.ndarray, codebooks: np.ndarray) -> np.ndarray:
+    """PQ codes of ``vectors``: ``(count, subspaces)`` uint8."""
+    subspaces, _, width = codebooks.shape
+    codes = np.empty((len(vectors), subspaces), dtype=np.uint8)
+    for start in range(0, len(vectors), SCORE_CHUNK_ROWS):
+        block = np.asarray(vectors[start:start + SCORE_CHUNK_ROWS], dtype=np.float32)
+        block = block.reshape(len(block), subspaces, width)
+        for sub in range(subspaces):
+            codes[start:start + len(block), sub] = _nearest(block[:, sub, :], codebooks[sub])
+    return codes
+
+
+class DenseIndex:
+    """Inner-product search over doc-id-aligned vectors (float16 or PQ)."""
+
+    def __init__(
+        self,
+        manifest: Dict[str, Any],
+        vectors: Optional[np.ndarray] = None,
+        codes: Optional[np.ndarray] = None,
+        codebooks: Optional[np.ndarray] = None,
+        refine_factor: int = REFINE_FACTOR,
+    ):
+        self.manifest = manifest
+        self.refine_factor = refine_factor
+        self.kind = manifest["kind"]
+        self.dim = int(manifest["dim"])
+        self.count = int(manifest["count"])
+        self._vectors = vectors
+        self._codes = codes
+        self._codebooks = codebooks
+
+    def search(
+        self,
+        query: Sequence[float],
+        top_k: int,
+        exclude: Collection[int] = (),
+    ) -> List[Tuple[int, float]]:
+        """``(doc_id, score)`` of the ``top_k`` best rows, best first."""
+        return self.search_many(np.asarray(query, dtype=np.float32)[None, :], top_k, exclude)[0]
+
+    def search_many(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        exclude: Collection[int] = (),
+    ) -> List[List[Tuple[int, float]]]:
+        """``search`` for each row of ``queries`` in one pass over the index."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if queries.shape[1] != self.dim:
+            raise ValueError(f"query dim {queries.shape[1]} does not match index dim {self.dim}")
+        if not self.count or top_k <= 0:
+            return [[] for _ in queries]
+
+        scores = self._scores(queries)
+        excluded = [doc_id for doc_id in exclude if doc_id < self.count]
+        if excluded:
+            scores[:, excluded] = -np.inf
+        k = min(top_k, self.count - len(excluded))
+        if k <= 0:
+            return [[] for _ in queries]
+
+        results = []
+        for query, row in zip(queries, scores):
+            if self.kind == "pq" and self._vectors is not None:
+                # Exact re-scoring of the PQ shortlist, read in row order.
+                candidates = np.sort(self._top(row, min(k * self.refine_factor, self.count - len(excluded))))
+                exact = np.asarray(self._vectors[candidates], dtype=np.float32) @ query
+                order = self._top(exact, k)
+                results.append([(int(candidates[i]), float(exact[i])) for i in order])
+            else:
+                results.append([(int(doc_id), float(row[doc_id])) for doc_id in self._top(row, k)])
+        return results
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        """Positions of the ``k`` highest scores, best first (ties by position)."""
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.lexsort((top, -scores[top]))]
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        scores = np.empty((len(queries), self.count), dtype=np.float32)
+        if self.kind == "float16":
+            for start in range(0, self.count, SCORE_CHUNK_ROWS):
+                block = np.asarray(self._vectors[start:start + SCORE_CHUNK_ROWS], dtype=np.float32)
+                scores[:, start:start + len(block)] = queries @ block.T
+            return scores
+
+        subspaces, _, width = self._codebooks.shape
+        # (queries, subspaces, 256): query . centroid for every subspace
+        tables = np.einsum(
+            "qmd,mkd->qmk", queries.reshape(len(queries), subspaces, width), self._codebooks
+        )
+        for start in range(0, self.count, SCORE_CHUNK_ROWS):
+            codes = np.asarray(self._codes[start:start + SCORE_CHUNK_ROWS])
+            block = np.zeros((len(queries), len(codes)), dtype=np.float32)
+            for sub in range(subspaces):
+                block += tables[:, sub, codes[:, sub]]
+            scores[:, start:start + len(codes)] = block
+        return scores
+
+    @property
+    def scan_nbytes(self) -> int:
+        """Bytes read by every query: the vectors, or the PQ codes and codebooks."""
+        if self.kind == "float16":
+            return self._vectors.nbytes
+        return self._codes.nbytes + self._codebooks.nbytes
+
+
+def write_dense_index(
+    directory: Path,
+    vectors: np.ndarray,
+    *,
+    alignment: str,
+    kind: str = "pq",
+    subspaces: Optional[int] = None,
+    refine: bool = True,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> Path:
+    """Write ``vectors`` (row i = doc id i) as a dense index in ``directory``."""
+    if kind not in KINDS:
+        raise ValueError(f"unknown dense index kind {kind!r}, expected one of {KINDS}")
+    vectors = np.asarray(vectors, dtype=np.float32)
+    count, dim = vectors.shape
+    directory = Path(directory)
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = directory.with_name(f".{directory.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir()
+
+    try:
+        manifest: Dict[str, Any] = {
+            "format_version": DENSE_FORMAT_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "kind": kind,
+            "dim": dim,
+            "count": count,
+            "alignment": alignment,
+            **(metadata or {}),
+        }
+        if kind == "float16":
+            np.save(tmp_dir / "vectors.npy", vectors.astype(np.float16))
+        else:
+            subspaces = subspaces or max(1, dim // 8)
+            codebooks = train_product_quantizer(vectors, subspaces)
+            np.save(tmp_dir / "pq_codebooks.npy", codebooks)
+            np.save(tmp_dir / "pq_codes.npy", encode_product_quantizer(vectors, codebooks))
+            if refine:
+                np.save(tmp_dir / "vectors.npy", vectors.astype(np.float16))
+            manifest["subspaces"] = subspaces
+            manifest["refine"] = refine
+        (tmp_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+        old_dir = directory.with_name(f".{directory.name}.{os.getpid()}.old")
+        if directory.exists():
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    logger.info("Dense index written to %s (%s, %d x %d)", directory, kind, count, dim)
+    return directory
+
+
+def load_dense_index(directory: Path, *, alignment: str) -> Optional[DenseIndex]:
+    """Memory-map a dense index, or return None when missing or misaligned.
+
+    Never raises for a bad index; the caller falls back to lexical retrieval.
+    """
+    directory = Path(directory)
+    manifest_path = directory / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("format_version") != DENSE_FORMAT_VERSION:
+            logger.info("Dense index %s has an old format version, ignoring it", directory)
+            return None
+        if manifest.get("alignment") != alignment:
+            logger.info("Dense index %s does not match the loaded corpus, ignoring it", directory)
+            return None
+
+        def _array(name: str) -> np.ndarray:
+            return np.load(directory / f"{name}.npy", mmap_mode="r")
+
+        if manifest["kind"] == "float16":
+            index = DenseIndex(manifest, vectors=_array("vectors"))
+            rows = index._vectors.shape[0]
+        else:
+            index = DenseIndex(
+                manifest,
+                vectors=_array("vectors") if manifest.get("refine") else None,
+                codes=_array("pq_codes"),
+                codebooks=np.load(directory / "pq_codebooks.npy"),
+            )
+            rows = index._codes.shape[0]
+        if rows != index.count:
+            logger.warning("Dense index %s is inconsistent, ignoring it", directory)
+            return None
+        return index
+    except Exception as exc:
+        logger.warning("Could not load dense index %s: %s", directory, exc)
+        return None
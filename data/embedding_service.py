@@ -0,0 +1,238 @@
+"""
+Query / document embedding service for JurisGPTRAG dense retrieval.
+
+Replaces the ad-hoc wrappers that used to live in
+``JurisGPTRAG._init_embeddings``. Those returned Python lists (a
+``.numpy().tolist()`` round trip per call), ran under ``torch.no_grad`` and
+re-encoded every repeated query. Here
+
+- outputs are NumPy ``float32`` arrays end to end: ``embed_query`` returns a
+  ``(dim,)`` vector, ``embed_documents`` a ``(n, dim)`` matrix;
+- query embeddings are kept in an LRU (``cache_size`` entries; cached
+  vectors are read-only because they are shared);
+- batches are padded to their own longest input, and ``embed_documents``
+  groups texts of similar length so short texts are not padded to 512;
+- inference runs under ``torch.inference_mode``, with the intra-op thread
+  count set explicitly (``num_threads``; 0 leaves torch's default);
+- ``runtime`` selects plain torch, torch dynamic int8 quantization
+  (``torch-int8``) or an ONNX Runtime export (``onnx`` / ``onnx-int8``, via
+  optimum for InLegalBERT and the sentence-transformers ONNX backend for
+  MiniLM).
+"""
+
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RUNTIMES = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+
+def configure_torch_threads(num_threads: int):
+    """Pin torch's intra-op thread pool (no-op for 0 or without torch)."""
+    if num_threads <= 0:
+        return
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(num_threads)
+
+
+class EmbeddingService(ABC):
+    """LRU-cached, float32 embeddings on top of a batch ``_encode``."""
+
+    def __init__(self, cache_size: int = 2048, batch_size: int = 32):
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0}
+
+    @abstractmethod
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """``(len(texts), dim)`` float32 embeddings of one batch."""
+
+    def embed_query(self, text: str) -> np.ndarray:
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                self._counters["hits"] += 1
+                return cached
+            self._counters["misses"] += 1
+
+        vector = np.ascontiguousarray(self._encode([text])[0], dtype=np.float32)
+        vector.setflags(write=False)
+        if self.cache_size:
+            with self._lock:
+                self._cache[text] = vector
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return vector
+
+    def embed_documents(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed ``texts`` in length-sorted batches; rows keep input order."""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda idx: len(texts[idx]))
+        output: Optional[np.ndarray] = None
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            encoded = np.asarray(self._encode([texts[idx] for idx in batch]), dtype=np.float32)
+            if output is None:
+                output = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+            output[batch] = encoded
+        return output
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, "entries": len(self._cache)}
+
+
+class InLegalBERTEmbeddings(EmbeddingService):
+    """CLS-pooled, L2-normalised law-ai/InLegalBERT embeddings (768d).
+
+    Must stay in step with the document encoding in
+    ``eval/build_dense_indexes.py``.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "law-ai/InLegalBERT",
+        runtime: str = "torch",
+        max_length: int = 512,
+        onnx_dir: Optional[Path] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        import torch
+        from transformers import AutoTokenizer
+
+        if runtime not in RUNTIMES:
+            raise ValueError(f"unknown embedding runtime {runtime!r}, expected one of {RUNTIMES}")
+        self._torch = torch
+        self.model_name = model_name
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = None
+        if runtime.startswith("onnx"):
+            try:
+                self.model = self._load_onnx(model_name, runtime == "onnx-int8", onnx_dir)
+            except ImportError as e:
+                logger.warning("ONNX Runtime unavailable for %s, using torch: %s", model_name, e)
+                runtime = "torch"
+        if self.model is None:
+            from transformers import AutoModel
+
+            self.model = AutoModel.from_pretrained(model_name)
+            self.model.eval()
+            if runtime == "torch-int8":
+                self.model = torch.quantization.quantize_dynamic(
+                    self.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+        self.runtime = runtime
+
+    @staticmethod
+    def _load_onnx(model_name: str, quantize: bool, onnx_dir: Optional[Path]):
+        """Export (once, into ``onnx_dir``) and load the model on ONNX Runtime."""
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+
+        if onnx_dir is None:
+            return ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+        onnx_dir = Path(onnx_dir)
+        if not (onnx_dir / "model.onnx").exists():
+            ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(onnx_dir)
+        if not quantize:
+            return ORTModelForFeatureExtraction.from_pretrained(onnx_dir)
+
+        if not (onnx_dir / "model_quantized.onnx").exists():
+            from optimum.onnxruntime import ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+            quantizer = ORTQuantizer.from_pretrained(onnx_dir, file_name="model.onnx")
+            quantizer.quantize(
+                save_dir=onnx_dir,
+                quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False),
+            )
+        return ORTModelForFeatureExtraction.from_pretrained(onnx_dir, file_name="model_quantized.onnx")
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        torch = self._torch
+        encoded = self.tokenizer(
+            texts,
+            padding="longest",
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="pt",
+        )
+        with torch.inference_mode():
+            outputs = self.model(**encoded)
+            # CLS token, L2-normalised
+            embeddings = torch.nn.functional.normalize(outputs.last_hidden_state[:, 0, :], p=2, dim=1)
+            return embeddings.to(torch.float32).cpu().numpy()
+
+
+class SentenceTransformerEmbeddings(EmbeddingService):
+    """sentence-transformers model (all-MiniLM-L6-v2 by default)."""
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        runtime: str = "torch",
+        onnx_file: Optional[str] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        from sentence_transformers import SentenceTransformer
+
+        if runtime not in RUNTIMES:
+            raise ValueError(f"unknown embedding runtime {runtime!r}, expected one of {RUNTIMES}")
+        self.model_name = model_name
+        model_kwargs: Dict[str, Any] = {}
+        if runtime.startswith("onnx"):
+            model_kwargs["backend"] = "onnx"
+            if runtime == "onnx-int8" and onnx_file:
+                model_kwargs["model_kwargs"] = {"file_name": onnx_file}
+        try:
+            self.model = self._load(SentenceTransformer, model_name, model_kwargs)
+        except (TypeError, ImportError, ValueError) as e:
+            if not model_kwargs:
+                raise
+            logger.warning("ONNX backend unavailable for %s, using torch: %s", model_name, e)
+            runtime = "torch"
+            self.model = self._load(SentenceTransformer, model_name, {})
+        if runtime == "torch-int8":
+            import torch
+
+            transformer = self.model[0].auto_model
+            self.model[0].auto_model = torch.quantization.quantize_dynamic(
+                transformer, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        self.runtime = runtime
+
+    @staticmethod
+    def _load(factory, model_name: str, kwargs: Dict[str, Any]):
+        try:
+            return factory(model_name, local_files_only=True, **kwargs)
+        except Exception:
+            return factory(model_name, **kwargs)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        ).astype(np.float32, copy=False)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Benchmark answer-prompt assembly: fixed (cacheable) prefix vs per-request suffix.
+
+For every benchmark query the prompts are assembled from the citations the
+lexical pipeline retrieves, and the script reports
+
+- assembly time of the local prompt and of the chat prompt blocks;
+- prefix / suffix token counts and the share of each prompt that is the
+  fixed, cacheable prefix;
+- tokenization time of the full local prompt vs. the suffix alone (what
+  ``LocalLegalLLM`` tokenizes once the prefix tokens are precomputed).
+
+Tokens are counted with the local GGUF model's tokenizer when ``--gguf`` is
+given (llama-cpp-python, vocabulary only), else with tiktoken's
+``cl100k_base`` if installed, else approximated as 4 characters per token.
+
+Run:
+    python data/eval/bench_prompt_assembly.py
+    python data/eval/bench_prompt_assembly.py --gguf models/legal-llama.gguf --quick
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+EVAL_DIR = Path(__file__).resolve().parent
+DATA_DIR = EVAL_DIR.parent
+
+# Minimum cacheable prompt length (tokens) on Anthropic's Sonnet / Opus models.
+ANTHROPIC_MIN_CACHEABLE_TOKENS = 1024
+
+
+def _load_module(name: str, path: Path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load {name} from {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _tokenizer(gguf: str | None) -> Tuple[str, Callable[[str], List[int]]]:
+    if gguf:
+        from llama_cpp import Llama
+
+        model = Llama(model_path=gguf, vocab_only=True, verbose=False)
+        return "gguf", lambda text: model.tokenize(text.encode("utf-8"), add_bos=False)
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return "cl100k_base", encoding.encode
+    except ImportError:
+        return "approx (4 chars/token)", lambda text: [0] * (len(text) // 4 + 1)
+
+
+def _median_us(fn: Callable[[], object], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return 1e6 * statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gguf", default=None, help="GGUF model whose tokenizer counts tokens")
+    parser.add_argument("--quick", action="store_true", help="first 12 queries only")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rag_module = _load_module("rag_pipeline", DATA_DIR / "rag_pipeline.py")
+    rag = rag_module.JurisGPTRAG(vector_store_type="lexical", llm_type="none")
+    queries = [q["query"] for q in json.loads((EVAL_DIR / "benchmark_queries.json").read_text())["queries"]]
+    if args.quick:
+        queries = queries[:12]
+    tokenizer_name, tokenize = _tokenizer(args.gguf)
+
+    local_prefix_tokens = len(tokenize(rag_module.LOCAL_PROMPT_PREFIX))
+    chat_prefix_tokens = len(tokenize(rag_module.CHAT_SYSTEM_PROMPT))
+    rows = []
+    for query in queries:
+        citations = rag.retrieve(query)
+        context = rag._citation_context(citations)
+        prompt = rag._build_legal_prompt(query, context)
+        suffix = rag._local_prompt_suffix(query, context)
+        suffix_tokens = len(tokenize(suffix))
+        rows.append({
+            "assemble_local_us": _median_us(lambda: rag._build_legal_prompt(query, rag._citation_context(citations)), args.repeat),
+            "tokenize_full_us": _median_us(lambda: tokenize(prompt), args.repeat),
+            "tokenize_suffix_us": _median_us(lambda: tokenize(suffix), args.repeat),
+            "suffix_tokens": suffix_tokens,
+            "local_cacheable": local_prefix_tokens / (local_prefix_tokens + suffix_tokens),
+            "chat_cacheable": chat_prefix_tokens / (chat_prefix_tokens + len(tokenize(context)) + len(tokenize(query))),
+        })
+
+    def median(key: str) -> float:
+        return statistics.median(row[key] for row in rows)
+
+    print(f"Queries: {len(rows)}   tokenizer: {tokenizer_name}")
+    print(f"Local prompt prefix:  {local_prefix_tokens} tokens")
+    print(
+        f"Chat system prefix:   {chat_prefix_tokens} tokens "
+        f"({'cacheable' if chat_prefix_tokens >= ANTHROPIC_MIN_CACHEABLE_TOKENS else 'below'} "
+        f"Anthropic's {ANTHROPIC_MIN_CACHEABLE_TOKENS}-token minimum on its own)"
+    )
+    print(f"Per-request suffix:   {median('suffix_tokens'):.0f} tokens (median)")
+    print(f"Cacheable share:      local {median('local_cacheable'):.0%}, chat {median('chat_cacheable'):.0%} (median)")
+    print(f"Assemble local prompt: {median('assemble_local_us'):.1f} us (median)")
+    print(
+        f"Tokenize full prompt:  {median('tokenize_full_us'):.1f} us; "
+        f"suffix only: {median('tokenize_suffix_us'):.1f} us (median)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,26 @@
 #!/usr/bin/env python3
 """
-Build full-corpus dense Chroma indexes for the benchmark.
+Build full-corpus dense indexes for the benchmark and for serving.
 
-Creates two collections in data/vectors/chroma_db, both over the complete
-local corpus (the same documents the lexical configurations retrieve from):
+By default creates two Chroma collections in data/vectors/chroma_db, both
+over the complete local corpus (the same documents the lexical
+configurations retrieve from):
 
 - ``jurisgpt_minilm_full``      all-MiniLM-L6-v2, 384d, cosine
 - ``jurisgpt_inlegalbert_full`` law-ai/InLegalBERT, 768d CLS-pooled, cosine
 
+With ``--store dense`` the same vectors are written instead as native
+memory-mapped indexes (dense_index.py) under data/vectors/dense/<model>,
+row i = local corpus doc id i, for ``JURISGPT_VECTOR_STORE=dense``.
+``--dense-kind`` picks product-quantized codes with an exact float16
+refine stage (``pq``, default) or plain float16 vectors.
+
 The InLegalBERT document encoding mirrors the query-time encoding in
-rag_pipeline.py exactly (CLS token, L2-normalised), so the benchmark's
+embedding_service.py exactly (CLS token, L2-normalised), so the benchmark's
 ``dense_inlegalbert`` configuration compares retrievers, not encodings.
 
 Usage: python data/eval/build_dense_indexes.py [--only minilm|inlegalbert]
+           [--store chroma|dense] [--dense-kind pq|float16]
 """
 
 from __future__ import annotations
@@ -22,7 +30,9 @@ import importlib.util
 import os
 import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List
+
+import numpy as np
 
 EVAL_DIR = Path(__file__).resolve().parent
 DATA_DIR = EVAL_DIR.parent
@@ -96,7 +106,7 @@ def _build(collection, corpus, embed_fn, label: str) -> None:
         texts = [_doc_text(d) for d in batch]
         collection.add(
             ids=[f"doc-{offset + i:06d}" for i in range(len(batch))],
-            embeddings=embed_fn(texts),
+            embeddings=embed_fn(texts).tolist(),
             documents=texts,
             metadatas=[_doc_metadata(d) for d in batch],
         )
@@ -107,20 +117,44 @@ def _build(collection, corpus, embed_fn, label: str) -> None:
           f"({collection.count()} vectors)")
 
 
-def _minilm_embed_fn(device: str):
+def _build_dense(corpus, embed_fn, label: str, model_name: str, kind: str) -> None:
+    dense_index = _load_module("dense_index", DATA_DIR / "dense_index.py")
+    start = time.time()
+    total = len(corpus)
+    vectors = None
+    for offset in range(0, total, INSERT_BATCH):
+        batch = corpus[offset:offset + INSERT_BATCH]
+        embedded = embed_fn([_doc_text(d) for d in batch])
+        if vectors is None:
+            vectors = np.empty((total, embedded.shape[1]), dtype=np.float32)
+        vectors[offset:offset + len(batch)] = embedded
+        done = offset + len(batch)
+        rate = done / max(time.time() - start, 1e-6)
+        print(f"  [{label}] {done}/{total} ({rate:.0f} docs/s)", flush=True)
+    path = dense_index.write_dense_index(
+        DATA_DIR / "vectors" / "dense" / dense_index.index_name(model_name),
+        vectors,
+        alignment=dense_index.alignment_digest(corpus),
+        kind=kind,
+        metadata={"model": model_name},
+    )
+    print(f"  [{label}] finished in {time.time() - start:.0f}s ({kind} index at {path})")
+
+
+def _minilm_embed_fn(device: str) -> Callable[[List[str]], np.ndarray]:
     from sentence_transformers import SentenceTransformer
     model = SentenceTransformer(MINILM_MODEL, device=device)
 
-    def embed(texts: List[str]) -> List[List[float]]:
+    def embed(texts: List[str]) -> np.ndarray:
         return model.encode(
             texts, batch_size=256, normalize_embeddings=True,
-            show_progress_bar=False,
-        ).tolist()
+            show_progress_bar=False, convert_to_numpy=True,
+        ).astype(np.float32, copy=False)
 
     return embed
 
 
-def _inlegalbert_embed_fn(device: str):
+def _inlegalbert_embed_fn(device: str) -> Callable[[List[str]], np.ndarray]:
     import torch
     from transformers import AutoModel, AutoTokenizer
 
@@ -128,8 +162,8 @@ def _inlegalbert_embed_fn(device: str):
     model = AutoModel.from_pretrained(INLEGALBERT_MODEL).to(device)
     model.eval()
 
-    def embed(texts: List[str]) -> List[List[float]]:
-        out: List[List[float]] = []
+    def embed(texts: List[str]) -> np.ndarray:
+        out: List[np.ndarray] = []
         for i in range(0, len(texts), 24):
             encoded = tokenizer(
                 texts[i:i + 24], padding=True, truncation=True,
@@ -138,14 +172,14 @@ def _inlegalbert_embed_fn(device: str):
             with torch.no_grad():
                 hidden = model(**encoded).last_hidden_state
             # CLS token + L2 normalise — must match InLegalBERTEmbeddings
-            # in rag_pipeline.py, which encodes the queries at benchmark time.
+            # in embedding_service.py, which encodes the queries at benchmark time.
             cls = torch.nn.functional.normalize(hidden[:, 0, :], p=2, dim=1)
-            out.extend(cls.cpu().numpy().tolist())
+            out.append(cls.cpu().numpy().astype(np.float32, copy=False))
         # The MPS caching allocator grows unbounded across batches (OOM'd a
         # full run on 16GB); flush it once per INSERT_BATCH of documents.
         if device == "mps":
             torch.mps.empty_cache()
-        return out
+        return np.concatenate(out)
 
     return embed
 
@@ -153,15 +187,27 @@ def _inlegalbert_embed_fn(device: str):
 def main() -> None:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("--only", choices=["minilm", "inlegalbert"], default=None)
+    parser.add_argument("--store", choices=["chroma", "dense"], default="chroma")
+    parser.add_argument("--dense-kind", choices=["pq", "float16"], default="pq")
     args = parser.parse_args()
 
-    import chromadb
-    from chromadb.config import Settings
-
     device = _pick_device()
     print(f"Embedding device: {device}")
 
     corpus = _load_corpus()
+    if args.store == "dense":
+        if args.only in (None, "minilm"):
+            _build_dense(corpus, _minilm_embed_fn(device), "minilm", MINILM_MODEL, args.dense_kind)
+        if args.only in (None, "inlegalbert"):
+            _build_dense(
+                corpus, _inlegalbert_embed_fn(device), "inlegalbert", INLEGALBERT_MODEL, args.dense_kind
+            )
+        print("Done.")
+        return
+
+    import chromadb
+    from chromadb.config import Settings
+
     client = chromadb.PersistentClient(
         path=str(DATA_DIR / "vectors" / "chroma_db"),
         settings=Settings(anonymized_telemetry=False),
@@ -228,17 +228,24 @@ def evaluate_config(
     categories: List[str],
     *,
     force_lexical: bool = True,
+    batch: bool = False,
 ) -> Dict[str, Any]:
-    """Evaluate a single configuration over the supplied query list."""
+    """Evaluate a single configuration over the supplied query list.
+
+    ``batch`` retrieves every query in one ``retrieve_many`` call.
+    """
     print(f"\n{'=' * 64}\nConfig: {config.name}\n  {config.description}\n{'=' * 64}")
     rag = _build_rag_for_config(config, force_lexical=force_lexical)
 
     per_query: List[Dict[str, Any]] = []
     config_start = time.perf_counter()
-    for idx, query_item in enumerate(queries, 1):
-        print(f"  [{idx:3d}/{len(queries)}] {query_item['id']}: "
-              f"{query_item['query'][:60]}", flush=True)
-        per_query.append(EVAL_MOD.evaluate_single_query(rag, query_item))
+    if batch:
+        per_query = EVAL_MOD.evaluate_queries_batched(rag, queries)
+    else:
+        for idx, query_item in enumerate(queries, 1):
+            print(f"  [{idx:3d}/{len(queries)}] {query_item['id']}: "
+                  f"{query_item['query'][:60]}", flush=True)
+            per_query.append(EVAL_MOD.evaluate_single_query(rag, query_item))
     total_elapsed = time.perf_counter() - config_start
 
     aggregate = _aggregate(per_query)
@@ -362,6 +369,11 @@ def main() -> None:
         action="store_true",
         help="Allow the configuration to attach to a Chroma/FAISS vector store",
     )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Batch retrieval via JurisGPTRAG.retrieve_many (one pass per config)",
+    )
     parser.add_argument(
         "--benchmark-file",
         type=Path,
@@ -397,6 +409,7 @@ def main() -> None:
             queries,
             benchmark["categories"],
             force_lexical=not args.use_vector,
+            batch=args.batch,
         )
         result_path = RESULTS_DIR / f"eval_{config_name}_{timestamp}.json"
         result_path.write_text(json.dumps(payload, indent=2, ensure_ascii=False))
@@ -0,0 +1,95 @@
+"""Unit tests for the local citation verifier (citation_verifier.py)."""
+from __future__ import annotations
+
+import importlib.util
+import re
+from pathlib import Path
+
+import pytest
+
+DATA_DIR = Path(__file__).resolve().parent.parent
+VERIFIER_PATH = DATA_DIR / "citation_verifier.py"
+
+SOURCES = [
+    "Companies Act, 2013 - Section 7\nThe memorandum and articles of the company "
+    "shall be filed with the Registrar for registration.",
+    "Founder Agreement - Vesting Schedule\nThe founders' equity shall vest over "
+    "four years with a one-year cliff.",
+]
+
+
+@pytest.fixture(scope="module")
+def verifier_module():
+    spec = importlib.util.spec_from_file_location("citation_verifier_under_test", VERIFIER_PATH)
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def verifier(verifier_module):
+    def tokenize(text):
+        return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if len(token) > 2 or token.isdigit()]
+
+    return verifier_module.CitationVerifier(tokenize)
+
+
+def _uniform(token):
+    return 1.0
+
+
+@pytest.mark.unit
+def test_split_sentences_round_trips_and_keeps_markers(verifier_module):
+    text = "File the memorandum under Sec. 7 [1]. Equity vests over four years. [2]\n- A cliff applies [2]."
+    sentences = verifier_module.split_sentences(text)
+
+    assert "".join(sentences) == text
+    assert sentences[0] == "File the memorandum under Sec. 7 [1]."
+    assert sentences[1] == " Equity vests over four years. [2]\n"
+    assert verifier_module.cited_numbers("Both apply [1, 2] and [2].") == [1, 2]
+
+
+@pytest.mark.unit
+def test_clear_cases_are_fixed_without_the_remote_verifier(verifier):
+    answer = (
+        "The memorandum and articles are filed with the Registrar [1]. "
+        "Founders' equity vests over four years with a one-year cliff [1]. "
+        "Stamp duty is payable electronically through state treasury portals [2]."
+    )
+    verification = verifier.check(answer, SOURCES, _uniform)
+
+    assert verification.answer == (
+        "The memorandum and articles are filed with the Registrar [1]. "
+        "Founders' equity vests over four years with a one-year cliff [2]. "
+        "Stamp duty is payable electronically through state treasury portals."
+    )
+    assert verification.ambiguous == []
+    assert verifier.remote_request(verification, SOURCES, ["a", "b"], model="m") is None
+    stats = verifier.stats()
+    assert (stats["kept"], stats["reassigned"], stats["stripped"], stats["remote_calls"]) == (1, 1, 1, 0)
+
+
+@pytest.mark.unit
+def test_only_ambiguous_sentences_are_sent_in_one_request(verifier):
+    answer = (
+        "The memorandum is filed with the Registrar [1]. "
+        "The Registrar may refuse registration of the articles for stamp defects [1]."
+    )
+    verification = verifier.check(answer, SOURCES, _uniform)
+    assert verification.ambiguous == [1]
+
+    request = verifier.remote_request(verification, SOURCES, ["Section 7", "Vesting"], model="m")
+    prompt = request["messages"][0]["content"]
+    assert "may refuse registration" in prompt
+    assert "filed with the Registrar [1]." not in prompt
+    assert "exactly 1 strings" in prompt
+
+    reply = 'Here you go: ["The Registrar may refuse registration of the articles."]'
+    corrections = verifier.parse_corrections(verification, reply)
+    assert verification.apply(corrections) == (
+        "The memorandum is filed with the Registrar [1]. "
+        "The Registrar may refuse registration of the articles."
+    )
+    assert verifier.parse_corrections(verification, '["one", "two"]') is None
+    assert verifier.parse_corrections(verification, "no json") is None
@@ -0,0 +1,96 @@
+"""Unit tests for token-budgeted context packing (context_packer.py)."""
+from __future__ import annotations
+
+import importlib.util
+import re
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+DATA_DIR = Path(__file__).resolve().parent.parent
+PACKER_PATH = DATA_DIR / "context_packer.py"
+
+BOILERPLATE = "The appellant was represented by learned counsel who made detailed submissions before this Court. "
+JUDGMENT = (
+    BOILERPLATE * 3
+    + "A non-compete covenant operating after the termination of employment is void under Section 27 "
+    "of the Indian Contract Act as a restraint of trade. "
+    + BOILERPLATE * 3
+)
+STATUTE = (
+    "Every agreement by which any one is restrained from exercising a lawful profession, trade or "
+    "business of any kind, is to that extent void."
+)
+
+
+def _citation(title, content):
+    return SimpleNamespace(title=title, content=content, doc_type="case", source="SC", relevance=0.9)
+
+
+@pytest.fixture(scope="module")
+def packer_module():
+    spec = importlib.util.spec_from_file_location("context_packer_under_test", PACKER_PATH)
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _packer(packer_module, budget):
+    def tokenize(text):
+        return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if len(token) > 2 or token.isdigit()]
+
+    return packer_module.ContextPacker(tokenize, lambda text: len(text.split()), budget)
+
+
+@pytest.mark.unit
+def test_split_passages_merges_short_sentences(packer_module):
+    passages = packer_module.split_passages("Short one. Also short. " + BOILERPLATE + "\n\nTail.")
+    assert passages[0].startswith("Short one. Also short. The appellant")
+    assert passages[-1].endswith("Tail.")
+
+
+@pytest.mark.unit
+def test_pack_keeps_the_relevant_span_of_every_source_within_budget(packer_module):
+    packer = _packer(packer_module, budget=80)
+    citations = [_citation("Long Judgment", JUDGMENT), _citation("ICA Section 27", STATUTE)]
+
+    context = packer.pack("Is a non-compete after termination void under Section 27?", citations, lambda term: 1.0)
+
+    blocks = context.split(packer_module.SOURCE_SEPARATOR)
+    assert [block.splitlines()[0] for block in blocks] == [
+        "[1] Long Judgment (case, SC)",
+        "[2] ICA Section 27 (case, SC)",
+    ]
+    assert "non-compete covenant" in blocks[0]
+    assert blocks[0].count("learned counsel") < JUDGMENT.count("learned counsel")
+    assert "…" in blocks[0]
+    assert "restrained from exercising" in blocks[1]
+    assert len(context.split()) <= 80
+
+
+@pytest.mark.unit
+def test_pack_keeps_sources_whole_when_they_fit(packer_module):
+    packer = _packer(packer_module, budget=10_000)
+    context = packer.pack("restraint of trade", [_citation("ICA Section 27", STATUTE)], lambda term: 1.0)
+    assert context.endswith(STATUTE)
+    assert "…" not in context
+
+
+@pytest.mark.unit
+def test_oversized_passages_are_split_and_cut_to_fit(packer_module):
+    schedule = "the transferee shall hold the shares subject to the restrictions in clause four " * 60
+    passages = packer_module.split_passages(schedule)
+    assert len(passages) > 1
+    assert max(len(passage) for passage in passages) <= packer_module.MAX_PASSAGE_CHARS
+
+    packer = _packer(packer_module, budget=60)
+    citations = [_citation("ICA Section 27", STATUTE), _citation("Share Transfer Schedule", schedule)]
+    context = packer.pack("shares transferee restrictions", citations, lambda term: 1.0)
+
+    blocks = context.split(packer_module.SOURCE_SEPARATOR)
+    assert "restrained from exercising" in blocks[0]
+    assert "the transferee shall hold" in blocks[1]
+    assert blocks[1].endswith("…")
+    assert len(context.split()) <= 60
@@ -0,0 +1,92 @@
+"""Unit tests for parallel corpus loading (corpus_loader.py).
+
+Results must come back in input order whatever the scheduling, so document
+ids stay deterministic between serial and parallel startups.
+"""
+from __future__ import annotations
+
+import importlib.util
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+DATA_DIR = Path(__file__).resolve().parent.parent
+LOADER_PATH = DATA_DIR / "corpus_loader.py"
+
+
+@pytest.fixture(scope="module")
+def loader_module():
+    spec = importlib.util.spec_from_file_location("corpus_loader_under_test", LOADER_PATH)
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    # Registered so worker tasks can be pickled by reference.
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    yield module
+    sys.modules.pop(spec.name, None)
+
+
+def _tokenize(text: str):
+    return text.lower().split()
+
+
+@pytest.mark.unit
+def test_load_sources_keeps_input_order(loader_module):
+    def _loader(value, delay):
+        def _load():
+            time.sleep(delay)
+            return value
+        return _load
+
+    sources = [("slow", _loader(1, 0.05)), ("fast", _loader(2, 0.0)), ("mid", _loader(3, 0.02))]
+    loaded = loader_module.load_sources(sources, max_workers=3)
+    assert [(name, result) for name, result, _ in loaded] == [("slow", 1), ("fast", 2), ("mid", 3)]
+    assert loaded[0][2] >= 0.05
+
+
+@pytest.mark.unit
+def test_load_sources_propagates_loader_errors(loader_module):
+    def _broken():
+        raise ValueError("bad corpus file")
+
+    with pytest.raises(ValueError):
+        loader_module.load_sources([("ok", list), ("broken", _broken)], max_workers=2)
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="needs the fork start method"
+)
+def test_parallel_term_counts_match_serial(loader_module, caplog):
+    if not loader_module._can_fork():
+        pytest.skip("other threads are running in this test process")
+    texts = [(f"Body {i} shares words words {i % 3}", f"Title {i}") for i in range(23)]
+    serial = list(loader_module.count_document_terms(texts, _tokenize, workers=1, chunk_size=4))
+    with caplog.at_level(logging.INFO):
+        parallel = list(loader_module.count_document_terms(texts, _tokenize, workers=3, chunk_size=4))
+    assert not caplog.records  # the process pool ran, no in-process fallback
+    assert parallel == serial
+    assert [list(body) for body, _ in parallel] == [list(body) for body, _ in serial]
+    assert serial[0] == (Counter({"body": 1, "0": 2, "shares": 1, "words": 2}), Counter({"title": 1, "0": 1}))
+
+
+@pytest.mark.unit
+def test_term_counts_are_not_forked_from_a_background_thread(loader_module, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("forked a process pool from a non-main thread")
+
+    monkeypatch.setattr(loader_module, "ProcessPoolExecutor", no_pool)
+    texts = [(f"Body {i}", f"Title {i}") for i in range(12)]
+    result = []
+    worker = threading.Thread(
+        target=lambda: result.extend(loader_module.count_document_terms(texts, _tokenize, workers=3, chunk_size=4))
+    )
+    worker.start()
+    worker.join()
+    assert result == list(loader_module.count_document_terms(texts, _tokenize, workers=1, chunk_size=4))
@@ -0,0 +1,95 @@
+"""Unit tests for the memory-mapped dense index (dense_index.py)."""
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+DATA_DIR = Path(__file__).resolve().parent.parent
+DENSE_INDEX_PATH = DATA_DIR / "dense_index.py"
+
+
+@pytest.fixture(scope="module")
+def dense_module():
+    spec = importlib.util.spec_from_file_location("dense_index_under_test", DENSE_INDEX_PATH)
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _unit_vectors(count: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    # A few clusters, so PQ has structure to learn (like real embeddings).
+    centers = rng.normal(size=(8, dim))
+    vectors = centers[rng.integers(0, 8, size=count)] + 0.5 * rng.normal(size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _exact_top(vectors: np.ndarray, query: np.ndarray, k: int):
+    return list(np.argsort(-(vectors @ query), kind="stable")[:k])
+
+
+@pytest.mark.unit
+def test_float16_index_round_trips_exact_ranking(dense_module, tmp_path):
+    vectors = _unit_vectors(300, 32)
+    dense_module.write_dense_index(tmp_path / "idx", vectors, alignment="a", kind="float16")
+    index = dense_module.load_dense_index(tmp_path / "idx", alignment="a")
+
+    assert index is not None and index.kind == "float16"
+    assert isinstance(index._vectors, np.memmap)
+    query = vectors[17]
+    hits = index.search(query, top_k=5)
+    assert [doc_id for doc_id, _ in hits] == _exact_top(vectors, query, 5)
+    assert hits[0] == (17, pytest.approx(1.0, abs=1e-2))
+
+
+@pytest.mark.unit
+def test_pq_index_with_refine_recovers_exact_neighbours(dense_module, tmp_path):
+    vectors = _unit_vectors(2000, 64, seed=1)
+    queries = _unit_vectors(20, 64, seed=2)
+    dense_module.write_dense_index(tmp_path / "idx", vectors, alignment="a", kind="pq", subspaces=8)
+    index = dense_module.load_dense_index(tmp_path / "idx", alignment="a")
+
+    assert index.kind == "pq"
+    assert index.scan_nbytes < vectors.nbytes // 4
+    found = index.search_many(queries, top_k=10)
+    recall = np.mean([
+        len({doc_id for doc_id, _ in hits} & set(_exact_top(vectors, query, 10))) / 10
+        for query, hits in zip(queries, found)
+    ])
+    assert recall >= 0.9
+
+
+@pytest.mark.unit
+def test_search_skips_excluded_doc_ids(dense_module, tmp_path):
+    vectors = _unit_vectors(50, 16)
+    dense_module.write_dense_index(tmp_path / "idx", vectors, alignment="a", kind="float16")
+    index = dense_module.load_dense_index(tmp_path / "idx", alignment="a")
+
+    hits = index.search(vectors[3], top_k=3, exclude={3})
+    assert 3 not in [doc_id for doc_id, _ in hits]
+    assert len(hits) == 3
+
+
+@pytest.mark.unit
+def test_misaligned_or_missing_index_is_ignored(dense_module, tmp_path):
+    vectors = _unit_vectors(20, 16)
+    dense_module.write_dense_index(tmp_path / "idx", vectors, alignment="a", kind="float16")
+
+    assert dense_module.load_dense_index(tmp_path / "idx", alignment="b") is None
+    assert dense_module.load_dense_index(tmp_path / "missing", alignment="a") is None
+    (tmp_path / "idx" / "vectors.npy").write_bytes(b"corrupt")
+    assert dense_module.load_dense_index(tmp_path / "idx", alignment="a") is None
+
+
+@pytest.mark.unit
+def test_alignment_digest_tracks_corpus_content(dense_module):
+    corpus = [{"title": f"Doc {idx}", "content": f"text {idx}"} for idx in range(10)]
+    digest = dense_module.alignment_digest(corpus)
+
+    assert dense_module.alignment_digest([dict(doc) for doc in corpus]) == digest
+    assert dense_module.alignment_digest(corpus[:-1]) != digest
+    assert dense_module.alignment_digest(corpus[1:] + corpus[:1]) != digest
@@ -0,0 +1,65 @@
+"""Unit tests for the query embedding service (embedding_service.py).
+
+The batch encoder is faked, so no torch or model download is needed.
+"""
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+DATA_DIR = Path(__file__).resolve().parent.parent
+SERVICE_PATH = DATA_DIR / "embedding_service.py"
+
+
+@pytest.fixture(scope="module")
+def service_module():
+    spec = importlib.util.spec_from_file_location("embedding_service_under_test", SERVICE_PATH)
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def fake_service(service_module):
+    class _LengthEmbeddings(service_module.EmbeddingService):
+        """Embeds a text as ``[len(text), batch size]`` in float64."""
+
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.batches = []
+
+        def _encode(self, texts):
+            self.batches.append(list(texts))
+            return np.array([[len(text), len(texts)] for text in texts], dtype=np.float64)
+
+    return _LengthEmbeddings
+
+
+@pytest.mark.unit
+def test_query_embeddings_are_cached_float32(fake_service):
+    service = fake_service(cache_size=2)
+    first = service.embed_query("section 7")
+    assert first.dtype == np.float32 and first.shape == (2,)
+    assert service.embed_query("section 7") is first
+    with pytest.raises(ValueError):
+        first[0] = 0.0  # shared with the cache
+
+    service.embed_query("a")
+    service.embed_query("bb")  # evicts "section 7"
+    service.embed_query("section 7")
+    assert len(service.batches) == 4
+    assert service.stats() == {"hits": 1, "misses": 4, "entries": 2}
+
+
+@pytest.mark.unit
+def test_documents_batched_by_length_in_input_order(fake_service):
+    service = fake_service(batch_size=2)
+    texts = ["aaaa", "a", "aaa", "aa", "aaaaa"]
+    matrix = service.embed_documents(texts)
+    assert matrix.dtype == np.float32 and matrix.shape == (5, 2)
+    assert matrix[:, 0].tolist() == [4, 1, 3, 2, 5]
+    assert service.batches == [["a", "aa"], ["aaa", "aaaa"], ["aaaaa"]]
@@ -0,0 +1,76 @@
+"""Unit tests for the two-tier retrieval / answer cache (rag_cache.py).
+
+The SQLite tier is exercised against a file under tmp_path, so the tests
+never touch a real cache shared with running workers.
+"""
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+DATA_DIR = Path(__file__).resolve().parent.parent
+CACHE_PATH = DATA_DIR / "rag_cache.py"
+
+
+@pytest.fixture(scope="module")
+def cache_module():
+    spec = importlib.util.spec_from_file_location("rag_cache_under_test", CACHE_PATH)
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.unit
+def test_cache_key_normalizes_query_and_tracks_corpus_version(cache_module):
+    key = cache_module.make_cache_key
+    config = {"hybrid_search": True}
+    assert key("retrieve", "What is  NDA?", 5, config, "v1") == key(
+        "retrieve", "what is nda?", 5, config, "v1"
+    )
+    assert key("retrieve", "what is nda?", 5, config, "v1") != key(
+        "retrieve", "what is nda?", 5, config, "v2"
+    )
+    assert key("retrieve", "what is nda?", 5, config, "v1") != key(
+        "answer", "what is nda?", 5, config, "v1"
+    )
+
+
+@pytest.mark.unit
+def test_memory_tier_evicts_lru_and_expires(cache_module, monkeypatch):
+    cache = cache_module.ResponseCache(max_entries=2, ttl_seconds=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    now = cache_module.time.time()
+    monkeypatch.setattr(cache_module.time, "time", lambda: now + 11)
+    assert cache.get("a") is None
+    assert cache.stats() == {
+        "memory_hits": 2, "disk_hits": 0, "misses": 2, "stores": 3, "entries": 1,
+    }
+
+
+@pytest.mark.unit
+def test_sqlite_tier_survives_restart_and_clear(cache_module, tmp_path):
+    db_path = tmp_path / "cache" / "rag_cache.sqlite3"
+    first = cache_module.ResponseCache(sqlite_path=db_path)
+    first.set("answer", {"answer": "text", "citations": []})
+
+    second = cache_module.ResponseCache(sqlite_path=db_path)
+    assert second.get("answer") == {"answer": "text", "citations": []}
+    assert second.stats()["disk_hits"] == 1
+    assert second.get("answer") is not None
+    assert second.stats()["memory_hits"] == 1
+
+    second.clear_memory()
+    assert second.get("answer") is not None
+    assert second.stats()["disk_hits"] == 2
+
+    second.clear()
+    assert cache_module.ResponseCache(sqlite_path=db_path).get("answer") is None
@@ -6,10 +6,14 @@ the critical path of CI.
 """
 from __future__ import annotations
 
+import asyncio
 import importlib.util
 import os
 import sys
+import threading
+import time
 from pathlib import Path
+from types import SimpleNamespace
 
 import pytest
 
@@ -46,6 +50,7 @@ def tiny_corpus(rag_module):
     rag.hybrid_search = True
     rag.bm25_weight = 0.4
     rag.semantic_weight = 0.6
+    rag.hybrid_leg_timeout_ms = 0
     rag.rerank_top_n = 5
     rag.relevance_threshold = 0.65
     rag.high_confidence_threshold = 0.80
@@ -58,9 +63,31 @@ def tiny_corpus(rag_module):
     rag.corpus_source = "test"
     rag.corpus_error = None
     rag.loaded_corpus_files = []
+    rag.corpus_load_timings = {}
     rag._bm25_index = None
-    rag._bm25_corpus_tokens = []
+    rag._title_index = None
+    rag._loose_match_index = None
+    rag._corpus_snapshot = None
+    rag._dense_index = None
+    rag._hybrid_lock = threading.Lock()
+    rag._hybrid_counters = {"queries": 0, "bm25_timeouts": 0, "dense_timeouts": 0, "errors": 0}
+    rag._verifier = None
+    rag.context_token_budget = 3000
+    rag._context_packer = None
+    rag._approx_token_count = None
+    rag.provider_clients = None
+    rag._anthropic_clients = {}
     rag._reranker = None
+    rag._response_cache = None
+    rag._semantic_cache = None
+    rag.corpus_version = "test"
+    rag._update_lock = threading.RLock()
+    rag._removed_doc_ids = set()
+    rag._corpus_revision = 0
+    rag._incremental_ranges = None
+    rag._incremental_docs = None
+    rag._static_fingerprint = None
+    rag.corpus_as_of = None
 
     rag.local_corpus = [
         rag._build_local_document(
@@ -125,23 +152,62 @@ def test_preprocess_is_idempotent_for_unchanged_text(rag_module):
     assert rag_module.JurisGPTRAG.preprocess_query(text) == text
 
 
+@pytest.mark.unit
+def test_preprocess_single_pass_matches_sequential_rewrite(rag_module):
+    """The compiled alternation must agree with the old section-first,
+    one-regex-per-abbreviation rewrite."""
+    import re
+
+    def sequential(query):
+        processed = rag_module.SECTION_REF_RE.sub(
+            lambda match: f"Section {match.group(1)}", query
+        )
+        for abbr, expansion in rag_module.LEGAL_ABBREVIATIONS.items():
+            pattern = re.compile(r"\b" + re.escape(abbr) + r"\b", re.IGNORECASE)
+            processed = pattern.sub(f"{expansion} ({abbr.upper()})", processed)
+        return processed
+
+    for query in (
+        "cgst vs sgst vs GST under sec 9 of the IT Act",
+        "NCLT or NCLAT appeal, pvt ltd OPC and LLP; section 302a IPC",
+        "Does an NDA bind an esop holder? Sec. 27, sec27, ip/ipo",
+    ):
+        assert rag_module.JurisGPTRAG.preprocess_query(query) == sequential(query)
+
+
+@pytest.mark.unit
+def test_analyze_query_is_cached(rag_module, tiny_corpus):
+    analyze = rag_module.JurisGPTRAG.analyze_query
+    first = analyze("explain sec 27 ICA and NDA terms")
+    assert first.processed_query.startswith("explain Section 27")
+    assert "non" in first.tokens and "27" in first.tokens
+    assert analyze("explain sec 27 ICA and NDA terms") is first
+
+    citations, analysis = tiny_corpus.retrieve(
+        "vesting schedule", top_k=2, return_analysis=True
+    )
+    assert analysis.tokens == ("vesting", "schedule")
+    assert citations == tiny_corpus.retrieve("vesting schedule", top_k=2)
+
+
 # ── BM25 fix regression test ───────────────────────────────────────────────
 
 
 @pytest.mark.unit
 def test_bm25_tokens_preserve_term_frequency(tiny_corpus):
-    """If tokens are stored as a set BM25 collapses, returning identical
-    scores for documents with very different term frequency. This guards the
-    fix to use a list-of-tokens for the BM25 corpus.
+    """If tokens are collapsed to a set BM25 returns identical scores for
+    documents with very different term frequency. This guards that the index
+    keeps per-document term frequencies.
     """
-    bm25_corpus = tiny_corpus._bm25_corpus_tokens
-    assert all(isinstance(tokens, list) for tokens in bm25_corpus)
-    # The vesting clause says "vest" / "vesting" repeatedly; the word should
-    # appear more than once if term frequency is preserved.
-    vesting_doc = next(
-        tokens for tokens in bm25_corpus if any("vest" in t for t in tokens)
-    )
-    assert sum(1 for t in vesting_doc if "vest" in t) >= 2
+    index = tiny_corpus._bm25_index
+    term_id = index.vocabulary["vesting"]
+    # The vesting clause says "vesting" in its title and twice in its body.
+    assert index.postings("vesting").tolist() == [1]
+    assert index.tfs[index.indptr[term_id]:index.indptr[term_id + 1]].tolist() == [3]
+
+
+def _document_tokens(rag):
+    return [rag._tokenize(rag._document_token_text(doc)) for doc in rag.local_corpus]
 
 
 @pytest.mark.unit
@@ -153,6 +219,181 @@ def test_bm25_ranks_vesting_clause_first(tiny_corpus):
     assert "Vesting" in citations[0].title
 
 
+@pytest.mark.unit
+def test_sparse_bm25_matches_rank_bm25(tiny_corpus):
+    """The sparse-matrix engine must score exactly like BM25Okapi, including
+    repeated query terms and terms that are missing from the vocabulary."""
+    rank_bm25 = pytest.importorskip("rank_bm25")
+    reference = rank_bm25.BM25Okapi(_document_tokens(tiny_corpus))
+    for query in (
+        ["vesting", "equity", "vesting"],
+        ["registrar", "company", "unknowntoken"],
+        ["trade", "section", "agreement"],
+    ):
+        expected = reference.get_scores(query)
+        actual = tiny_corpus._bm25_index.get_scores(query)
+        assert actual == pytest.approx(expected)
+
+
+@pytest.mark.unit
+def test_postings_round_trip_through_varints(rag_module, tiny_corpus):
+    bm25_module = rag_module._import_data_module("bm25_index")
+    values = [0, 1, 127, 128, 16383, 16384, 2**31 - 1]
+    encoded = bm25_module.encode_varints(values)
+    assert len(encoded) == sum(bm25_module.varint_sizes(values))
+    assert bm25_module.decode_varints(encoded).tolist() == values
+
+    for doc_id, tokens in enumerate(_document_tokens(tiny_corpus)):
+        for token in tokens:
+            assert doc_id in tiny_corpus._bm25_index.postings(token)
+    assert "tokens" not in tiny_corpus.local_corpus[0]
+
+
+@pytest.mark.unit
+def test_sparse_bm25_top_k_matches_full_sort(rag_module):
+    bm25_module = rag_module._import_data_module("bm25_index")
+    corpus = [
+        ["alpha", "beta"] * (i % 3 + 1) + ["gamma"] * (i % 2) + [f"doc{i}"]
+        for i in range(40)
+    ]
+    index = bm25_module.BM25Index(corpus)
+    query = ["beta", "gamma", "doc7"]
+    scores = index.get_scores(query)
+    expected = sorted(enumerate(scores), key=lambda x: x[1], reverse=True)[:10]
+    expected = [(idx, score) for idx, score in expected if score > 0]
+    top = index.top_k(query, 10)
+    assert [idx for idx, _ in top] == [idx for idx, _ in expected]
+    assert [score for _, score in top] == pytest.approx([s for _, s in expected])
+
+
+@pytest.mark.unit
+def test_bm25_top_k_many_matches_top_k(rag_module):
+    bm25_module = rag_module._import_data_module("bm25_index")
+    corpus = [
+        ["alpha", "beta"] * (i % 3 + 1) + ["gamma"] * (i % 2) + [f"doc{i}"]
+        for i in range(40)
+    ]
+    index = bm25_module.BM25Index(corpus)
+    queries = [["beta", "gamma", "doc7"], [], ["missing"], ["gamma", "beta"], ["doc3", "doc3"]]
+    batched = index.top_k_many(queries, 5)
+    assert len(batched) == len(queries)
+    for query, top in zip(queries, batched):
+        expected = index.top_k(query, 5)
+        assert [idx for idx, _ in top] == [idx for idx, _ in expected]
+        assert [score for _, score in top] == pytest.approx([s for _, s in expected])
+
+
+@pytest.mark.unit
+def test_parallel_index_build_matches_serial(rag_module, tiny_corpus, monkeypatch):
+    np = pytest.importorskip("numpy")
+    serial_arrays, serial_params = tiny_corpus._bm25_index.to_arrays()
+    serial_vocabulary = dict(tiny_corpus._bm25_index.vocabulary)
+    serial_titles, _ = tiny_corpus._title_index.to_arrays()
+
+    monkeypatch.setattr(rag_module, "CORPUS_LOAD_WORKERS", 2)
+    monkeypatch.setattr(rag_module, "CORPUS_TOKENIZE_CHUNK_SIZE", 1)
+    tiny_corpus._build_bm25_index()
+
+    arrays, params = tiny_corpus._bm25_index.to_arrays()
+    titles, _ = tiny_corpus._title_index.to_arrays()
+    assert tiny_corpus._bm25_index.vocabulary == serial_vocabulary
+    assert list(tiny_corpus._bm25_index.vocabulary) == list(serial_vocabulary)
+    assert params == serial_params
+    for name in arrays:
+        np.testing.assert_array_equal(arrays[name], serial_arrays[name])
+        np.testing.assert_array_equal(titles[name], serial_titles[name])
+    assert "tokenize" in tiny_corpus.get_corpus_stats().load_timings
+
+
+def _assert_same_top_k(index, rebuilt, id_map, queries):
+    """``index`` ranks like ``rebuilt`` (whose doc ids map through ``id_map``)."""
+    for query in queries:
+        expected = [(id_map[doc_id], score) for doc_id, score in rebuilt.top_k(query, 10)]
+        actual = index.top_k(query, 10)
+        assert [doc_id for doc_id, _ in actual] == [doc_id for doc_id, _ in expected]
+        assert [score for _, score in actual] == pytest.approx([s for _, s in expected])
+
+
+@pytest.mark.unit
+def test_bm25_incremental_updates_match_rebuild(rag_module):
+    bm25_module = rag_module._import_data_module("bm25_index")
+    corpus = [
+        ["alpha", "beta"] * (i % 3 + 1) + ["gamma"] * (i % 2) + [f"doc{i}"]
+        for i in range(30)
+    ]
+    added = [["delta", "beta"], ["alpha", "delta", "delta"], ["epsilon"]]
+    removed = [0, 4, 31]
+    queries = [["beta", "gamma"], ["delta"], ["alpha", "doc7"], ["doc4"], ["epsilon", "beta"]]
+
+    index = bm25_module.BM25Index(corpus)
+    index.compaction_ratio = None
+    assert index.add_documents(added) == [30, 31, 32]
+    everything = corpus + added
+    index.remove_documents(removed, [everything[doc_id] for doc_id in removed])
+    assert index.document_count == 30 and index.has_pending_updates
+
+    live_ids = [doc_id for doc_id in range(33) if doc_id not in removed]
+    rebuilt = bm25_module.BM25Index([everything[doc_id] for doc_id in live_ids])
+    _assert_same_top_k(index, rebuilt, live_ids, queries)
+    assert 4 not in index.postings("doc4")
+
+    index.compact()
+    assert not index.has_pending_updates
+    _assert_same_top_k(index, rebuilt, live_ids, queries)
+    assert index.postings("delta").tolist() == [30]
+
+
+@pytest.mark.unit
+def test_bm25_scores_outside_the_index_lock(rag_module, monkeypatch):
+    np = pytest.importorskip("numpy")
+    bm25_module = rag_module._import_data_module("bm25_index")
+    index = bm25_module.BM25Index([["alpha", "beta"], ["beta"], ["alpha", "gamma"]])
+    index.compaction_ratio = None
+    index.add_documents([["alpha", "delta"]])
+    index.remove_documents([1], [["beta"]])
+    expected = (index.get_scores(["alpha"]), index.top_k(["alpha", "beta"], 2))
+    decode = index._decode_postings
+    lock_free = []
+
+    def probe():
+        acquired = index._lock.acquire(blocking=False)
+        if acquired:
+            index._lock.release()
+        lock_free.append(acquired)
+
+    def decode_postings(source, removed_mask):
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        return decode(source, removed_mask)
+
+    monkeypatch.setattr(index, "_decode_postings", decode_postings)
+    np.testing.assert_array_equal(index.get_scores(["alpha"]), expected[0])
+    assert index.top_k(["alpha", "beta"], 2) == expected[1]
+    assert index.top_k_many([["alpha", "beta"]], 2) == [expected[1]]
+    assert index.postings("beta").tolist() == [0]
+    assert lock_free and all(lock_free)
+
+    # Removal replaces the mask, so a snapshot taken earlier is unaffected.
+    with index._lock:
+        _, mask = index._snapshot_postings([])
+    index.remove_documents([3], [["alpha", "delta"]])
+    assert mask.tolist() == [False, True, False, False]
+
+
+@pytest.mark.unit
+def test_substring_index_update_matches_rebuild(rag_module):
+    bm25_module = rag_module._import_data_module("bm25_index")
+    vocabulary = {token: i for i, token in enumerate(["registration", "restraint", "vest"])}
+    index = bm25_module.SubstringIndex(vocabulary)
+    for token in ("registrar", "restrained", "vesting"):
+        vocabulary.setdefault(token, len(vocabulary))
+    index.update()
+    rebuilt = bm25_module.SubstringIndex(vocabulary)
+    for query_token in ("regist", "restrain", "vesting", "restrained"):
+        assert index.matches(query_token) == rebuilt.matches(query_token)
+
+
 # ── Inverted-index retrieval ───────────────────────────────────────────────
 
 
@@ -174,6 +415,228 @@ def test_lexical_retrieval_finds_section_7(tiny_corpus):
     assert any("Section 7" in c.title for c in citations)
 
 
+@pytest.mark.unit
+def test_substring_index_matches_brute_force(tiny_corpus):
+    index = tiny_corpus._get_loose_match_index()
+    vocabulary = tiny_corpus._bm25_index.vocabulary
+    for query_token in ("restrain", "agreements", "vest", "registration", "companyx"):
+        expected = sorted(
+            token for token in vocabulary
+            if tiny_corpus._token_matches(query_token, token)
+        )
+        assert index.matches(query_token) == expected
+
+
+@pytest.mark.unit
+def test_loose_matches_from_postings_match_full_scan(tiny_corpus):
+    query_tokens = tiny_corpus._tokenize("restrain agreements of founders")
+    from_postings = tiny_corpus._score_from_postings(query_tokens)
+    # Loose-only documents are found (no document contains "restrain").
+    assert {doc_idx for _, doc_idx in from_postings} >= {1, 2}
+
+    tiny_corpus._bm25_index = None
+    assert tiny_corpus._scan_local_corpus(query_tokens) == from_postings
+
+
+# ── Response cache ─────────────────────────────────────────────────────────
+
+
+@pytest.mark.unit
+def test_retrieve_and_query_are_served_from_cache(rag_module, tiny_corpus):
+    rag_cache = rag_module._import_data_module("rag_cache")
+    tiny_corpus._response_cache = rag_cache.ResponseCache()
+
+    first = tiny_corpus.query("What is equity vesting?")
+    second = tiny_corpus.query("what is   EQUITY vesting?")
+    assert second.answer == first.answer and second.citations == first.citations
+    assert second.citations is not first.citations
+    assert second.served_from_cache and not first.served_from_cache
+    assert tiny_corpus.get_corpus_stats().cache_stats["memory_hits"] == 1
+
+    # A rebuilt corpus gets a new version id, so old entries are not used.
+    tiny_corpus.corpus_version = "rebuilt"
+    tiny_corpus.retrieve("What is equity vesting?")
+    assert tiny_corpus.get_corpus_stats().cache_stats["memory_hits"] == 1
+    tiny_corpus.retrieve("What is equity vesting?")
+    assert tiny_corpus.get_corpus_stats().cache_stats["memory_hits"] == 2
+
+
+@pytest.mark.unit
+def test_retrieve_many_matches_retrieve(rag_module, tiny_corpus):
+    queries = [
+        "What is Section 7 of the Companies Act, 2013?",
+        "What is equity vesting?",
+        "restrain agreements of founders",
+        "",
+    ]
+    expected = [tiny_corpus.retrieve(query, top_k=3) for query in queries]
+    assert tiny_corpus.retrieve_many(queries, top_k=3) == expected
+
+    rag_cache = rag_module._import_data_module("rag_cache")
+    tiny_corpus._response_cache = rag_cache.ResponseCache()
+    tiny_corpus.retrieve(queries[1], top_k=3)
+    assert tiny_corpus.retrieve_many(queries, top_k=3) == expected
+    stats = tiny_corpus.get_corpus_stats().cache_stats
+    assert stats["memory_hits"] == 1
+    # Batch misses are stored too, so a repeat batch is all hits.
+    tiny_corpus.retrieve_many(queries, top_k=3)
+    assert tiny_corpus.get_corpus_stats().cache_stats["memory_hits"] == 1 + len(queries)
+
+
+@pytest.mark.unit
+def test_paraphrase_served_from_semantic_cache(rag_module, tiny_corpus, monkeypatch):
+    semantic_cache = rag_module._import_data_module("semantic_cache")
+    tiny_corpus._semantic_cache = semantic_cache.SemanticCache(similarity_threshold=0.8)
+    tiny_corpus.llm = "stub"
+    generated = []
+
+    def fake_generate(query, citations):
+        generated.append(query)
+        return rag_module.RAGResponse(
+            answer="Founders vest over four years [1].",
+            citations=citations,
+            confidence="high",
+            limitations="",
+            follow_up_questions=[],
+            query=query,
+            model_used="anthropic",
+            grounded=True,
+        )
+
+    monkeypatch.setattr(tiny_corpus, "generate_answer", fake_generate)
+    first = tiny_corpus.query("What is the founder vesting schedule?")
+    second = tiny_corpus.query("founders vesting schedule, what is it")
+    assert generated == ["What is the founder vesting schedule?"]
+    assert not first.served_from_cache
+    assert second.served_from_cache
+    assert second.query == "founders vesting schedule, what is it"
+    assert second.answer == first.answer
+
+    # Section numbers must match exactly, however similar the wording.
+    tiny_corpus.query("What is Section 7 of the Companies Act, 2013?")
+    tiny_corpus.query("What is Section 8 of the Companies Act, 2013?")
+    assert len(generated) == 3
+
+
+# ── Corpus snapshot ────────────────────────────────────────────────────────
+
+
+# ── Incremental corpus updates ─────────────────────────────────────────────
+
+
+@pytest.mark.unit
+def test_add_and_remove_documents_update_retrieval(rag_module, tiny_corpus):
+    new_ids = tiny_corpus.add_documents([{
+        "title": "Employee Stock Option Plan - Vesting",
+        "content": "ESOP options vest over four years under the scheme.",
+        "doc_type": "faq",
+        "source": "ESOP FAQ",
+    }])
+    assert new_ids == [3]
+    assert tiny_corpus.corpus_version != "test"
+    assert 3 in tiny_corpus._candidate_doc_indices(["esop"])
+
+    assert tiny_corpus.remove_documents([1, 1]) == 1
+    assert tiny_corpus.remove_documents([1]) == 0
+    titles = [c.title for c in tiny_corpus.retrieve("equity vesting cliff", top_k=5)]
+    assert "Founder Agreement Clause - Vesting Schedule" not in titles
+    assert "Employee Stock Option Plan - Vesting" in titles
+
+    stats = tiny_corpus.get_corpus_stats()
+    assert stats.total_documents == 3
+    assert stats.by_doc_type == {"faq": 1, "statute": 2}
+
+    # BM25 matches an index rebuilt over the live documents.
+    live_ids = [0, 2, 3]
+    rebuilt = rag_module._import_data_module("bm25_index").BM25Index(
+        tiny_corpus._tokenize(tiny_corpus._document_token_text(tiny_corpus.local_corpus[i]))
+        for i in live_ids
+    )
+    queries = [tiny_corpus._tokenize(q) for q in ("vesting esop", "section registration", "trade")]
+    _assert_same_top_k(tiny_corpus._bm25_index, rebuilt, live_ids, queries)
+
+
+@pytest.mark.unit
+def test_refresh_corpus_applies_source_delta(tiny_corpus, monkeypatch):
+    judgment = {
+        "title": "Acme v. Registrar of Companies",
+        "content": "Incorporation documents filed late attract additional fees.",
+        "doc_type": "case",
+        "source": "Indian Kanoon (doc 1)",
+        "url": "https://indiankanoon.org/doc/1/",
+    }
+    sources = {"ingested_judgments.json": [], "obsidian": []}
+    tiny_corpus.corpus_source = "local"
+    tiny_corpus._incremental_ranges = {}
+    tiny_corpus._static_fingerprint = {"files": []}
+    monkeypatch.setattr(tiny_corpus, "_corpus_fingerprint", lambda include_incremental_sources=True: {"files": []})
+    monkeypatch.setattr(
+        tiny_corpus,
+        "_read_incremental_source",
+        lambda name: ([tiny_corpus._build_local_document(**record) for record in sources[name]], []),
+    )
+
+    sources["ingested_judgments.json"] = [judgment]
+    assert tiny_corpus.refresh_corpus() == {"added": 1, "removed": 0}
+    assert tiny_corpus.refresh_corpus() == {"added": 0, "removed": 0}
+
+    sources["ingested_judgments.json"] = [{**judgment, "content": "Revised headnote on late filing fees."}]
+    assert tiny_corpus.refresh_corpus() == {"added": 1, "removed": 1}
+    assert tiny_corpus._removed_doc_ids == {3}
+    assert tiny_corpus._candidate_doc_indices(["revised"]) == [4]
+
+    # Any other corpus file changing needs a full reload.
+    tiny_corpus._static_fingerprint = {"files": [["companies_act_sections.json", 1, 1]]}
+    assert tiny_corpus.refresh_corpus() is None
+
+
+@pytest.mark.unit
+def test_corpus_snapshot_round_trip(rag_module, tiny_corpus, tmp_path):
+    snapshot_module = rag_module._import_data_module("corpus_snapshot")
+    fingerprint = {"files": [["corpus.json", 1, 1]]}
+    snapshot_module.write_snapshot(
+        tmp_path / "snapshot",
+        documents=tiny_corpus.local_corpus,
+        bm25_index=tiny_corpus._bm25_index,
+        title_index=tiny_corpus._title_index,
+        fingerprint=fingerprint,
+    )
+    snapshot = snapshot_module.load_snapshot(tmp_path / "snapshot", fingerprint=fingerprint)
+    assert snapshot is not None
+    assert len(snapshot.documents) == len(tiny_corpus.local_corpus)
+    assert snapshot.bm25_index.postings("vesting").tolist() == [1]
+
+    query = "What is Section 7 of the Companies Act, 2013?"
+    expected = tiny_corpus._retrieve_from_local_corpus(query, top_k=3)
+    tiny_corpus.local_corpus = snapshot.documents
+    tiny_corpus._bm25_index = snapshot.bm25_index
+    tiny_corpus._title_index = snapshot.title_index
+    actual = tiny_corpus._retrieve_from_local_corpus(query, top_k=3)
+    assert [(c.title, c.relevance) for c in actual] == [
+        (c.title, c.relevance) for c in expected
+    ]
+    assert tiny_corpus._bm25_index.top_k(["vesting"], 3)[0][0] == 1
+
+
+@pytest.mark.unit
+def test_corpus_snapshot_rejects_stale_or_corrupt(rag_module, tiny_corpus, tmp_path):
+    snapshot_module = rag_module._import_data_module("corpus_snapshot")
+    fingerprint = {"files": [["corpus.json", 1, 1]]}
+    directory = snapshot_module.write_snapshot(
+        tmp_path / "snapshot",
+        documents=tiny_corpus.local_corpus,
+        bm25_index=tiny_corpus._bm25_index,
+        title_index=tiny_corpus._title_index,
+        fingerprint=fingerprint,
+    )
+    stale = {"files": [["corpus.json", 1, 2]]}
+    assert snapshot_module.load_snapshot(directory, fingerprint=stale) is None
+
+    with open(directory / "documents.bin", "r+b") as handle:
+        handle.write(b"X")
+    assert snapshot_module.load_snapshot(directory, fingerprint=fingerprint) is None
+
+
 # ── RRF fusion ─────────────────────────────────────────────────────────────
 
 
@@ -188,6 +651,140 @@ def test_rrf_fusion_dedupes_documents(rag_module, tiny_corpus):
     assert len(titles) == len(set(titles))
 
 
+@pytest.mark.unit
+def test_corpus_citations_reference_records(rag_module, tiny_corpus):
+    bm25 = tiny_corpus._retrieve_bm25("equity vesting cliff", 3)
+    assert all(c.doc_id is not None and c._record is None for c in bm25)
+
+    fused = tiny_corpus._reciprocal_rank_fusion(bm25, bm25, top_k=3)
+    assert [c.doc_id for c in fused] == [c.doc_id for c in bm25]
+    top = fused[0]
+    assert top.content is tiny_corpus.local_corpus[top.doc_id]["content"]
+
+    # Keyword construction (cache entries, vector-store hits) still works and
+    # compares equal to the lazily resolved corpus citation, with the same
+    # key (the semantic cache matches cached and fresh citations by key).
+    restored = rag_module.Citation(**top.to_dict())
+    assert restored == top
+    assert restored.key == top.key == top.doc_id
+    assert not hasattr(top, "__dict__")
+
+
+@pytest.mark.unit
+def test_rerank_keeps_fused_order_over_budget(rag_module, tiny_corpus):
+    fused = [rag_module.Citation.from_corpus(tiny_corpus.local_corpus, idx, 0.9) for idx in range(3)]
+    tiny_corpus.use_reranker = True
+
+    tiny_corpus._reranker = SimpleNamespace(score=lambda query, citations: None)
+    assert tiny_corpus._rerank("equity vesting cliff", fused, 2) == fused[:2]
+
+    tiny_corpus._reranker = SimpleNamespace(score=lambda query, citations: [-10.0, 0.0, 10.0])
+    reranked = tiny_corpus._rerank("equity vesting cliff", fused, 2)
+    assert [c.doc_id for c in reranked] == [fused[2].doc_id, fused[1].doc_id]
+    assert [c.relevance for c in reranked] == [1.0, 0.5]
+
+
+def _with_dense_index(rag_module, rag, vectors, query_vector, tmp_path):
+    dense_index = rag_module._import_data_module("dense_index")
+    alignment = dense_index.alignment_digest(rag.local_corpus)
+    dense_index.write_dense_index(tmp_path / "idx", vectors, alignment=alignment, kind="float16")
+    rag._dense_index = dense_index.load_dense_index(tmp_path / "idx", alignment=alignment)
+    rag.vector_store = "dense"
+    rag.embeddings = SimpleNamespace(
+        embed_query=lambda text: query_vector,
+        embed_documents=lambda texts: [query_vector for _ in texts],
+    )
+
+
+@pytest.mark.unit
+def test_dense_index_hits_are_corpus_citations(rag_module, tiny_corpus, tmp_path):
+    vectors = [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0]]
+    _with_dense_index(rag_module, tiny_corpus, vectors, [0.0, 0.8, 0.6, 0.0], tmp_path)
+    tiny_corpus.hybrid_search = False
+
+    citations = tiny_corpus.retrieve("equity vesting", top_k=2)
+    assert [c.doc_id for c in citations] == [1, 2]
+    assert citations[0].title == "Founder Agreement Clause - Vesting Schedule"
+    assert [c.relevance for c in citations] == [0.8, 0.6]
+
+    tiny_corpus._removed_doc_ids.add(1)
+    assert [c.doc_id for c in tiny_corpus.retrieve("equity vesting", top_k=2)] == [2, 0]
+
+
+@pytest.mark.unit
+def test_hybrid_fuses_bm25_and_dense_by_weight(rag_module, tiny_corpus, tmp_path):
+    # Dense ranks restraint of trade (2) first; BM25 only matches vesting (1).
+    vectors = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+    _with_dense_index(rag_module, tiny_corpus, vectors, [0.0, 0.6, 0.8], tmp_path)
+    tiny_corpus.hybrid_search = True
+
+    tiny_corpus.bm25_weight, tiny_corpus.semantic_weight = 0.4, 0.6
+    assert [c.doc_id for c in tiny_corpus.retrieve("vesting", top_k=2)] == [1, 2]
+    tiny_corpus.bm25_weight, tiny_corpus.semantic_weight = 0.0, 1.0
+    assert [c.doc_id for c in tiny_corpus.retrieve("vesting", top_k=2)] == [2, 1]
+    assert [
+        [c.doc_id for c in citations]
+        for citations in tiny_corpus.retrieve_many(["vesting", "vesting"], top_k=2)
+    ] == [[2, 1], [2, 1]]
+    assert tiny_corpus.get_corpus_stats().cache_stats["hybrid_queries"] == 4
+
+
+@pytest.mark.unit
+def test_hybrid_drops_a_leg_that_misses_its_timeout(rag_module, tiny_corpus, tmp_path):
+    vectors = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+    _with_dense_index(rag_module, tiny_corpus, vectors, [0.0, 0.0, 1.0], tmp_path)
+    release = threading.Event()
+
+    def slow_query(text):
+        release.wait(5)
+        return [0.0, 0.0, 1.0]
+
+    tiny_corpus.embeddings = SimpleNamespace(embed_query=slow_query)
+    tiny_corpus.hybrid_search = True
+    tiny_corpus.hybrid_leg_timeout_ms = 50
+    try:
+        citations = tiny_corpus.retrieve("vesting", top_k=2)
+    finally:
+        release.set()
+    assert [c.doc_id for c in citations] == [1]
+    assert tiny_corpus._hybrid_counters["dense_timeouts"] == 1
+
+
+@pytest.mark.unit
+def test_thread_pools_survive_a_module_reload(rag_module):
+    reloaded = _load_rag_module()
+    assert reloaded is not rag_module
+    assert reloaded._get_shared_pool("rag-retrieval", 2) is rag_module._get_shared_pool("rag-retrieval", 2)
+
+
+@pytest.mark.unit
+def test_hybrid_keeps_the_first_leg_even_past_the_timeout(rag_module, tiny_corpus, tmp_path, monkeypatch):
+    vectors = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+    _with_dense_index(rag_module, tiny_corpus, vectors, [0.0, 0.0, 1.0], tmp_path)
+    release = threading.Event()
+    top_k_many = tiny_corpus._bm25_index.top_k_many
+
+    def slow_bm25(*args):
+        time.sleep(0.15)
+        return top_k_many(*args)
+
+    def stuck_query(text):
+        release.wait(5)
+        return [0.0, 0.0, 1.0]
+
+    monkeypatch.setattr(tiny_corpus._bm25_index, "top_k_many", slow_bm25)
+    tiny_corpus.embeddings = SimpleNamespace(embed_query=stuck_query)
+    tiny_corpus.hybrid_search = True
+    tiny_corpus.hybrid_leg_timeout_ms = 50
+    try:
+        citations = tiny_corpus.retrieve("vesting", top_k=2)
+    finally:
+        release.set()
+    # Both legs are past 50 ms, but the one that finished first is fused.
+    assert [c.doc_id for c in citations] == [1]
+    assert tiny_corpus._hybrid_counters["dense_timeouts"] == 1
+
+
 @pytest.mark.unit
 def test_rrf_score_non_increasing(tiny_corpus):
     citations = tiny_corpus.retrieve(
@@ -198,6 +795,347 @@ def test_rrf_score_non_increasing(tiny_corpus):
     assert relevances == sorted(relevances, reverse=True)
 
 
+# ── Async API ──────────────────────────────────────────────────────────────
+
+
+class _FakeAsyncChain:
+    """Stands in for ``prompt | chat_model``; records whether streams closed."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    async def ainvoke(self, inputs):
+        return SimpleNamespace(content="".join(self.chunks))
+
+    async def astream(self, inputs):
+        try:
+            for chunk in self.chunks:
+                yield SimpleNamespace(content=chunk)
+        finally:
+            self.closed = True
+
+
+@pytest.mark.unit
+def test_aquery_matches_query(tiny_corpus):
+    query = "What is the vesting schedule for founders?"
+    expected = tiny_corpus.query(query)
+    actual = asyncio.run(tiny_corpus.aquery(query))
+    assert actual.answer == expected.answer
+    assert actual.citations == expected.citations
+    assert asyncio.run(tiny_corpus.aretrieve(query, top_k=2)) == tiny_corpus.retrieve(query, top_k=2)
+
+
+@pytest.mark.unit
+def test_agenerate_answer_uses_async_chat_model(tiny_corpus, monkeypatch):
+    monkeypatch.setenv("RAG_VERIFY_CITATIONS", "false")
+    chain = _FakeAsyncChain(["Founders vest ", "over four years [1]."])
+    tiny_corpus.llm = object()
+    tiny_corpus.llm_type = "anthropic"
+    monkeypatch.setattr(tiny_corpus, "_chat_chain", lambda context: chain)
+    monkeypatch.setattr(tiny_corpus, "_assess_confidence", lambda query, citations: "high")
+
+    citations = tiny_corpus.retrieve("vesting schedule", top_k=2)
+    response = asyncio.run(tiny_corpus.agenerate_answer("vesting schedule", citations))
+    assert response.answer == "Founders vest over four years [1]."
+    assert response.model_used == "anthropic"
+
+
+@pytest.mark.unit
+def test_streamed_answers_fill_and_hit_the_answer_caches(rag_module, tiny_corpus, monkeypatch):
+    semantic_cache = rag_module._import_data_module("semantic_cache")
+    rag_cache = rag_module._import_data_module("rag_cache")
+    tiny_corpus._response_cache = rag_cache.ResponseCache()
+    tiny_corpus._semantic_cache = semantic_cache.SemanticCache(similarity_threshold=0.8)
+    chains = []
+
+    def stream_chain(context):
+        chains.append(_FakeAsyncChain(["Founders vest ", "over four years [9]."]))
+        return chains[-1]
+
+    async def verify(answer, citations):
+        return answer.replace("[9]", "[1]")
+
+    tiny_corpus.llm = object()
+    tiny_corpus.llm_type = "anthropic"
+    monkeypatch.setattr(tiny_corpus, "_chat_chain", stream_chain)
+    monkeypatch.setattr(tiny_corpus, "_averify_citations", verify)
+    monkeypatch.setattr(tiny_corpus, "_assess_confidence", lambda query, citations: "high")
+
+    async def collect(query):
+        return [event async for event in tiny_corpus.astream_query_events(query)]
+
+    first = asyncio.run(collect("What is the founder vesting schedule?"))
+    assert [kind for kind, _ in first] == ["citations", "token", "token", "correction"]
+
+    exact = asyncio.run(collect("what is the founder  vesting schedule?"))
+    paraphrase = asyncio.run(collect("founders vesting schedule, what is it"))
+    assert len(chains) == 1
+    for events in (exact, paraphrase):
+        assert [kind for kind, _ in events] == ["response"]
+        response = events[0][1]
+        assert response.served_from_cache and response.model_used == "anthropic"
+        assert response.answer == "Founders vest over four years [1]."
+    assert paraphrase[0][1].query == "founders vesting schedule, what is it"
+
+    # An abandoned stream is not cached.
+    async def abandon(query):
+        stream = tiny_corpus.astream_query_events(query)
+        async for kind, _ in stream:
+            if kind == "token":
+                break
+        await stream.aclose()
+
+    asyncio.run(abandon("What is Section 7 of the Companies Act, 2013?"))
+    asyncio.run(collect("What is Section 7 of the Companies Act, 2013?"))
+    assert len(chains) == 3
+
+
+class _FailingAsyncChain(_FakeAsyncChain):
+    """Streams its first chunk, then fails."""
+
+    invoked = False
+
+    async def ainvoke(self, inputs):
+        self.invoked = True
+        return await super().ainvoke(inputs)
+
+    async def astream(self, inputs):
+        yield SimpleNamespace(content=self.chunks[0])
+        raise RuntimeError("connection reset")
+
+
+@pytest.mark.unit
+def test_streams_cut_short_are_not_cached(rag_module, tiny_corpus, monkeypatch):
+    rag_cache = rag_module._import_data_module("rag_cache")
+    tiny_corpus._response_cache = rag_cache.ResponseCache()
+    monkeypatch.setattr(tiny_corpus, "_assess_confidence", lambda query, citations: "high")
+    query = "What is the founder vesting schedule?"
+    events = []
+
+    async def collect():
+        async for event in tiny_corpus.astream_query_events(query):
+            events.append(event)
+
+    # A chat model failing mid-answer stops with the error, without invoking again.
+    chain = _FailingAsyncChain(["Founders vest ", "over four years [1]."])
+    tiny_corpus.llm = object()
+    tiny_corpus.llm_type = "anthropic"
+    monkeypatch.setattr(tiny_corpus, "_chat_chain", lambda context: chain)
+    with pytest.raises(RuntimeError, match="connection reset"):
+        asyncio.run(collect())
+    assert [kind for kind, _ in events] == ["citations", "token"]
+    assert not chain.invoked
+    assert tiny_corpus._cached_answer(query, None)[1] is None
+
+    # A local answer stopped at its deadline is streamed but not cached.
+    def stream_generate(prompt, max_tokens, temperature, cancel=None, truncated=None):
+        yield "Founders vest "
+        truncated.set()
+
+    tiny_corpus.local_llm = SimpleNamespace(stream_generate=stream_generate)
+    events.clear()
+    asyncio.run(collect())
+    assert events[1:] == [("token", "Founders vest ")]
+    assert tiny_corpus._cached_answer(query, None)[1] is None
+
+
+@pytest.mark.unit
+def test_astream_answer_closes_provider_stream_when_abandoned(tiny_corpus, monkeypatch):
+    chain = _FakeAsyncChain(["one ", "two ", "three"])
+    tiny_corpus.llm = object()
+    monkeypatch.setattr(tiny_corpus, "_chat_chain", lambda context: chain)
+    monkeypatch.setattr(tiny_corpus, "_assess_confidence", lambda query, citations: "high")
+    citations = tiny_corpus.retrieve("vesting schedule", top_k=2)
+
+    async def consume(limit):
+        tokens = []
+        stream = tiny_corpus.astream_answer("vesting schedule", citations)
+        async for token in stream:
+            tokens.append(token)
+            if len(tokens) == limit:
+                break
+        await stream.aclose()
+        return tokens
+
+    assert asyncio.run(consume(10)) == ["one ", "two ", "three"]
+    chain.closed = False
+    assert asyncio.run(consume(1)) == ["one "]
+    assert chain.closed
+
+
+@pytest.mark.unit
+def test_astream_answer_events_end_with_verification_correction(tiny_corpus, monkeypatch):
+    chain = _FakeAsyncChain(["Founders vest ", "over four years [9]."])
+    tiny_corpus.llm = object()
+    tiny_corpus.llm_type = "openai"
+    monkeypatch.setattr(tiny_corpus, "_chat_chain", lambda context: chain)
+    monkeypatch.setattr(tiny_corpus, "_assess_confidence", lambda query, citations: "high")
+
+    async def verify(answer, citations):
+        return answer.replace("[9]", "[1]")
+
+    monkeypatch.setattr(tiny_corpus, "_averify_citations", verify)
+    citations = tiny_corpus.retrieve("vesting schedule", top_k=2)
+
+    async def collect():
+        return [event async for event in tiny_corpus.astream_answer_events("vesting schedule", citations)]
+
+    assert tiny_corpus.streaming_model(citations, "high") == "openai"
+    assert asyncio.run(collect()) == [
+        ("token", "Founders vest "),
+        ("token", "over four years [9]."),
+        ("correction", "Founders vest over four years [1]."),
+    ]
+
+
+@pytest.mark.unit
+def test_astream_answer_streams_local_llm_from_a_worker_thread(tiny_corpus, monkeypatch):
+    caller = threading.get_ident()
+    threads = []
+
+    def stream_generate(prompt, max_tokens, temperature, cancel=None, truncated=None):
+        threads.append(threading.get_ident())
+        yield from ["Section ", "7 ", "applies."]
+
+    tiny_corpus.local_llm = SimpleNamespace(stream_generate=stream_generate)
+    monkeypatch.setattr(tiny_corpus, "_assess_confidence", lambda query, citations: "high")
+    citations = tiny_corpus.retrieve("vesting schedule", top_k=2)
+
+    async def collect():
+        return [token async for token in tiny_corpus.astream_answer("vesting schedule", citations)]
+
+    assert asyncio.run(collect()) == ["Section ", "7 ", "applies."]
+    assert threads and threads[0] != caller
+    assert tiny_corpus.streaming_model(citations, "high") == "local_legal_llama"
+    assert list(tiny_corpus.stream_answer("vesting schedule", citations)) == ["Section ", "7 ", "applies."]
+
+
+# ── Prompt assembly ────────────────────────────────────────────────────────
+
+
+@pytest.mark.unit
+def test_prompts_start_with_the_fixed_cacheable_prefix(rag_module, tiny_corpus):
+    citations = tiny_corpus.retrieve("vesting schedule", top_k=2)
+    context = tiny_corpus._citation_context(citations)
+
+    first = tiny_corpus._build_legal_prompt("vesting schedule", context)
+    second = tiny_corpus._build_legal_prompt("Section 27 {restraint}", "[1] {other}")
+    assert first.startswith(rag_module.LOCAL_PROMPT_PREFIX)
+    assert second.startswith(rag_module.LOCAL_PROMPT_PREFIX)
+    assert first[len(rag_module.LOCAL_PROMPT_PREFIX):] == tiny_corpus._local_prompt_suffix("vesting schedule", context)
+    assert first.endswith("USER QUESTION: vesting schedule\n\nANSWER:")
+
+
+@pytest.mark.unit
+def test_answer_context_is_packed_with_stable_citation_numbers(tiny_corpus):
+    citations = tiny_corpus.retrieve("vesting schedule founders equity", top_k=3)
+
+    packed = tiny_corpus._answer_context("vesting schedule", citations)
+    assert [line.split("]")[0] + "]" for line in packed.splitlines() if line.startswith("[")] == [
+        f"[{i}]" for i in range(1, len(citations) + 1)
+    ]
+    assert "vest over four years" in packed
+
+    tiny_corpus.context_token_budget = 0
+    assert tiny_corpus._answer_context("vesting schedule", citations) == tiny_corpus._citation_context(citations)
+
+
+@pytest.mark.unit
+def test_answer_context_is_packed_off_the_event_loop_without_loading_the_model(tiny_corpus, monkeypatch):
+    caller = threading.get_ident()
+    counted = []
+
+    def count_tokens(text):
+        counted.append(threading.get_ident())
+        return len(text.split())
+
+    local = SimpleNamespace(is_loaded=False, count_tokens=count_tokens)
+    tiny_corpus.local_llm = local
+    monkeypatch.setattr(tiny_corpus, "_assess_confidence", lambda query, citations: "high")
+    monkeypatch.setattr(tiny_corpus, "_generate_local", lambda *args: None)
+    citations = tiny_corpus.retrieve("vesting schedule", top_k=2)
+
+    tiny_corpus._answer_context("vesting schedule", citations)
+    assert counted == []  # the model is not loaded just to count tokens
+
+    local.is_loaded = True
+    asyncio.run(tiny_corpus.agenerate_answer("vesting schedule", citations))
+    assert counted and caller not in counted
+
+
+@pytest.mark.unit
+def test_chat_prompt_marks_instructions_for_anthropic_prompt_caching(tiny_corpus):
+    pytest.importorskip("langchain_core")
+    tiny_corpus.llm_type = "anthropic"
+    messages = tiny_corpus._chat_prompt("[1] Source {with braces}").format_messages(query="What vests?")
+
+    instructions, sources = messages[0].content
+    assert instructions["cache_control"] == {"type": "ephemeral"}
+    assert "{with braces}" in sources["text"]
+    assert messages[1].content == "What vests?"
+
+    tiny_corpus.llm_type = "openai"
+    assert "cache_control" not in tiny_corpus._chat_prompt("[1] x").format_messages(query="q")[0].content[0]
+
+
+# ── Citation verification ──────────────────────────────────────────────────
+
+
+class _FakeAnthropic:
+    """Records ``messages.create`` calls; replies with ``reply``."""
+
+    def __init__(self, reply):
+        self.requests = []
+        self.messages = SimpleNamespace(create=self._create)
+        self.reply = reply
+
+    def _create(self, **request):
+        self.requests.append(request)
+        return SimpleNamespace(stop_reason="end_turn", content=[SimpleNamespace(type="text", text=self.reply)])
+
+
+@pytest.mark.unit
+def test_verify_citations_settles_clear_cases_locally(tiny_corpus, monkeypatch):
+    client = _FakeAnthropic("[]")
+    monkeypatch.setitem(sys.modules, "anthropic", SimpleNamespace(Anthropic=lambda **kwargs: client))
+    citations = tiny_corpus.retrieve("vesting schedule founders equity", top_k=3)
+    vesting = next(i for i, c in enumerate(citations, 1) if "Vesting" in c.title)
+    wrong = 1 if vesting != 1 else 2
+
+    answer = f"The founders' equity vests over four years with a one-year cliff [{wrong}]."
+    verified = tiny_corpus._verify_citations(answer, citations)
+
+    assert verified == f"The founders' equity vests over four years with a one-year cliff [{vesting}]."
+    assert client.requests == []
+    assert tiny_corpus.get_corpus_stats().cache_stats["verify_reassigned"] == 1
+
+
+@pytest.mark.unit
+def test_verify_citations_batches_ambiguous_sentences_remotely(tiny_corpus, monkeypatch):
+    client = _FakeAnthropic('["Equity may also vest on an acquisition."]')
+    monkeypatch.setitem(sys.modules, "anthropic", SimpleNamespace(Anthropic=lambda **kwargs: client))
+    citations = tiny_corpus.retrieve("vesting schedule founders equity", top_k=3)
+    vesting = next(i for i, c in enumerate(citations, 1) if "Vesting" in c.title)
+
+    answer = (
+        f"The founders' equity vests over four years with a one-year cliff [{vesting}]. "
+        f"Founders' equity vesting accelerates fully on an acquisition [{vesting}]."
+    )
+    verified = tiny_corpus._verify_citations(answer, citations)
+
+    assert len(client.requests) == 1
+    assert "accelerates" in client.requests[0]["messages"][0]["content"]
+    assert verified == (
+        f"The founders' equity vests over four years with a one-year cliff [{vesting}]. "
+        "Equity may also vest on an acquisition."
+    )
+
+    monkeypatch.setenv("RAG_VERIFY_REMOTE", "false")
+    assert tiny_corpus._verify_citations(answer, citations) == answer
+    assert len(client.requests) == 1
+
+
 # ── Confidence scoring ─────────────────────────────────────────────────────
 
 
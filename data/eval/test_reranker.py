@@ -0,0 +1,81 @@
+"""Unit tests for the production cross-encoder reranker (reranker.py).
+
+A fake model stands in for the cross-encoder so the tests run without
+sentence-transformers or any model download.
+"""
+from __future__ import annotations
+
+import importlib.util
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+DATA_DIR = Path(__file__).resolve().parent.parent
+RERANKER_PATH = DATA_DIR / "reranker.py"
+
+
+@pytest.fixture(scope="module")
+def reranker_module():
+    spec = importlib.util.spec_from_file_location("reranker_under_test", RERANKER_PATH)
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _tokenize(text: str):
+    return [token for token in text.lower().split() if len(token) > 2]
+
+
+class _FakeCrossEncoder:
+    """Scores a pair by how often "vesting" occurs in the passage."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.pairs = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        time.sleep(self.delay)
+        self.pairs.extend(pairs)
+        return [passage.count("vesting") for _, passage in pairs]
+
+
+def _doc(key, content):
+    return SimpleNamespace(key=key, content=content)
+
+
+@pytest.mark.unit
+def test_best_window_prefers_matching_span_over_head(reranker_module):
+    text = " ".join(["preamble"] * 300 + ["equity", "vesting", "cliff"] + ["tail"] * 300)
+    window = reranker_module.best_window(text, {"vesting", "cliff"}, _tokenize, 50)
+    assert "vesting cliff" in window
+    assert len(window.split()) == 50
+    assert reranker_module.best_window("short text", {"vesting"}, _tokenize, 50) == "short text"
+
+
+@pytest.mark.unit
+def test_scores_are_cached_per_query_and_document(reranker_module):
+    model = _FakeCrossEncoder()
+    reranker = reranker_module.CrossEncoderReranker(model, _tokenize, passage_words=20, batch_size=2)
+    docs = [_doc(0, "no match here"), _doc(1, "vesting vesting schedule"), _doc(2, "vesting")]
+
+    assert reranker.score("equity vesting", docs) == [0.0, 2.0, 1.0]
+    assert len(model.pairs) == 3
+    assert reranker.score("equity vesting", docs[1:]) == [2.0, 1.0]
+    assert len(model.pairs) == 3
+    reranker.score("another query", docs[:1])
+    assert reranker.stats() == {"hits": 2, "scored": 4, "over_budget": 0, "entries": 4}
+
+
+@pytest.mark.unit
+def test_latency_budget_falls_back(reranker_module):
+    model = _FakeCrossEncoder(delay=0.05)
+    reranker = reranker_module.CrossEncoderReranker(model, _tokenize, budget_ms=30, batch_size=1)
+    docs = [_doc(idx, "vesting") for idx in range(4)]
+
+    # The first batch overruns the budget; the next one is not started.
+    assert reranker.score("vesting", docs) is None
+    assert len(model.pairs) == 1
+    assert reranker.stats()["over_budget"] == 1
@@ -0,0 +1,62 @@
+"""Unit tests for the semantic near-duplicate answer cache (semantic_cache.py)."""
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+DATA_DIR = Path(__file__).resolve().parent.parent
+CACHE_PATH = DATA_DIR / "semantic_cache.py"
+
+
+@pytest.fixture(scope="module")
+def cache_module():
+    pytest.importorskip("numpy")
+    spec = importlib.util.spec_from_file_location("semantic_cache_under_test", CACHE_PATH)
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.unit
+def test_lookup_requires_similarity_overlap_and_guard(cache_module):
+    cache = cache_module.SemanticCache(similarity_threshold=0.9, min_citation_overlap=0.5)
+    cache.add([1.0, 0.0, 0.0], ["a", "b"], "answer", guard=["27"])
+
+    assert cache.lookup([0.99, 0.05, 0.0], ["a", "b", "c"], guard=["27"]) == "answer"
+    assert cache.lookup([0.5, 0.5, 0.0], ["a", "b"], guard=["27"]) is None
+    assert cache.lookup([1.0, 0.0, 0.0], ["c", "d"], guard=["27"]) is None
+    assert cache.lookup([1.0, 0.0, 0.0], ["a", "b"], guard=["28"]) is None
+    assert cache.stats() == {"hits": 1, "misses": 3, "stores": 1, "entries": 1}
+
+
+@pytest.mark.unit
+def test_ring_buffer_overwrites_oldest_and_expires(cache_module, monkeypatch):
+    cache = cache_module.SemanticCache(max_entries=2, ttl_seconds=10)
+    cache.add([1.0, 0.0], [], "first")
+    cache.add([0.0, 1.0], [], "second")
+    cache.add([0.7, 0.7], [], "third")
+    assert cache.lookup([1.0, 0.0], []) is None
+    assert cache.lookup([0.0, 1.0], []) == "second"
+
+    now = cache_module.time.time()
+    monkeypatch.setattr(cache_module.time, "time", lambda: now + 11)
+    assert cache.lookup([0.0, 1.0], []) is None
+
+    smallest = cache_module.SemanticCache(max_entries=0)
+    smallest.add([1.0, 0.0], [], "only")
+    assert smallest.lookup([1.0, 0.0], []) == "only"
+
+
+@pytest.mark.unit
+def test_hashed_ngram_vector_relates_word_forms(cache_module):
+    def cosine(left, right):
+        a = cache_module.hashed_ngram_vector(left)
+        b = cache_module.hashed_ngram_vector(right)
+        return float(a @ b / (cache_module.np.linalg.norm(a) * cache_module.np.linalg.norm(b)))
+
+    assert cosine(["company", "registration"], ["companies", "register"]) > cosine(
+        ["company", "registration"], ["trademark", "opposition"]
+    )
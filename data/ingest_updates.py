@@ -14,8 +14,9 @@ overwrite real data with demo content.
 Usage:
     INDIAN_KANOON_API_KEY=... python data/ingest_updates.py [--per-topic 5]
 
-After ingesting, restart the backend (or call the admin reload endpoint,
-``POST /api/admin/reload-corpus``) so the BM25 index is rebuilt.
+After ingesting, call the admin reload endpoint (``POST
+/api/admin/reload-corpus``): only the new or changed judgments are added to
+the running index (``JurisGPTRAG.refresh_corpus``), no full rebuild needed.
 """
 from __future__ import annotations
 
@@ -119,7 +120,7 @@ def main() -> None:
 
     OUT_PATH.write_text(json.dumps(records, indent=2, ensure_ascii=False))
     print(f"Ingested {added} new judgments ({len(records)} total) -> {OUT_PATH}")
-    print("Restart the backend or POST /api/admin/reload-corpus to index them.")
+    print("POST /api/admin/reload-corpus to index them (applied incrementally).")
 
 
 if __name__ == "__main__":
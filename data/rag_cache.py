@@ -0,0 +1,169 @@
+"""
+Two-tier cache for JurisGPTRAG retrieval results and answers.
+
+Repeated questions otherwise take the full retrieve → generate →
+``_verify_citations`` path, including two paid LLM round-trips. Entries are
+JSON values keyed on the normalized query, top_k, retrieval config and the
+corpus version id (see ``make_cache_key``), and live in:
+
+- an in-process LRU with a per-entry TTL, and
+- optionally a SQLite file (``RAG_CACHE_SQLITE_PATH``) that survives
+  restarts and is shared by every uvicorn worker on the host.
+
+Cache failures are never fatal: a broken SQLite file is logged and the
+lookup counts as a miss.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query for cache keys."""
+    return " ".join(query.lower().split())
+
+
+def make_cache_key(kind: str, query: str, top_k: int, config: Dict[str, Any], corpus_version: str) -> str:
+    """Stable key for one cached ``kind`` ("retrieve", "answer", ...) result."""
+    payload = json.dumps(
+        {
+            "kind": kind,
+            "query": normalize_query(query),
+            "top_k": top_k,
+            "config": config,
+            "corpus_version": corpus_version,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """In-memory LRU+TTL tier in front of an optional SQLite tier."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0,
+        sqlite_path: Optional[Path] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+        self._db: Optional[sqlite3.Connection] = None
+        if sqlite_path:
+            self._open_sqlite(Path(sqlite_path))
+
+    def _open_sqlite(self, path: Path):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(path), timeout=5.0, check_same_thread=False)
+            # WAL lets several worker processes read while one writes.
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS rag_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            db.execute("DELETE FROM rag_cache WHERE expires_at < ?", (time.time(),))
+            db.commit()
+            self._db = db
+        except sqlite3.Error as exc:
+            logger.warning("SQLite response cache unavailable at %s: %s", path, exc)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for ``key``, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return entry[1]
+                del self._entries[key]
+
+            value = self._get_from_disk(key, now)
+            if value is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._remember(key, value, now + self.ttl_seconds)
+            return value
+
+    def set(self, key: str, value: Any):
+        """Store a JSON-serializable ``value`` in every tier."""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self._counters["stores"] += 1
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO rag_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at),
+                )
+                self._db.commit()
+            except (sqlite3.Error, TypeError, ValueError) as exc:
+                logger.warning("Could not write response cache entry: %s", exc)
+
+    def clear_memory(self):
+        """Drop the in-process entries only.
+
+        SQLite rows are shared with other workers and with the pipeline that
+        replaced this one; keys include the corpus version, so stale rows
+        are never served and simply expire by TTL.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def clear(self):
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is None:
+                return
+            try:
+                self._db.execute("DELETE FROM rag_cache")
+                self._db.commit()
+            except sqlite3.Error as exc:
+                logger.warning("Could not clear response cache: %s", exc)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries)}
+
+    def _remember(self, key: str, value: Any, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _get_from_disk(self, key: str, now: float) -> Optional[Any]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM rag_cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as exc:
+            logger.warning("Could not read response cache: %s", exc)
+            return None
+        if row is None or row[1] <= now:
+            return None
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return None
@@ -15,19 +15,28 @@ Supports:
 - Query preprocessing with legal term expansion
 """
 
+import asyncio
+import contextvars
+import hashlib
 import json
 import logging
 import os
 import re
 import importlib.util
 import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from contextlib import aclosing
+from functools import lru_cache, partial
 from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv(Path(__file__).parent / ".env")
-from typing import List, Dict, Any, Optional, Iterator
-from dataclasses import dataclass, field
+from typing import List, Dict, Any, AsyncIterator, Callable, Hashable, Optional, Iterable, Iterator, Sequence, Tuple, Union
+from dataclasses import asdict, dataclass, field, replace
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +45,19 @@ VECTORS_DIR = BASE_DIR / "vectors"
 PROCESSED_DIR = BASE_DIR / "processed"
 SAMPLES_DIR = BASE_DIR / "datasets" / "samples"
 CLOUD_CACHE_DIR = BASE_DIR / "cloud_cache"
+CORPUS_SNAPSHOT_DIR = Path(os.getenv("RAG_CORPUS_SNAPSHOT_DIR", str(PROCESSED_DIR / "corpus_snapshot")))
+# Doc-id-aligned dense indexes (dense_index.py), one subdirectory per model
+DENSE_INDEX_DIR = Path(os.getenv("RAG_DENSE_INDEX_DIR", str(VECTORS_DIR / "dense")))
+# Cold-start parallelism when the corpus is built from JSON (corpus_loader.py):
+# threads for reading sources, forked processes for tokenization (only while
+# the process is single-threaded, i.e. a cold start on the main thread).
+CORPUS_LOAD_WORKERS = int(os.getenv("RAG_LOAD_WORKERS", "0")) or min(8, os.cpu_count() or 1)
+CORPUS_TOKENIZE_CHUNK_SIZE = int(os.getenv("RAG_TOKENIZE_CHUNK_SIZE", "2000"))
+# Hybrid BM25 + dense retrieval: threads running the two legs of a query
+HYBRID_WORKERS = int(os.getenv("RAG_HYBRID_WORKERS", "0")) or min(8, 2 * (os.cpu_count() or 1))
+# Async API (aretrieve / aquery): threads running retrieval off the event loop
+RETRIEVAL_WORKERS = int(os.getenv("RAG_RETRIEVAL_WORKERS", "0")) or min(8, os.cpu_count() or 1)
+# Both pools are shared by every pipeline in the process, across reloads (thread_pools.py)
 
 # Obsidian integration
 OBSIDIAN_ENABLED = os.getenv("OBSIDIAN_ENABLED", "true").lower() == "true"
@@ -71,6 +93,41 @@ CURATED_SAMPLE_FILES = [
     "ingested_judgments.json",
 ]
 
+# Sources ``refresh_corpus`` re-reads and applies as a delta (added / removed
+# documents) instead of rebuilding the whole index; a change to any other
+# corpus file still needs a full reload.
+INCREMENTAL_SOURCES = ("ingested_judgments.json", "obsidian")
+
+def _get_shared_pool(name: str, max_workers: int) -> ThreadPoolExecutor:
+    """The process-wide thread pool ``name``, created on first use."""
+    return _import_data_module("thread_pools").shared_pool(name, max_workers)
+
+
+def _import_data_module(module_name: str):
+    """Import a helper module that lives next to this file.
+
+    The backend loads this file with ``spec_from_file_location`` and keeps
+    ``data/`` off ``sys.path``, so sibling modules are imported with the
+    directory added only for the duration of the import.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    import importlib
+
+    added_base_dir = False
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+        added_base_dir = True
+    try:
+        return importlib.import_module(module_name)
+    finally:
+        if added_base_dir:
+            try:
+                sys.path.remove(str(BASE_DIR))
+            except ValueError:
+                pass
+
+
 DEFAULT_CLOUD_CORPUS_FILES = [
     f"datasets/samples/{filename}" for filename in CURATED_SAMPLE_FILES
 ]
@@ -79,6 +136,8 @@ LOCAL_STOPWORDS = {
     "i", "in", "is", "it", "of", "on", "or", "that", "the", "their", "this",
     "to", "under", "what", "when", "where", "which", "who", "with", "your",
 }
+# Loose (substring) token matches only count between tokens this long.
+LOOSE_MATCH_MIN_LENGTH = 5
 
 # ── Legal Term Expansion Dictionary (Phase 4.4) ─────────────────────
 LEGAL_ABBREVIATIONS: Dict[str, str] = {
@@ -122,19 +181,178 @@ SECTION_REF_RE = re.compile(
     r"\bsec(?:tion)?\.?\s*(\d+[a-z]?)\b", re.IGNORECASE
 )
 
+# ── Single-pass query rewrite ────────────────────────────────────────
+# Section references and every abbreviation in one alternation, compiled
+# once. Longer abbreviations come first so "cgst" / "nclat" win over "gst" /
+# "nclt" at the same position.
+QUERY_REWRITE_RE = re.compile(
+    r"(?P<section>" + SECTION_REF_RE.pattern + r")"
+    + r"|\b(?P<abbr>"
+    + "|".join(re.escape(abbr) for abbr in sorted(LEGAL_ABBREVIATIONS, key=len, reverse=True))
+    + r")\b",
+    re.IGNORECASE,
+)
+TOKEN_RE = re.compile(r"[^\W_]+")
+QUERY_ANALYSIS_CACHE_SIZE = int(os.getenv("RAG_QUERY_CACHE_SIZE", "1024"))
+
+# Answer prompts are a fixed prefix (the instructions below) followed by a
+# per-request suffix (sources, then the question). The prefix never varies,
+# so providers can cache it (Anthropic ``cache_control``, OpenAI automatic
+# prefix caching) and the local model reuses its tokens; anything that
+# varies per request must go in the suffix.
+LEGAL_RULES = """CRITICAL RULES:
+1. ONLY answer based on the provided citations. Do not use external knowledge.
+   If the citations do not state something, do not claim it — even if you know
+   it is true in Indian law. Say "the provided corpus does not cover this"
+   for that part instead.
+2. ALWAYS cite your sources using [1], [2], etc. format in your answer.
+   Attach [i] only to statements that citation i actually contains — never to
+   related or adjacent points it does not state. An uncited true statement is
+   better than a falsely cited one; a declined answer is better than both.
+3. If the citations don't contain relevant information, say so explicitly.
+4. Never invent or hallucinate legal information.
+5. Be precise about legal terminology, sections, and acts.
+"""
+
+# System prompt for Anthropic / OpenAI (the sources follow in a second block).
+CHAT_SYSTEM_PROMPT = f"""You are JurisGPT, a citation-grounded legal research assistant specializing in Indian law for startups and corporate matters.
+
+{LEGAL_RULES}6. Structure your answer clearly with headings when appropriate.
+7. Provide practical, actionable advice when the question warrants it.
+8. Reference specific sections, acts, and legal provisions from the citations.
+"""
+
+# Prompt prefix for the local Legal Llama (completion-style prompt).
+LOCAL_PROMPT_PREFIX = f"""You are JurisGPT, a citation-grounded legal research assistant specializing in Indian law for startups and corporate matters.
+
+{LEGAL_RULES}
+YOUR ROLE:
+- Answer legal research questions using the provided context
+- Cite specific statutes, sections, and case law from the context
+- Explain legal concepts clearly for non-lawyers
+- Highlight important caveats and when professional advice is needed
+
+RESPONSE FORMAT:
+- Start with a direct answer to the question
+- Reference citations inline using [1], [2], etc.
+- Mention specific acts, sections, and legal provisions
+- Use clear formatting with bullet points where appropriate
+- Keep responses focused and concise
+
+DO NOT:
+- Draft legal documents (this is a separate workflow)
+- Provide advice that requires knowing specific case facts
+- Make up legal provisions not in the citations
+- Give definitive legal advice on complex matters
+
+"""
+
+
+CITATION_FIELDS = ("title", "content", "doc_type", "source", "relevance", "section", "act", "url", "metadata")
+
+
+def _record_field(name: str, required: bool = False):
+    if required:
+        return property(lambda self: self._fields()[name])
+    if name == "metadata":
+        return property(lambda self: self._fields().get(name) or {})
+    return property(lambda self: self._fields().get(name))
+
 
-@dataclass
 class Citation:
-    """A citation from the legal corpus"""
-    title: str
-    content: str
-    doc_type: str
-    source: str
-    relevance: float
-    section: Optional[str] = None
-    act: Optional[str] = None
-    url: Optional[str] = None
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    """A citation from the legal corpus.
+
+    Hits on the local corpus (``Citation.from_corpus``) hold only the
+    document id, the score and a reference to the corpus; title, content and
+    metadata are read from the corpus record on first access, so ranking,
+    fusion and re-scoring never copy a judgment's text. Citations built from
+    keyword arguments (vector-store hits, cached entries) carry their own
+    record. ``to_dict`` includes ``doc_id``, so a citation restored from
+    the response cache keeps the same ``key`` as a fresh retrieval of the
+    same document.
+    """
+
+    __slots__ = ("doc_id", "relevance", "_corpus", "_record")
+
+    def __init__(
+        self,
+        title: str,
+        content: str,
+        doc_type: str,
+        source: str,
+        relevance: float,
+        section: Optional[str] = None,
+        act: Optional[str] = None,
+        url: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        doc_id: Optional[int] = None,
+    ):
+        self.doc_id = doc_id
+        self.relevance = relevance
+        self._corpus = None
+        self._record = {
+            "title": title,
+            "content": content,
+            "doc_type": doc_type,
+            "source": source,
+            "section": section,
+            "act": act,
+            "url": url,
+            "metadata": {} if metadata is None else metadata,
+        }
+
+    @classmethod
+    def from_corpus(cls, corpus: Sequence[Dict[str, Any]], doc_id: int, relevance: float) -> "Citation":
+        citation = cls.__new__(cls)
+        citation.doc_id = doc_id
+        citation.relevance = relevance
+        citation._corpus = corpus
+        citation._record = None
+        return citation
+
+    def _fields(self) -> Dict[str, Any]:
+        record = self._record
+        if record is None:
+            record = self._record = self._corpus[self.doc_id]
+        return record
+
+    title = _record_field("title", required=True)
+    content = _record_field("content", required=True)
+    doc_type = _record_field("doc_type", required=True)
+    source = _record_field("source", required=True)
+    section = _record_field("section")
+    act = _record_field("act")
+    url = _record_field("url")
+    metadata = _record_field("metadata")
+
+    @property
+    def key(self) -> Hashable:
+        """Identity for fusion and cache matching: the corpus doc id when known."""
+        if self.doc_id is not None:
+            return self.doc_id
+        return (self.title, self.source, self.section)
+
+    def with_relevance(self, relevance: float) -> "Citation":
+        """The same document with another score; the record is shared, not copied."""
+        citation = Citation.__new__(Citation)
+        citation.doc_id = self.doc_id
+        citation.relevance = relevance
+        citation._corpus = self._corpus
+        citation._record = self._record
+        return citation
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**{name: getattr(self, name) for name in CITATION_FIELDS}, "doc_id": self.doc_id}
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Citation):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Citation(doc_id={self.doc_id!r}, title={self.title!r}, relevance={self.relevance!r})"
 
 
 @dataclass(frozen=True)
@@ -145,6 +363,19 @@ class CorpusStats:
     by_doc_type: Dict[str, int]
     loaded_files: List[str]
     cloud_error: Optional[str] = None
+    # Retrieval / answer cache counters (rag_cache.ResponseCache.stats)
+    cache_stats: Dict[str, int] = field(default_factory=dict)
+    # Seconds spent per corpus source at startup, plus "tokenize" for the
+    # index build ("snapshot" when the corpus was memory-mapped)
+    load_timings: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class QueryAnalysis:
+    """A query after preprocessing, shared by every retrieval path."""
+    query: str
+    processed_query: str
+    tokens: Tuple[str, ...]
 
 
 @dataclass
@@ -158,6 +389,7 @@ class RAGResponse:
     query: str
     model_used: str
     grounded: bool  # Whether the answer is fully supported by citations
+    served_from_cache: bool = False  # Reused from the exact or semantic answer cache
 
 
 class JurisGPTRAG:
@@ -180,6 +412,8 @@ class JurisGPTRAG:
         top_k: int = 0,
         use_reranker: bool = False,
         hybrid_search: bool = False,
+        progress: Optional[Callable[[str], None]] = None,
+        provider_clients: Optional[Any] = None,
     ):
         self.vector_store_type = vector_store_type
         self.embedding_type = embedding_type
@@ -190,6 +424,8 @@ class JurisGPTRAG:
 
         self.bm25_weight = float(os.getenv("RAG_BM25_WEIGHT", "0.4"))
         self.semantic_weight = float(os.getenv("RAG_SEMANTIC_WEIGHT", "0.6"))
+        # Hybrid legs that take longer are dropped from the fusion (0 = wait)
+        self.hybrid_leg_timeout_ms = float(os.getenv("RAG_HYBRID_LEG_TIMEOUT_MS", "500"))
         self.rerank_top_n = int(os.getenv("RAG_RERANK_TOP_N", "20"))
         self.relevance_threshold = float(os.getenv("RAG_RELEVANCE_THRESHOLD", "0.65"))
         self.high_confidence_threshold = float(os.getenv("RAG_HIGH_CONFIDENCE_THRESHOLD", "0.80"))
@@ -205,14 +441,59 @@ class JurisGPTRAG:
         self.corpus_as_of: Optional[str] = None  # newest source-file date, "YYYY-MM-DD"
         self.corpus_error: Optional[str] = None
         self.loaded_corpus_files: List[str] = []
-
-        # BM25 index (built lazily from local corpus)
+        self.corpus_load_timings: Dict[str, float] = {}
+
+        # Incremental updates (add_documents / remove_documents /
+        # refresh_corpus). Removed documents keep their id (and record) but
+        # leave the indexes; ids are only renumbered by a full rebuild.
+        self._update_lock = threading.RLock()
+        self._removed_doc_ids: set = set()
+        self._corpus_revision = 0
+        self._incremental_ranges: Optional[Dict[str, List[int]]] = None
+        self._incremental_docs: Optional[Dict[str, Dict[str, List[int]]]] = None
+        self._static_fingerprint: Optional[Dict[str, Any]] = None
+
+        # BM25 index (sparse-matrix engine from bm25_index.py, built from
+        # the local corpus or memory-mapped from a corpus snapshot). Title
+        # postings share its vocabulary.
         self._bm25_index = None
-        self._bm25_corpus_tokens: List[List[str]] = []
+        self._title_index = None
+        self._loose_match_index = None
+        self._corpus_snapshot = None
+
+        # Dense index over the same doc ids (vector_store_type="dense"),
+        # run concurrently with BM25 when hybrid_search is on
+        self._dense_index = None
+        self._hybrid_lock = threading.Lock()
+        self._hybrid_counters = {"queries": 0, "bm25_timeouts": 0, "dense_timeouts": 0, "errors": 0}
+
+        # Local citation check ahead of the remote verifier (created lazily)
+        self._verifier = None
+
+        # Prompt sources are packed to this many tokens (0: whole contents)
+        self.context_token_budget = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "3000"))
+        self._context_packer = None
+        self._approx_token_count = None
 
         # Cross-encoder re-ranker (loaded lazily)
         self._reranker = None
 
+        # Retrieval / answer cache (rag_cache.py). Keys include
+        # corpus_version, so a rebuilt corpus never serves old entries.
+        self.corpus_version = ""
+        self._response_cache = self._create_response_cache()
+        self._semantic_cache = self._create_semantic_cache()
+
+        # Called with the name of each startup phase ("embeddings", "corpus",
+        # "index", "llm"), e.g. for the admin reload-status endpoint.
+        self._progress = progress
+
+        # Pooled provider SDK / HTTP clients (the backend's ProviderClients
+        # registry). Without one, the citation verifier's SDK clients are
+        # created once per pipeline.
+        self.provider_clients = provider_clients
+        self._anthropic_clients: Dict[bool, Any] = {}
+
         self._initialize()
 
     # ─── Initialization ──────────────────────────────────────────────
@@ -223,6 +504,7 @@ class JurisGPTRAG:
 
         vector_ready = False
         if self.vector_store_type != "lexical":
+            self._report_progress("embeddings")
             try:
                 self._init_embeddings()
                 if self.embeddings:
@@ -232,86 +514,68 @@ class JurisGPTRAG:
                 logger.warning("Vector retrieval unavailable: %s", e)
 
         if not vector_ready:
+            self._report_progress("corpus")
             self._init_local_corpus()
             self.vector_store = "lexical"
             logger.info("Using local lexical corpus (%d documents)", len(self.local_corpus))
 
-        # Always build the inverted index for fast lexical scan, and BM25
-        # whenever rank-bm25 is available (cheap to build, makes hybrid free).
-        if self.local_corpus:
+        # Always build the postings for fast lexical scan, and BM25
+        # whenever NumPy is available (cheap to build, makes hybrid free).
+        # A corpus snapshot arrives with both already built.
+        if self.local_corpus and self._bm25_index is None:
+            self._report_progress("index")
             self._build_bm25_index()
 
         # Initialize LLM
+        self._report_progress("llm")
         self._init_llm()
 
+        self.corpus_version = self._compute_corpus_version()
         logger.info("RAG Pipeline initialized!")
 
+    def _report_progress(self, phase: str):
+        if self._progress is not None:
+            self._progress(phase)
+
     def _init_embeddings(self):
-        """Initialize embedding model — prefer InLegalBERT, fall back to MiniLM."""
+        """Initialize embedding model — prefer InLegalBERT, fall back to MiniLM.
+
+        Both run through embedding_service.py (float32 NumPy outputs, LRU of
+        query embeddings, RAG_EMBEDDING_RUNTIME torch / int8 / ONNX).
+        """
         embedding_model = os.getenv("EMBEDDING_MODEL", "law-ai/InLegalBERT")
         fallback_model = os.getenv("EMBEDDING_FALLBACK", "sentence-transformers/all-MiniLM-L6-v2")
+        embedding_service = _import_data_module("embedding_service")
+        embedding_service.configure_torch_threads(int(os.getenv("RAG_TORCH_THREADS", "0")))
+        runtime = os.getenv("RAG_EMBEDDING_RUNTIME", "torch")
+        service_kwargs = {
+            "cache_size": int(os.getenv("RAG_EMBEDDING_CACHE_SIZE", "2048")),
+            "batch_size": int(os.getenv("RAG_EMBEDDING_BATCH_SIZE", "32")),
+        }
 
         # Try InLegalBERT first
         if embedding_model == "law-ai/InLegalBERT":
             try:
-                from transformers import AutoTokenizer, AutoModel
-                import torch
-
-                class InLegalBERTEmbeddings:
-                    """Wrapper for law-ai/InLegalBERT embeddings."""
-                    def __init__(self, model_name: str = "law-ai/InLegalBERT"):
-                        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-                        self.model = AutoModel.from_pretrained(model_name)
-                        self.model.eval()
-
-                    def _encode(self, texts: list) -> list:
-                        encoded = self.tokenizer(
-                            texts,
-                            padding=True,
-                            truncation=True,
-                            max_length=512,
-                            return_tensors="pt",
-                        )
-                        with torch.no_grad():
-                            outputs = self.model(**encoded)
-                        # Use CLS token embedding
-                        embeddings = outputs.last_hidden_state[:, 0, :]
-                        # Normalize
-                        embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1)
-                        return embeddings.cpu().numpy().tolist()
-
-                    def embed_query(self, text: str) -> list:
-                        return self._encode([text])[0]
-
-                    def embed_documents(self, texts: list) -> list:
-                        return self._encode(texts)
-
-                self.embeddings = InLegalBERTEmbeddings()
-                logger.info("Using InLegalBERT embeddings (768d, legal-domain)")
+                self.embeddings = embedding_service.InLegalBERTEmbeddings(
+                    embedding_model,
+                    runtime=runtime,
+                    onnx_dir=os.getenv("RAG_EMBEDDING_ONNX_DIR") or None,
+                    **service_kwargs,
+                )
+                logger.info("Using InLegalBERT embeddings (768d, legal-domain, %s)", self.embeddings.runtime)
                 return
             except Exception as e:
                 logger.warning("InLegalBERT unavailable (%s), trying fallback...", e)
 
         # Fallback to sentence-transformers
         try:
-            from sentence_transformers import SentenceTransformer
-
-            class SentenceTransformerEmbeddings:
-                """Simple wrapper for sentence-transformers embeddings."""
-                def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
-                    try:
-                        self.model = SentenceTransformer(model_name, local_files_only=True)
-                    except Exception:
-                        self.model = SentenceTransformer(model_name)
-
-                def embed_query(self, text: str) -> list:
-                    return self.model.encode(text).tolist()
-
-                def embed_documents(self, texts: list) -> list:
-                    return self.model.encode(texts).tolist()
-
-            self.embeddings = SentenceTransformerEmbeddings(fallback_model)
-            logger.info("Using SentenceTransformer embeddings (%s)", fallback_model)
+            self.embeddings = embedding_service.SentenceTransformerEmbeddings(
+                fallback_model,
+                runtime=runtime,
+                onnx_file=os.getenv("RAG_EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx2.onnx"),
+                **service_kwargs,
+            )
+            logger.info("Using SentenceTransformer embeddings (%s, %s)", fallback_model, self.embeddings.runtime)
             return
         except Exception:
             pass
@@ -330,11 +594,37 @@ class JurisGPTRAG:
 
     def _init_vector_store(self):
         """Initialize vector store"""
-        if self.vector_store_type == "chroma":
+        if self.vector_store_type == "dense":
+            self._init_dense_index()
+        elif self.vector_store_type == "chroma":
             self._init_chroma()
         else:
             self._init_faiss()
 
+    def _init_dense_index(self):
+        """Memory-map the dense index built by eval/build_dense_indexes.py.
+
+        Its rows are local corpus doc ids, so the local corpus (or its
+        snapshot) is loaded first; it supplies the text of every dense hit
+        and the BM25 index alongside.
+        """
+        dense_index = _import_data_module("dense_index")
+        self._init_local_corpus()
+        directory = DENSE_INDEX_DIR / dense_index.index_name(getattr(self.embeddings, "model_name", ""))
+        index = dense_index.load_dense_index(
+            directory, alignment=dense_index.alignment_digest(self.local_corpus)
+        )
+        if index is None:
+            logger.warning("Dense index unavailable at %s", directory)
+            self.vector_store = None
+            return
+        self._dense_index = index
+        self.vector_store = "dense"
+        logger.info(
+            "Dense index loaded (%s, %d x %d, %.1f MB scanned per query)",
+            index.kind, index.count, index.dim, index.scan_nbytes / 1e6,
+        )
+
     def _init_chroma(self):
         """Initialize ChromaDB"""
         try:
@@ -409,6 +699,10 @@ class JurisGPTRAG:
                         provider_name = "PageGrid" if is_pagegrid else "Custom Endpoint"
                     else:
                         provider_name = "Anthropic"
+                    # ChatAnthropic builds (and caches) its own HTTP client;
+                    # it takes the shared pool's timeout.
+                    if self.provider_clients is not None:
+                        llm_kwargs["default_request_timeout"] = self.provider_clients.timeout.read
 
                     self.llm = ChatAnthropic(**llm_kwargs)
                     self.llm_type = "anthropic"
@@ -425,11 +719,11 @@ class JurisGPTRAG:
             if openai_key:
                 try:
                     from langchain_openai import ChatOpenAI
-                    self.llm = ChatOpenAI(
-                        model="gpt-4o-mini",
-                        temperature=0.3,
-                        max_tokens=4000
-                    )
+                    llm_kwargs = {"model": "gpt-4o-mini", "temperature": 0.3, "max_tokens": 4000}
+                    if self.provider_clients is not None:
+                        llm_kwargs["http_client"] = self.provider_clients.http_client("openai")
+                        llm_kwargs["http_async_client"] = self.provider_clients.http_client("openai", asynchronous=True)
+                    self.llm = ChatOpenAI(**llm_kwargs)
                     self.llm_type = "openai"
                     logger.info("Using OpenAI GPT-4o-mini")
                     return
@@ -470,6 +764,8 @@ class JurisGPTRAG:
 
                 self.local_llm = LocalLegalLLM()
                 if self.local_llm.is_available:
+                    # Tokenized once, reused by every prompt that starts with it
+                    self.local_llm.set_prompt_prefix(LOCAL_PROMPT_PREFIX)
                     self.llm = "local_legal_llama"
                     logger.info("Local Legal Llama model available (lazy-loaded)")
                     return
@@ -490,48 +786,78 @@ class JurisGPTRAG:
     # ─── BM25 Index ──────────────────────────────────────────────────
 
     def _build_bm25_index(self):
-        """Build BM25 index and an inverted index for fast lexical scan.
-
-        BM25 needs a token *list* (with repetitions) per document so that term
-        frequency is preserved. The inverted index ``token -> [doc_ids]`` lets
-        the lexical retriever skip documents that share zero query terms,
-        turning an O(corpus_size) scan into O(matched_docs).
+        """Build the BM25 index and title postings for fast lexical scan.
+
+        Documents are tokenized here, once, straight into the compact index
+        (see bm25_index.py) — records keep no token lists of their own.
+        Tokenization runs in forked worker processes when the corpus is
+        large enough and the process is still single-threaded
+        (corpus_loader.py; RAG_LOAD_WORKERS=1 disables it). BM25
+        needs per-document term frequencies, which the index stores next to
+        each posting. Its posting lists double as the inverted index
+        ``token -> [doc_ids]`` that lets the lexical retriever skip documents
+        that share zero query terms, turning an O(corpus_size) scan into
+        O(matched_docs).
         """
         if not self.local_corpus:
             return
         try:
-            from rank_bm25 import BM25Okapi
+            BM25Index = _import_data_module("bm25_index").BM25Index
         except ImportError:
-            logger.warning("rank-bm25 not installed, BM25 hybrid search disabled")
+            logger.warning("numpy not installed, BM25 hybrid search disabled")
             self.hybrid_search = False
             return
 
-        self._bm25_corpus_tokens = [
-            list(doc.get("tokens", [])) for doc in self.local_corpus
-        ]
-        self._bm25_index = BM25Okapi(self._bm25_corpus_tokens)
-        # Build inverted index for fast lexical candidate selection
-        self._inverted_index: Dict[str, List[int]] = {}
-        for doc_idx, tokens in enumerate(self._bm25_corpus_tokens):
-            for token in set(tokens):
-                self._inverted_index.setdefault(token, []).append(doc_idx)
+        started = time.perf_counter()
+        term_counts = _import_data_module("corpus_loader").count_document_terms(
+            [(self._document_token_text(doc), doc["title"]) for doc in self.local_corpus],
+            self._tokenize,
+            workers=CORPUS_LOAD_WORKERS,
+            chunk_size=CORPUS_TOKENIZE_CHUNK_SIZE,
+        )
+        title_counts = []
+
+        def _body_counts():
+            for body, title in term_counts:
+                title_counts.append(title)
+                yield body
+
+        self._bm25_index = BM25Index(_body_counts())
+        # Title postings over the same vocabulary (title tokens are a subset
+        # of the body tokens) for the coverage scorer's title boost.
+        self._title_index = BM25Index(title_counts, vocabulary=self._bm25_index.vocabulary)
+        self._loose_match_index = None
+        self.corpus_load_timings["tokenize"] = round(time.perf_counter() - started, 4)
         logger.info(
-            "BM25 + inverted index built (%d documents, %d unique tokens)",
-            len(self._bm25_corpus_tokens),
-            len(self._inverted_index),
+            "BM25 + inverted index built (%d documents, %d unique tokens) in %.2fs",
+            self._bm25_index.corpus_size,
+            self._bm25_index.vocabulary_size,
+            self.corpus_load_timings["tokenize"],
         )
 
     # ─── Cross-Encoder Re-ranker ─────────────────────────────────────
 
     def _get_reranker(self):
-        """Lazily load the cross-encoder re-ranker."""
+        """Lazily load the cross-encoder re-ranker (reranker.py)."""
         if self._reranker is not None:
             return self._reranker
         if not self.use_reranker:
             return None
         try:
-            from sentence_transformers import CrossEncoder
-            self._reranker = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
+            reranker = _import_data_module("reranker")
+            model = reranker.load_cross_encoder(
+                os.getenv("RAG_RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+                runtime=os.getenv("RAG_RERANKER_RUNTIME", "torch"),
+                onnx_file=os.getenv("RAG_RERANKER_ONNX_FILE", "onnx/model_qint8_avx2.onnx"),
+            )
+            self._reranker = reranker.CrossEncoderReranker(
+                model,
+                tokenize=self._tokenize,
+                passage_words=int(os.getenv("RAG_RERANKER_PASSAGE_WORDS", "200")),
+                cache_size=int(os.getenv("RAG_RERANKER_CACHE_SIZE", "4096")),
+                budget_ms=float(os.getenv("RAG_RERANKER_BUDGET_MS", "0")),
+                batch_size=int(os.getenv("RAG_RERANKER_BATCH_SIZE", "8")),
+            )
             logger.info("Cross-encoder re-ranker loaded")
             return self._reranker
         except ImportError:
@@ -547,14 +873,16 @@ class JurisGPTRAG:
         """Re-rank citations using the cross-encoder model.
 
         Reranks even when ``len(citations) <= top_k`` because semantic
-        re-ordering of the small set still improves precision-at-1.
+        re-ordering of the small set still improves precision-at-1. When the
+        reranker runs out of its latency budget the fused order is kept.
         """
         reranker = self._get_reranker()
         if reranker is None or not citations:
             return citations[:top_k]
 
-        pairs = [(query, c.content) for c in citations]
-        scores = reranker.predict(pairs)
+        scores = reranker.score(query, citations)
+        if scores is None:
+            return citations[:top_k]
 
         scored = list(zip(scores, citations))
         scored.sort(key=lambda x: x[0], reverse=True)
@@ -563,17 +891,7 @@ class JurisGPTRAG:
         for score, citation in scored[:top_k]:
             # Normalize cross-encoder score to 0-1 range
             normalized = max(0.0, min(1.0, (float(score) + 10) / 20))
-            reranked.append(Citation(
-                title=citation.title,
-                content=citation.content,
-                doc_type=citation.doc_type,
-                source=citation.source,
-                relevance=round(normalized, 3),
-                section=citation.section,
-                act=citation.act,
-                url=citation.url,
-                metadata=citation.metadata,
-            ))
+            reranked.append(citation.with_relevance(round(normalized, 3)))
         return reranked
 
     # ─── Query Preprocessing (Phase 4.4) ─────────────────────────────
@@ -582,42 +900,69 @@ class JurisGPTRAG:
     def preprocess_query(query: str) -> str:
         """Expand legal abbreviations and normalize section references.
 
-        Section references are normalised *first* so that "sec 27" becomes
-        "Section 27" before the abbreviation map runs. Otherwise a generic
-        "sec" → "Section" abbreviation would interfere with the
-        ``Section <number>`` pattern.
+        One pass of ``QUERY_REWRITE_RE``: "sec 27" becomes "Section 27" via
+        the section branch, so a generic "sec" abbreviation can never
+        interfere with the ``Section <number>`` pattern.
         """
-        def _expand_section(match: re.Match) -> str:
-            return f"Section {match.group(1)}"
-
-        processed = SECTION_REF_RE.sub(_expand_section, query)
+        def _rewrite(match: re.Match) -> str:
+            if match.group("section"):
+                return f"Section {match.group(2)}"
+            abbr = match.group("abbr")
+            return f"{LEGAL_ABBREVIATIONS[abbr.lower()]} ({abbr.upper()})"
 
-        for abbr, expansion in LEGAL_ABBREVIATIONS.items():
-            pattern = re.compile(r"\b" + re.escape(abbr) + r"\b", re.IGNORECASE)
-            processed = pattern.sub(f"{expansion} ({abbr.upper()})", processed)
+        return QUERY_REWRITE_RE.sub(_rewrite, query)
 
-        return processed
+    @staticmethod
+    @lru_cache(maxsize=QUERY_ANALYSIS_CACHE_SIZE)
+    def analyze_query(query: str) -> QueryAnalysis:
+        """Preprocess and tokenize a query once; repeats hit a bounded LRU."""
+        processed_query = JurisGPTRAG.preprocess_query(query)
+        return QueryAnalysis(
+            query=query,
+            processed_query=processed_query,
+            tokens=tuple(JurisGPTRAG._tokenize(processed_query)),
+        )
 
     # ─── Tokenization & Lexical Matching ─────────────────────────────
 
-    def _tokenize(self, text: str) -> List[str]:
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
         """Tokenize text for local lexical retrieval."""
-        normalized = "".join(char.lower() if char.isalnum() else " " for char in text)
-        return [
-            token for token in normalized.split()
-            if token not in LOCAL_STOPWORDS and (len(token) > 2 or token.isdigit())
-        ]
+        tokens = []
+        for match in TOKEN_RE.finditer(text):
+            token = match.group().lower()
+            if token not in LOCAL_STOPWORDS and (len(token) > 2 or token.isdigit()):
+                tokens.append(token)
+        return tokens
 
     def _token_matches(self, query_token: str, document_token: str) -> bool:
         """Allow loose token matches for simple stemming-like behavior."""
         if query_token == document_token:
             return True
-        if len(query_token) >= 5 and query_token in document_token:
+        if len(query_token) >= LOOSE_MATCH_MIN_LENGTH and query_token in document_token:
             return True
-        if len(document_token) >= 5 and document_token in query_token:
+        if len(document_token) >= LOOSE_MATCH_MIN_LENGTH and document_token in query_token:
             return True
         return False
 
+    def _get_loose_match_index(self):
+        """Lazily build the substring index behind ``_token_matches`` over the
+        BM25 vocabulary (skipped at startup, only loose lookups need it).
+
+        Built under ``_update_lock``, which ``add_documents`` holds while it
+        grows the vocabulary and updates this index.
+        """
+        index = self._loose_match_index
+        if index is None:
+            with self._update_lock:
+                if self._loose_match_index is None:
+                    SubstringIndex = _import_data_module("bm25_index").SubstringIndex
+                    self._loose_match_index = SubstringIndex(
+                        self._bm25_index.vocabulary, min_length=LOOSE_MATCH_MIN_LENGTH
+                    )
+                index = self._loose_match_index
+        return index
+
     def _build_local_document(
         self,
         *,
@@ -632,12 +977,10 @@ class JurisGPTRAG:
     ) -> Dict[str, Any]:
         """Build a local corpus record.
 
-        Tokens are stored as ``list`` (not ``set``) so that BM25 keeps the term
-        frequency information it needs to score correctly. A separate
-        ``token_set`` is kept for fast O(1) intersection during the lexical
-        scan.
+        Records hold no tokens: ``_build_bm25_index`` tokenizes
+        ``_document_token_text`` once into the shared index.
         """
-        document = {
+        return {
             "title": title,
             "content": content,
             "doc_type": doc_type,
@@ -647,78 +990,123 @@ class JurisGPTRAG:
             "url": url,
             "metadata": metadata or {},
         }
-        token_source = " ".join([
-            title,
-            content,
-            source,
-            section or "",
-            act or "",
-            " ".join(str(v) for v in (metadata or {}).values()),
+
+    @staticmethod
+    def _document_token_text(document: Dict[str, Any]) -> str:
+        """Text a record is indexed under: title, body and citation fields."""
+        return " ".join([
+            document["title"],
+            document["content"],
+            document["source"],
+            document.get("section") or "",
+            document.get("act") or "",
+            " ".join(str(v) for v in (document.get("metadata") or {}).values()),
         ])
-        body_tokens = self._tokenize(token_source)
-        title_tokens = self._tokenize(title)
-        document["tokens"] = body_tokens
-        document["token_set"] = set(body_tokens)
-        document["title_tokens"] = title_tokens
-        document["title_token_set"] = set(title_tokens)
-        return document
 
     def _verify_citations(self, answer: str, citations: List["Citation"]) -> str:
         """Post-generation grounding audit: fix or strip misattributed [i] markers.
 
         The dominant residual hallucination mode (see faithfulness evals) is a
         true legal statement pinned to a retrieved source that does not state
-        it. A fast verifier pass checks every cited sentence against its
-        source and rewrites the answer so citations only appear where the
-        source actually supports the sentence. Disable with
-        RAG_VERIFY_CITATIONS=false. Fails open: any error returns the
-        original answer.
+        it. Every cited sentence is checked against the sources locally
+        (``citation_verifier.py``); only the sentences that check cannot
+        settle go to a fast verifier model, in one request, and the answer
+        is rewritten so citations only appear where the source actually
+        supports the sentence. Disable with RAG_VERIFY_CITATIONS=false, or
+        keep only the local pass with RAG_VERIFY_REMOTE=false. Fails open:
+        a remote error keeps the locally verified answer.
         """
-        if os.getenv("RAG_VERIFY_CITATIONS", "true").lower() not in ("1", "true", "yes"):
-            return answer
-        if not answer or not citations or "[" not in answer:
+        verification, request = self._local_verification(answer, citations)
+        if verification is None:
             return answer
+        if request is None:
+            return verification.answer
         try:
-            import anthropic
+            client = self._anthropic_client()
+            return self._verified_answer(verification, client.messages.create(**request))
+        except Exception as exc:
+            logger.warning("Remote citation verification skipped: %s", exc)
+            return verification.answer
 
-            sources = "\n\n".join(
-                f"[{i}] {c.title}\n{c.content.strip()[:1200]}"
-                for i, c in enumerate(citations, 1)
-            )
-            prompt = f"""You are auditing a legal answer for citation accuracy. Here are the ONLY sources:
-
-{sources}
-
-Here is the answer:
----
-{answer}
----
-
-Rewrite the answer applying these rules, changing as little as possible:
-1. Keep a citation [i] on a sentence only if source i actually states that sentence's claim (paraphrase ok).
-2. If a claim is stated by a DIFFERENT listed source, fix the citation number.
-3. If no listed source states the claim, remove the citation marker and either delete the claim or rephrase it as "Beyond the provided sources: ...".
-4. Do not add new information. Keep formatting, headings, and tone.
-
-Return ONLY the corrected answer, no commentary."""
-            # Haiku keeps the per-message latency/cost of this always-on
-            # product pass small (per the operator's cost ceiling).
-            client = anthropic.Anthropic(max_retries=3)
-            resp = client.messages.create(
-                model="claude-haiku-4-5",
-                max_tokens=4000,
-                messages=[{"role": "user", "content": prompt}],
-            )
-            if resp.stop_reason == "refusal":
-                return answer
-            verified = "".join(b.text for b in resp.content if b.type == "text").strip()
-            # Guard against degenerate rewrites (empty or drastically shorter).
-            if verified and len(verified) >= 0.4 * len(answer):
-                return verified
+    async def _averify_citations(self, answer: str, citations: List["Citation"]) -> str:
+        """``_verify_citations`` on the async Anthropic client."""
+        verification, request = self._local_verification(answer, citations)
+        if verification is None:
             return answer
+        if request is None:
+            return verification.answer
+        try:
+            client = self._anthropic_client(asynchronous=True)
+            return self._verified_answer(verification, await client.messages.create(**request))
         except Exception as exc:
-            logger.warning("Citation verification skipped: %s", exc)
-            return answer
+            logger.warning("Remote citation verification skipped: %s", exc)
+            return verification.answer
+
+    def _anthropic_client(self, asynchronous: bool = False):
+        """Long-lived Anthropic SDK client for the remote verifier."""
+        if self.provider_clients is not None:
+            if asynchronous:
+                return self.provider_clients.async_anthropic(max_retries=3)
+            return self.provider_clients.anthropic(max_retries=3)
+        client = self._anthropic_clients.get(asynchronous)
+        if client is None:
+            import anthropic
+
+            factory = anthropic.AsyncAnthropic if asynchronous else anthropic.Anthropic
+            client = self._anthropic_clients.setdefault(asynchronous, factory(max_retries=3))
+        return client
+
+    def _citation_verifier(self):
+        if self._verifier is None:
+            self._verifier = _import_data_module("citation_verifier").CitationVerifier(self._tokenize)
+        return self._verifier
+
+    def _term_weight(self) -> Callable[[str], float]:
+        """IDF of a token in the BM25 index; unseen tokens weigh as the rarest."""
+        index = self._bm25_index
+        if index is None or not len(index.idf):
+            return lambda token: 1.0
+        vocabulary, idf = index.vocabulary, index.idf
+        unseen = float(idf.max())
+
+        def weight(token: str) -> float:
+            term_id = vocabulary.get(token)
+            return float(idf[term_id]) if term_id is not None and term_id < len(idf) else unseen
+
+        return weight
+
+    def _local_verification(self, answer: str, citations: List["Citation"]) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """``(local verification, remote request)``; ``(None, None)`` skips the audit.
+
+        The request is None when the local pass settled every sentence.
+        """
+        if os.getenv("RAG_VERIFY_CITATIONS", "true").lower() not in ("1", "true", "yes"):
+            return None, None
+        if not answer or not citations or "[" not in answer:
+            return None, None
+        verifier = self._citation_verifier()
+        sources = [f"{c.title}\n{c.content}" for c in citations]
+        verification = verifier.check(answer, sources, self._term_weight())
+        if os.getenv("RAG_VERIFY_REMOTE", "true").lower() not in ("1", "true", "yes"):
+            return verification, None
+        # Haiku keeps the per-message latency/cost of this pass small (per
+        # the operator's cost ceiling).
+        request = verifier.remote_request(
+            verification,
+            [c.content for c in citations],
+            [c.title for c in citations],
+            model="claude-haiku-4-5",
+        )
+        return verification, request
+
+    def _verified_answer(self, verification: Any, resp: Any) -> str:
+        if resp.stop_reason == "refusal":
+            return verification.answer
+        text = "".join(b.text for b in resp.content if b.type == "text").strip()
+        corrections = self._citation_verifier().parse_corrections(verification, text)
+        if corrections is None:
+            return verification.answer
+        return verification.apply(corrections)
 
     @staticmethod
     def _content_to_text(content: Any) -> str:
@@ -810,15 +1198,40 @@ Return ONLY the corrected answer, no commentary."""
             self.corpus_source = "cloud"
             return
 
+        started = time.perf_counter()
+        if self._load_corpus_snapshot():
+            self.corpus_load_timings = {"snapshot": round(time.perf_counter() - started, 4)}
+            return
+
+        # Read and decode every source concurrently, then build records
+        # serially in the fixed source order below so document ids stay
+        # deterministic.
+        hf_corpus_file = PROCESSED_DIR / "hf_legal_corpus.json"
+        sources = [
+            (filename, partial(self._read_json_records, SAMPLES_DIR / filename))
+            for filename in CURATED_SAMPLE_FILES
+        ]
+        sources.append((hf_corpus_file.name, partial(self._read_json_records, hf_corpus_file)))
+        if OBSIDIAN_ENABLED:
+            sources.append(("obsidian", self._read_obsidian_documents))
+        loaded = _import_data_module("corpus_loader").load_sources(
+            sources, max_workers=CORPUS_LOAD_WORKERS
+        )
+        self.corpus_load_timings = {name: round(seconds, 4) for name, _, seconds in loaded}
+        results = {name: result for name, result, _ in loaded}
+
+        incremental_ranges: Dict[str, List[int]] = {}
         for filename in CURATED_SAMPLE_FILES:
-            items = self._read_json_records(SAMPLES_DIR / filename)
+            items = results[filename]
             if items:
                 self.loaded_corpus_files.append(filename)
+            start = len(corpus)
             self._append_corpus_items_from_json(corpus, filename, items, source_prefix="Local")
+            if filename in INCREMENTAL_SOURCES:
+                incremental_ranges[filename] = [start, len(corpus)]
 
         # ── Load HuggingFace-sourced corpus (Phase 3.1) ─────────────
-        hf_corpus_file = PROCESSED_DIR / "hf_legal_corpus.json"
-        hf_items = self._read_json_records(hf_corpus_file)
+        hf_items = results[hf_corpus_file.name]
         if hf_items:
             self.loaded_corpus_files.append(str(hf_corpus_file.relative_to(BASE_DIR)))
         for item in hf_items:
@@ -833,14 +1246,304 @@ Return ONLY the corrected answer, no commentary."""
             ))
 
         # ── Load Obsidian vault notes (if enabled) ─────────────────
+        start = len(corpus)
         if OBSIDIAN_ENABLED:
-            obsidian_docs = self._load_obsidian_corpus(corpus)
-            if obsidian_docs > 0:
-                logger.info("Loaded %d documents from Obsidian vault", obsidian_docs)
+            obsidian_docs, obsidian_files = results["obsidian"]
+            corpus.extend(self._obsidian_records(obsidian_docs))
+            self.loaded_corpus_files.extend(f"obsidian:{f}" for f in obsidian_files)
+            if obsidian_docs:
+                logger.info("Loaded %d documents from Obsidian vault", len(obsidian_docs))
+        incremental_ranges["obsidian"] = [start, len(corpus)]
 
         self.local_corpus = corpus
         self.corpus_source = "local"
         self.corpus_as_of = self._compute_corpus_as_of()
+        self._incremental_ranges = incremental_ranges
+        self._static_fingerprint = self._corpus_fingerprint(include_incremental_sources=False)
+
+    def _obsidian_records(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Corpus records for notes read by ``_read_obsidian_documents``."""
+        return [
+            self._build_local_document(
+                title=doc.get("title", "Obsidian Note"),
+                content=doc.get("content", ""),
+                doc_type=doc.get("doc_type", "note"),
+                source=doc.get("source", "Obsidian Vault"),
+                section=doc.get("section"),
+                act=doc.get("act"),
+                url=doc.get("url"),
+                metadata=doc.get("metadata", {}),
+            )
+            for doc in docs
+        ]
+
+    # ─── Corpus Snapshot ─────────────────────────────────────────────
+
+    @staticmethod
+    def _corpus_fingerprint(include_incremental_sources: bool = True) -> Dict[str, Any]:
+        """Staleness key for the local corpus inputs (see corpus_snapshot.py).
+
+        Covers every file the JSON path may read — including the .gz archives
+        and, when enabled, the Obsidian notes — plus this module itself, since
+        the record layout and tokenizer live here. Without
+        ``include_incremental_sources`` it covers only the files that
+        ``refresh_corpus`` cannot apply as a delta.
+        """
+        snapshot_module = _import_data_module("corpus_snapshot")
+        paths: List[Path] = []
+        for filename in CURATED_SAMPLE_FILES:
+            if filename in INCREMENTAL_SOURCES and not include_incremental_sources:
+                continue
+            paths.extend([SAMPLES_DIR / filename, SAMPLES_DIR / f"{filename}.gz"])
+        paths.extend([
+            PROCESSED_DIR / "hf_legal_corpus.json",
+            PROCESSED_DIR / "hf_legal_corpus.json.gz",
+            Path(__file__),
+        ])
+        vault_path = Path(OBSIDIAN_VAULT_PATH)
+        if include_incremental_sources and OBSIDIAN_ENABLED and vault_path.exists():
+            paths.extend(vault_path.rglob("*.md"))
+        return snapshot_module.source_fingerprint(
+            paths,
+            extra={
+                "obsidian_enabled": OBSIDIAN_ENABLED,
+                "obsidian_vault": str(vault_path) if OBSIDIAN_ENABLED else None,
+            },
+        )
+
+    def _load_corpus_snapshot(self) -> bool:
+        """Memory-map a prebuilt corpus snapshot instead of parsing JSON.
+
+        Returns False (and leaves state untouched) when snapshots are
+        disabled with RAG_CORPUS_SNAPSHOT=false, NumPy is unavailable, or the
+        snapshot is missing, stale or fails checksum validation.
+        """
+        if os.getenv("RAG_CORPUS_SNAPSHOT", "true").lower() not in ("1", "true", "yes"):
+            return False
+        if not (CORPUS_SNAPSHOT_DIR / "manifest.json").exists():
+            return False
+        try:
+            snapshot_module = _import_data_module("corpus_snapshot")
+        except ImportError as exc:
+            logger.warning("Corpus snapshot unavailable: %s", exc)
+            return False
+
+        verify = os.getenv("RAG_CORPUS_SNAPSHOT_VERIFY", "true").lower() in ("1", "true", "yes")
+        snapshot = snapshot_module.load_snapshot(
+            CORPUS_SNAPSHOT_DIR,
+            fingerprint=self._corpus_fingerprint(),
+            verify_checksums=verify,
+        )
+        if snapshot is None:
+            return False
+
+        self._corpus_snapshot = snapshot
+        self.local_corpus = snapshot.documents
+        self._bm25_index = snapshot.bm25_index
+        self._title_index = snapshot.title_index
+        self._loose_match_index = None
+        self.loaded_corpus_files = list(snapshot.manifest.get("loaded_files", []))
+        self.corpus_source = "local"
+        self.corpus_as_of = self._compute_corpus_as_of()
+        self._incremental_ranges = snapshot.manifest.get("incremental_ranges")
+        self._static_fingerprint = self._corpus_fingerprint(include_incremental_sources=False)
+        logger.info(
+            "Loaded corpus snapshot %s (%d documents, built %s)",
+            CORPUS_SNAPSHOT_DIR,
+            len(snapshot.documents),
+            snapshot.manifest.get("created_at"),
+        )
+        return True
+
+    def save_corpus_snapshot(self, directory: Optional[Path] = None) -> Path:
+        """Write the loaded local corpus and its indexes as a snapshot.
+
+        Run via ``python data/corpus_snapshot.py`` after the corpus files
+        change (e.g. after ``ingest_updates.py``); the next startup then
+        memory-maps it instead of rebuilding from JSON.
+        """
+        if self.corpus_source != "local" or self._corpus_snapshot is not None:
+            raise ValueError("Only a corpus built from local JSON files can be snapshotted")
+        if self._corpus_revision:
+            raise ValueError("Corpus was updated in place; rebuild it from JSON before snapshotting")
+        if self._bm25_index is None:
+            raise ValueError("BM25 index is not built (is NumPy installed?)")
+        snapshot_module = _import_data_module("corpus_snapshot")
+        return snapshot_module.write_snapshot(
+            Path(directory) if directory else CORPUS_SNAPSHOT_DIR,
+            documents=self.local_corpus,
+            bm25_index=self._bm25_index,
+            title_index=self._title_index,
+            fingerprint=self._corpus_fingerprint(),
+            metadata={
+                "loaded_files": self.loaded_corpus_files,
+                "incremental_ranges": self._incremental_ranges,
+            },
+        )
+
+    # ─── Incremental Updates ─────────────────────────────────────────
+
+    def add_documents(self, records: Iterable[Dict[str, Any]]) -> List[int]:
+        """Add corpus records to the lexical indexes without a rebuild.
+
+        ``records`` use the corpus record fields (title, content, doc_type,
+        source, section, act, url, metadata), as written by
+        ``ingest_updates.py``. Returns the new doc ids. The cost is
+        proportional to the records added; the BM25 index compacts itself in
+        the background. Chroma / FAISS collections are not updated.
+        """
+        documents = [
+            self._build_local_document(
+                title=record.get("title") or "Untitled",
+                content=record.get("content") or "",
+                doc_type=record.get("doc_type") or "unknown",
+                source=record.get("source") or "unknown",
+                section=record.get("section"),
+                act=record.get("act"),
+                url=record.get("url"),
+                metadata=record.get("metadata") or {},
+            )
+            for record in records
+        ]
+        if not documents:
+            return []
+        with self._update_lock:
+            first_id = len(self.local_corpus)
+            # Records go in before the index can return their ids.
+            self.local_corpus.extend(documents)
+            if self._bm25_index is not None:
+                self._bm25_index.add_documents(
+                    self._tokenize(self._document_token_text(doc)) for doc in documents
+                )
+                self._title_index.add_documents(self._tokenize(doc["title"]) for doc in documents)
+                if self._loose_match_index is not None:
+                    self._loose_match_index.update()
+            self._mark_corpus_updated()
+        return list(range(first_id, first_id + len(documents)))
+
+    def remove_documents(self, doc_ids: Iterable[int]) -> int:
+        """Drop documents from the lexical indexes; returns how many were
+        removed. Their ids are not reused until the next full rebuild."""
+        with self._update_lock:
+            removed = sorted({int(doc_id) for doc_id in doc_ids} - self._removed_doc_ids)
+            for doc_id in removed:
+                if not 0 <= doc_id < len(self.local_corpus):
+                    raise IndexError(f"doc id {doc_id} is not in the corpus")
+            if not removed:
+                return 0
+            documents = [self.local_corpus[doc_id] for doc_id in removed]
+            if self._bm25_index is not None:
+                self._bm25_index.remove_documents(
+                    removed, [self._tokenize(self._document_token_text(doc)) for doc in documents]
+                )
+                self._title_index.remove_documents(
+                    removed, [self._tokenize(doc["title"]) for doc in documents]
+                )
+            self._removed_doc_ids.update(removed)
+            self._mark_corpus_updated()
+        return len(removed)
+
+    def _mark_corpus_updated(self):
+        """New corpus version after an in-place update; drops semantic-cache
+        answers, whose keys do not carry the version."""
+        self._corpus_revision += 1
+        self.corpus_version = self._compute_corpus_version()
+        if self._semantic_cache is not None:
+            self._semantic_cache.clear()
+
+    def refresh_corpus(self) -> Optional[Dict[str, int]]:
+        """Re-read ``INCREMENTAL_SOURCES`` and apply what changed as a delta.
+
+        Documents whose record changed are replaced, new ones added and
+        missing ones removed, so a refresh after ``ingest_updates.py`` or an
+        Obsidian edit costs time in proportion to those sources, not the
+        corpus. Returns ``{"added": n, "removed": m}``, or None when a full
+        reload is needed instead: other corpus files changed, or the corpus
+        is not a locally indexed one.
+        """
+        if (
+            self.corpus_source != "local"
+            or self._bm25_index is None
+            or self._incremental_ranges is None
+            or self._static_fingerprint is None
+        ):
+            return None
+        if self._corpus_fingerprint(include_incremental_sources=False) != self._static_fingerprint:
+            return None
+
+        with self._update_lock:
+            return self._apply_incremental_sources()
+
+    def _apply_incremental_sources(self) -> Dict[str, int]:
+        current = self._incremental_documents()
+        added = removed = 0
+        loaded_files = [
+            name for name in self.loaded_corpus_files
+            if name not in INCREMENTAL_SOURCES and not name.startswith("obsidian:")
+        ]
+        for name in INCREMENTAL_SOURCES:
+            records, files = self._read_incremental_source(name)
+            loaded_files.extend(files)
+            wanted: Dict[str, List[Dict[str, Any]]] = {}
+            for record in records:
+                wanted.setdefault(self._record_digest(record), []).append(record)
+
+            stale: List[int] = []
+            fresh: List[Dict[str, Any]] = []
+            for digest in set(current[name]) | set(wanted):
+                have = current[name].get(digest, [])
+                want = wanted.get(digest, [])
+                stale.extend(have[len(want):])
+                fresh.extend(want[len(have):])
+                if len(want) < len(have):
+                    current[name][digest] = have[:len(want)]
+            removed += self.remove_documents(stale)
+            new_ids = self.add_documents(fresh)
+            added += len(new_ids)
+            for doc_id, record in zip(new_ids, fresh):
+                current[name].setdefault(self._record_digest(record), []).append(doc_id)
+            current[name] = {digest: ids for digest, ids in current[name].items() if ids}
+
+        self.loaded_corpus_files = loaded_files
+        self.corpus_as_of = self._compute_corpus_as_of()
+        logger.info("Corpus refreshed in place: %d added, %d removed", added, removed)
+        return {"added": added, "removed": removed}
+
+    def _read_incremental_source(self, name: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Current corpus records of one of ``INCREMENTAL_SOURCES`` and the
+        ``loaded_corpus_files`` entries it contributes."""
+        if name == "obsidian":
+            if not OBSIDIAN_ENABLED:
+                return [], []
+            docs, files = self._read_obsidian_documents()
+            return self._obsidian_records(docs), [f"obsidian:{f}" for f in files]
+        items = self._read_json_records(SAMPLES_DIR / name)
+        records: List[Dict[str, Any]] = []
+        self._append_corpus_items_from_json(records, name, items, source_prefix="Local")
+        return records, [name] if items else []
+
+    def _incremental_documents(self) -> Dict[str, Dict[str, List[int]]]:
+        """``source -> record digest -> doc ids`` for ``INCREMENTAL_SOURCES``,
+        built on first use from the doc id ranges recorded at load time."""
+        if self._incremental_docs is None:
+            docs: Dict[str, Dict[str, List[int]]] = {}
+            for name in INCREMENTAL_SOURCES:
+                start, end = self._incremental_ranges.get(name, (0, 0))
+                by_digest: Dict[str, List[int]] = {}
+                for doc_id in range(start, end):
+                    if doc_id not in self._removed_doc_ids:
+                        by_digest.setdefault(
+                            self._record_digest(self.local_corpus[doc_id]), []
+                        ).append(doc_id)
+                docs[name] = by_digest
+            self._incremental_docs = docs
+        return self._incremental_docs
+
+    @staticmethod
+    def _record_digest(record: Dict[str, Any]) -> str:
+        """Content hash of a corpus record (stable across a snapshot round trip)."""
+        payload = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
     @staticmethod
     def _compute_corpus_as_of() -> Optional[str]:
@@ -862,8 +1565,9 @@ Return ONLY the corrected answer, no commentary."""
         except Exception:
             return None
 
-    def _load_obsidian_corpus(self, corpus: List[Dict[str, Any]]) -> int:
-        """Load notes from Obsidian vault into corpus."""
+    @staticmethod
+    def _read_obsidian_documents() -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Read Obsidian vault notes: ``(documents, loaded files)``."""
         try:
             from obsidian_loader import load_obsidian_corpus, ObsidianLoader
         except ImportError:
@@ -871,38 +1575,20 @@ Return ONLY the corrected answer, no commentary."""
                 from .obsidian_loader import load_obsidian_corpus, ObsidianLoader
             except ImportError:
                 logger.warning("Obsidian loader not available")
-                return 0
+                return [], []
 
         vault_path = OBSIDIAN_VAULT_PATH
         if not Path(vault_path).exists():
             logger.info("Obsidian vault not found at %s, skipping", vault_path)
-            return 0
+            return [], []
 
         try:
             loader = ObsidianLoader(vault_path=vault_path)
             docs = loader.load_documents()
-
-            for doc in docs:
-                corpus.append(self._build_local_document(
-                    title=doc.get("title", "Obsidian Note"),
-                    content=doc.get("content", ""),
-                    doc_type=doc.get("doc_type", "note"),
-                    source=doc.get("source", "Obsidian Vault"),
-                    section=doc.get("section"),
-                    act=doc.get("act"),
-                    url=doc.get("url"),
-                    metadata=doc.get("metadata", {}),
-                ))
-
-            if loader.loaded_files:
-                self.loaded_corpus_files.extend(
-                    [f"obsidian:{f}" for f in loader.loaded_files]
-                )
-
-            return len(docs)
+            return docs, list(loader.loaded_files or [])
         except Exception as e:
             logger.warning("Error loading Obsidian corpus: %s", e)
-            return 0
+            return [], []
 
     def _get_cloud_corpus_files(self) -> List[str]:
         """Get configured cloud corpus object keys."""
@@ -1076,6 +1762,21 @@ Return ONLY the corrected answer, no commentary."""
                 ))
             return
 
+        if filename == "ingested_judgments.json":
+            # Written by ingest_updates.py already in corpus record form.
+            for item in items:
+                corpus.append(self._build_local_document(
+                    title=item.get("title", "Judgment"),
+                    content=item.get("content", ""),
+                    doc_type=item.get("doc_type", "case"),
+                    source=item.get("source", "Indian Kanoon"),
+                    section=item.get("section"),
+                    act=item.get("act"),
+                    url=item.get("url"),
+                    metadata=item.get("metadata", {}),
+                ))
+            return
+
         logger.warning("No corpus loader registered for %s", object_key)
 
     def _load_cloud_corpus(self, corpus: List[Dict[str, Any]]) -> bool:
@@ -1118,39 +1819,113 @@ Return ONLY the corrected answer, no commentary."""
     # ─── Retrieval Methods ───────────────────────────────────────────
 
     def _candidate_doc_indices(self, query_tokens: List[str]) -> List[int]:
-        """Use the inverted index to limit lexical scoring to a candidate set.
+        """Use the BM25 posting lists to limit lexical scoring to a candidate set.
 
-        Falls back to the full corpus only when the inverted index has not been
-        built yet (e.g. when hybrid_search is disabled).
+        Falls back to the full corpus only when the index has not been built
+        (e.g. when NumPy is unavailable).
         """
-        index = getattr(self, "_inverted_index", None)
-        if not index:
-            return list(range(len(self.local_corpus)))
+        if self._bm25_index is None:
+            return [
+                doc_idx for doc_idx in range(len(self.local_corpus))
+                if doc_idx not in self._removed_doc_ids
+            ]
         candidates: set[int] = set()
         for token in set(query_tokens):
-            candidates.update(index.get(token, []))
-        return list(candidates)
+            candidates.update(self._bm25_index.postings(token).tolist())
+        return sorted(candidates)
+
+    def _retrieve_from_local_corpus(
+        self,
+        query: str,
+        top_k: int,
+        query_tokens: Optional[Sequence[str]] = None,
+    ) -> List[Citation]:
+        """Retrieve citations using lexical token coverage.
 
-    def _retrieve_from_local_corpus(self, query: str, top_k: int) -> List[Citation]:
-        """Retrieve citations using lexical token matching with O(candidates)
-        scanning powered by the inverted index. Uses the precomputed
-        ``token_set`` for O(1) intersection.
+        With the index built, coverage is counted straight from the body and
+        title posting lists, so only documents sharing a query term are
+        touched and no per-document token sets are needed (a snapshot-backed
+        corpus has none). Without it, every record is scanned.
+        ``query_tokens`` skips re-tokenizing an already analysed query.
         """
         if not self.local_corpus:
             self._init_local_corpus()
 
-        query_tokens = self._tokenize(query)
+        if query_tokens is None:
+            query_tokens = self._tokenize(query)
+        query_tokens = list(query_tokens)
         if not query_tokens:
             return []
 
+        if self._bm25_index is None:
+            scored_results = self._scan_local_corpus(query_tokens)
+        else:
+            scored_results = self._score_from_postings(query_tokens)
+
+        return [
+            Citation.from_corpus(self.local_corpus, doc_idx, round(score, 3))
+            for score, doc_idx in scored_results[:top_k]
+        ]
+
+    @staticmethod
+    def _coverage_score(matched: int, title_matched: int, query_length: int) -> float:
+        coverage = matched / query_length
+        title_coverage = title_matched / query_length
+        return min(0.98, (coverage * 0.75) + (title_coverage * 0.2) + 0.05)
+
+    def _score_from_postings(self, query_tokens: List[str]) -> List[tuple[float, int]]:
+        """Coverage-score every document that shares a query term.
+
+        Documents with no exact match fall back to loose matches for stems /
+        partials (``_token_matches``): each query token is expanded once
+        through the substring index and its related tokens' posting lists are
+        read, instead of comparing against every document token. Ties keep
+        ascending doc-id order.
+        """
+        distinct_tokens = sorted(set(query_tokens))
+        matched: Dict[int, int] = {}
+        title_matched: Dict[int, int] = {}
+        for token in distinct_tokens:
+            for doc_idx in self._bm25_index.postings(token).tolist():
+                matched[doc_idx] = matched.get(doc_idx, 0) + 1
+            if self._title_index is not None:
+                for doc_idx in self._title_index.postings(token).tolist():
+                    title_matched[doc_idx] = title_matched.get(doc_idx, 0) + 1
+
+        loose_matched: Dict[int, int] = {}
+        loose_index = self._get_loose_match_index()
+        for token in distinct_tokens:
+            loose_docs: set[int] = set()
+            for related in loose_index.matches(token):
+                if related != token:
+                    loose_docs.update(self._bm25_index.postings(related).tolist())
+            for doc_idx in loose_docs - matched.keys():
+                loose_matched[doc_idx] = loose_matched.get(doc_idx, 0) + 1
+
+        scored_results = []
+        for doc_idx in sorted(matched.keys() | loose_matched.keys()):
+            # A loosely matched document has no exact match, so no exact
+            # title match either.
+            score = self._coverage_score(
+                matched.get(doc_idx) or loose_matched[doc_idx],
+                title_matched.get(doc_idx, 0),
+                len(query_tokens),
+            )
+            if score >= 0.2:
+                scored_results.append((score, doc_idx))
+        scored_results.sort(key=lambda item: item[0], reverse=True)
+        return scored_results
+
+    def _scan_local_corpus(self, query_tokens: List[str]) -> List[tuple[float, int]]:
+        """Full scan that tokenizes every record on the fly, with loose
+        matching for stems / partials. Used only when the index is
+        unavailable."""
         query_token_set = set(query_tokens)
-        scored_results: List[tuple[float, Dict[str, Any]]] = []
+        scored_results: List[tuple[float, int]] = []
         for doc_idx in self._candidate_doc_indices(query_tokens):
             document = self.local_corpus[doc_idx]
-            doc_token_set = document.get("token_set") or set(document.get("tokens", []))
-            title_token_set = document.get("title_token_set") or set(
-                document.get("title_tokens", [])
-            )
+            doc_token_set = set(self._tokenize(self._document_token_text(document)))
+            title_token_set = set(self._tokenize(document["title"]))
 
             matched_tokens = query_token_set & doc_token_set
             if not matched_tokens:
@@ -1163,84 +1938,70 @@ Return ONLY the corrected answer, no commentary."""
                     continue
 
             matched_title_tokens = query_token_set & title_token_set
-
-            coverage = len(matched_tokens) / len(query_tokens)
-            title_coverage = len(matched_title_tokens) / len(query_tokens)
-            score = min(0.98, (coverage * 0.75) + (title_coverage * 0.2) + 0.05)
-
+            score = self._coverage_score(
+                len(matched_tokens), len(matched_title_tokens), len(query_tokens)
+            )
             if score >= 0.2:
-                scored_results.append((score, document))
+                scored_results.append((score, doc_idx))
 
         scored_results.sort(key=lambda item: item[0], reverse=True)
+        return scored_results
 
-        return [
-            Citation(
-                title=document["title"],
-                content=document["content"],
-                doc_type=document["doc_type"],
-                source=document["source"],
-                relevance=round(score, 3),
-                section=document.get("section"),
-                act=document.get("act"),
-                url=document.get("url"),
-                metadata=document.get("metadata", {}),
-            )
-            for score, document in scored_results[:top_k]
-        ]
+    def _retrieve_bm25(
+        self,
+        query: str,
+        top_k: int,
+        query_tokens: Optional[Sequence[str]] = None,
+    ) -> List[Citation]:
+        """Retrieve citations using BM25 scoring.
 
-    def _retrieve_bm25(self, query: str, top_k: int) -> List[Citation]:
-        """Retrieve citations using BM25 scoring."""
+        The sparse index scores only the query terms' posting lists and
+        returns the top k already ordered, so there is no full-corpus sort.
+        ``query_tokens`` skips re-tokenizing an already analysed query.
+        """
         if self._bm25_index is None or not self.local_corpus:
             return []
 
-        query_tokens = self._tokenize(query)
+        if query_tokens is None:
+            query_tokens = self._tokenize(query)
         if not query_tokens:
             return []
 
-        scores = self._bm25_index.get_scores(query_tokens)
+        return self._bm25_citations(self._bm25_index.top_k(query_tokens, top_k))
 
-        # Pair scores with document indices and sort
-        indexed_scores = sorted(enumerate(scores), key=lambda x: x[1], reverse=True)
+    def _bm25_citations(self, top_scores: List[Tuple[int, float]]) -> List[Citation]:
+        """Citations for ranked ``(doc_id, bm25_score)`` hits."""
+        # Normalize BM25 scores to 0-1 range against the best hit
+        max_score = top_scores[0][1] if top_scores else 1.0
 
-        results = []
-        for idx, score in indexed_scores[:top_k]:
-            if score <= 0:
-                continue
-            doc = self.local_corpus[idx]
-            # Normalize BM25 score to 0-1 range
-            max_score = indexed_scores[0][1] if indexed_scores else 1.0
-            normalized = score / max_score if max_score > 0 else 0.0
-
-            results.append(Citation(
-                title=doc["title"],
-                content=doc["content"],
-                doc_type=doc["doc_type"],
-                source=doc["source"],
-                relevance=round(normalized, 3),
-                section=doc.get("section"),
-                act=doc.get("act"),
-                url=doc.get("url"),
-                metadata=doc.get("metadata", {}),
-            ))
-        return results
+        return [
+            Citation.from_corpus(
+                self.local_corpus, idx, round(score / max_score if max_score > 0 else 0.0, 3)
+            )
+            for idx, score in top_scores
+        ]
 
     def _reciprocal_rank_fusion(
         self,
         *result_lists: List[Citation],
         k: int = 60,
         top_k: int = 5,
+        weights: Optional[Sequence[float]] = None,
     ) -> List[Citation]:
         """
         Combine multiple ranked result lists using Reciprocal Rank Fusion.
-        RRF_score(d) = sum(1 / (k + rank_i)) for each list i
+        RRF_score(d) = sum(w_i / (k + rank_i)) for each list i (w_i = 1
+        unless ``weights`` are given)
         """
-        # Build a mapping from document title+source → (best citation, rrf_score)
-        doc_scores: Dict[str, tuple[Citation, float]] = {}
+        # Map each document (corpus doc id, see Citation.key) → (first
+        # citation seen, rrf_score)
+        doc_scores: Dict[Hashable, tuple[Citation, float]] = {}
 
-        for result_list in result_lists:
+        for list_idx, result_list in enumerate(result_lists):
+            weight = weights[list_idx] if weights is not None else 1.0
             for rank, citation in enumerate(result_list):
-                doc_key = f"{citation.title}||{citation.source}"
-                rrf_contribution = 1.0 / (k + rank + 1)  # rank is 0-indexed
+                doc_key = citation.key
+                rrf_contribution = weight / (k + rank + 1)  # rank is 0-indexed
 
                 if doc_key in doc_scores:
                     existing_citation, existing_score = doc_scores[doc_key]
@@ -1254,31 +2015,225 @@ Return ONLY the corrected answer, no commentary."""
         # Normalize RRF scores to 0-1
         max_rrf = sorted_docs[0][1] if sorted_docs else 1.0
         return [
-            Citation(
-                title=citation.title,
-                content=citation.content,
-                doc_type=citation.doc_type,
-                source=citation.source,
-                relevance=round(score / max_rrf, 3) if max_rrf > 0 else 0.0,
-                section=citation.section,
-                act=citation.act,
-                url=citation.url,
-                metadata=citation.metadata,
-            )
+            citation.with_relevance(round(score / max_rrf, 3) if max_rrf > 0 else 0.0)
             for citation, score in sorted_docs[:top_k]
         ]
 
-    def retrieve(self, query: str, top_k: int = None) -> List[Citation]:
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = None,
+        return_analysis: bool = False,
+    ) -> Union[List[Citation], Tuple[List[Citation], QueryAnalysis]]:
         """
         Retrieve relevant documents from the legal corpus.
 
         Uses hybrid BM25 + lexical/semantic with RRF fusion when enabled.
-        Optionally re-ranks with a cross-encoder.
+        Optionally re-ranks with a cross-encoder. With ``return_analysis``
+        returns ``(citations, QueryAnalysis)`` so callers can reuse the
+        preprocessed query and its tokens.
+        """
+        analysis = self.analyze_query(query)
+        k = top_k or self.top_k
+        cache_key = self._cache_key("retrieve", query, k)
+        cached = self._response_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            citations = [Citation(**item) for item in cached]
+        else:
+            citations = self._retrieve_analyzed(analysis, k)
+            if cache_key:
+                self._response_cache.set(cache_key, [c.to_dict() for c in citations])
+        if return_analysis:
+            return citations, analysis
+        return citations
+
+    def retrieve_many(self, queries: Sequence[str], top_k: int = None) -> List[List[Citation]]:
+        """Retrieve for a batch of queries; element i equals ``retrieve(queries[i])``.
+
+        BM25 scores the whole batch as one sparse product
+        (``BM25Index.top_k_many``); the Chroma and dense paths embed every
+        query in one forward pass and search once for the batch. Cached queries
+        are answered from the response cache and skipped.
         """
         k = top_k or self.top_k
+        analyses = [self.analyze_query(query) for query in queries]
+        results: List[Optional[List[Citation]]] = [None] * len(queries)
+        cache_keys = [self._cache_key("retrieve", query, k) for query in queries]
+        pending: List[int] = []
+        for idx, cache_key in enumerate(cache_keys):
+            cached = self._response_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                results[idx] = [Citation(**item) for item in cached]
+            else:
+                pending.append(idx)
+        if not pending:
+            return results
+
+        batch = [analyses[idx] for idx in pending]
+        bm25_hits: List[Optional[List[Tuple[int, float]]]] = [None] * len(batch)
+        vector_hits: List[Optional[List[Citation]]] = [None] * len(batch)
+        if self.vector_store == "lexical" and self._bm25_index is not None:
+            candidates_k = self.rerank_top_n if self.use_reranker else max(k, 10)
+            bm25_hits = self._bm25_index.top_k_many(
+                [analysis.tokens for analysis in batch], candidates_k
+            )
+        elif self.vector_store == "chroma" and hasattr(self, 'collection'):
+            n_results = self.rerank_top_n if self.use_reranker else k
+            vector_hits = self._query_chroma(
+                [analysis.processed_query for analysis in batch], n_results
+            )
+        elif self.vector_store == "dense" and self._hybrid_enabled():
+            candidates_k = self.rerank_top_n if self.use_reranker else max(k, 10)
+            vector_hits = self._retrieve_hybrid(batch, candidates_k)
+        elif self.vector_store == "dense":
+            n_results = self.rerank_top_n if self.use_reranker else k
+            vector_hits = self._query_dense(
+                [analysis.processed_query for analysis in batch], n_results
+            )
+
+        for idx, analysis, bm25, vector in zip(pending, batch, bm25_hits, vector_hits):
+            citations = self._retrieve_analyzed(
+                analysis, k, bm25_hits=bm25, vector_citations=vector
+            )
+            results[idx] = citations
+            if cache_keys[idx]:
+                self._response_cache.set(cache_keys[idx], [c.to_dict() for c in citations])
+        return results
+
+    def _query_chroma(self, processed_queries: List[str], n_results: int) -> List[List[Citation]]:
+        """One Chroma round trip (and one embedding pass) for all queries."""
+        if len(processed_queries) == 1:
+            query_embeddings = [self.embeddings.embed_query(processed_queries[0])]
+        else:
+            query_embeddings = self.embeddings.embed_documents(processed_queries)
+
+        search_results = self.collection.query(
+            # chromadb < 0.5 only validates lists of Python floats
+            query_embeddings=[list(map(float, vector)) for vector in query_embeddings],
+            n_results=n_results,
+            include=['documents', 'metadatas', 'distances']
+        )
+
+        batch_results: List[List[Citation]] = []
+        for documents, metadatas, distances in zip(
+            search_results['documents'],
+            search_results['metadatas'],
+            search_results['distances'],
+        ):
+            results = []
+            for doc, metadata, distance in zip(documents, metadatas, distances):
+                score = max(0, 1 - distance)
+                results.append(Citation(
+                    content=doc,
+                    title=metadata.get('title', 'Unknown'),
+                    doc_type=metadata.get('doc_type', 'unknown'),
+                    source=metadata.get('source', 'unknown'),
+                    relevance=round(score, 3),
+                    section=metadata.get('section'),
+                    act=metadata.get('act'),
+                    url=metadata.get('url') or metadata.get('source_url') or metadata.get('pdf_url'),
+                    metadata=metadata
+                ))
+            batch_results.append(results)
+        return batch_results
+
+    def _query_dense(self, processed_queries: List[str], n_results: int) -> List[List[Citation]]:
+        """Dense-index hits for all queries, as citations of corpus doc ids."""
+        if len(processed_queries) == 1:
+            query_embeddings = [self.embeddings.embed_query(processed_queries[0])]
+        else:
+            query_embeddings = self.embeddings.embed_documents(processed_queries)
+        with self._update_lock:
+            removed = list(self._removed_doc_ids)
+
+        return [
+            [
+                Citation.from_corpus(self.local_corpus, doc_id, round(max(0.0, score), 3))
+                for doc_id, score in hits
+            ]
+            for hits in self._dense_index.search_many(query_embeddings, n_results, exclude=removed)
+        ]
+
+    def _hybrid_enabled(self) -> bool:
+        return self.hybrid_search and self._bm25_index is not None and self._dense_index is not None
+
+    def _retrieve_hybrid(self, batch: List[QueryAnalysis], candidates_k: int) -> List[List[Citation]]:
+        """BM25 and dense retrieval for ``batch``, run concurrently and fused.
+
+        Both legs return corpus doc ids, so weighted RRF
+        (``bm25_weight`` / ``semantic_weight``) merges them exactly. The
+        first leg to succeed is always used, however long it takes (a slow
+        answer beats "no relevant material"); the other then gets
+        ``hybrid_leg_timeout_ms`` more, and if it misses that (or fails) it
+        is left out of the fusion. A late leg that has not started is
+        cancelled; a running one finishes in the background.
+        """
+        pool = _get_shared_pool("hybrid-retrieval", HYBRID_WORKERS)
+        legs = {
+            "bm25": pool.submit(
+                self._bm25_index.top_k_many, [analysis.tokens for analysis in batch], candidates_k
+            ),
+            "dense": pool.submit(
+                self._query_dense, [analysis.processed_query for analysis in batch], candidates_k
+            ),
+        }
+        names = {future: name for name, future in legs.items()}
+        timeout = self.hybrid_leg_timeout_ms / 1000.0
+        deadline = None  # set once one leg has succeeded
+
+        outcomes: Dict[str, Optional[list]] = {"bm25": None, "dense": None}
+        pending = set(names)
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            done, pending = wait_futures(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                for future in pending:
+                    future.cancel()
+                    logger.warning(
+                        "Hybrid %s retrieval exceeded %.0f ms after the other leg, fusing without it",
+                        names[future], self.hybrid_leg_timeout_ms,
+                    )
+                    with self._hybrid_lock:
+                        self._hybrid_counters[f"{names[future]}_timeouts"] += 1
+                break
+            for future in done:
+                try:
+                    outcomes[names[future]] = future.result()
+                except Exception as e:
+                    logger.warning("Hybrid %s retrieval failed, fusing without it: %s", names[future], e)
+                    with self._hybrid_lock:
+                        self._hybrid_counters["errors"] += 1
+            if deadline is None and timeout > 0 and any(outcome is not None for outcome in outcomes.values()):
+                deadline = time.perf_counter() + timeout
+        with self._hybrid_lock:
+            self._hybrid_counters["queries"] += len(batch)
+
+        bm25_batch = outcomes["bm25"] or [None] * len(batch)
+        dense_batch = outcomes["dense"] or [None] * len(batch)
+        fused: List[List[Citation]] = []
+        for bm25_hits, dense_results in zip(bm25_batch, dense_batch):
+            ranked, weights = [], []
+            if bm25_hits is not None:
+                ranked.append(self._bm25_citations(bm25_hits))
+                weights.append(self.bm25_weight)
+            if dense_results is not None:
+                ranked.append(dense_results)
+                weights.append(self.semantic_weight)
+            fused.append(
+                self._reciprocal_rank_fusion(*ranked, top_k=candidates_k, weights=weights)
+            )
+        return fused
 
-        # Preprocess query
-        processed_query = self.preprocess_query(query)
+    def _retrieve_analyzed(
+        self,
+        analysis: QueryAnalysis,
+        k: int,
+        bm25_hits: Optional[List[Tuple[int, float]]] = None,
+        vector_citations: Optional[List[Citation]] = None,
+    ) -> List[Citation]:
+        """Retrieval for one analysed query. ``bm25_hits`` / ``vector_citations``
+        carry results already computed for a whole batch by ``retrieve_many``."""
+        processed_query = analysis.processed_query
 
         if self.vector_store == "lexical":
             # When BM25 is available it is strictly better than the
@@ -1288,23 +2243,30 @@ Return ONLY the corrected answer, no commentary."""
             candidates_k = self.rerank_top_n if self.use_reranker else max(k, 10)
 
             if self._bm25_index is not None:
-                bm25_results = self._retrieve_bm25(processed_query, candidates_k)
+                if bm25_hits is not None:
+                    bm25_results = self._bm25_citations(bm25_hits)
+                else:
+                    bm25_results = self._retrieve_bm25(
+                        processed_query, candidates_k, analysis.tokens
+                    )
                 if self.hybrid_search:
                     lexical_results = self._retrieve_from_local_corpus(
-                        processed_query, candidates_k
+                        processed_query, candidates_k, analysis.tokens
                     )
                     # Weighted RRF — BM25 gets the heavier weight because it
                     # already accounts for term frequency and document length.
                     fused = self._reciprocal_rank_fusion(
                         bm25_results,
-                        bm25_results,  # double-count BM25 to weight it higher
                         lexical_results,
                         top_k=candidates_k,
+                        weights=(2.0, 1.0),
                     )
                 else:
                     fused = bm25_results
             else:
-                fused = self._retrieve_from_local_corpus(processed_query, candidates_k)
+                fused = self._retrieve_from_local_corpus(
+                    processed_query, candidates_k, analysis.tokens
+                )
 
             # Re-rank with cross-encoder when configured.
             if self.use_reranker:
@@ -1315,32 +2277,21 @@ Return ONLY the corrected answer, no commentary."""
         results: List[Citation] = []
 
         if self.vector_store == "chroma" and hasattr(self, 'collection'):
-            query_embedding = self.embeddings.embed_query(processed_query)
-            n_results = self.rerank_top_n if self.use_reranker else k
-
-            search_results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results,
-                include=['documents', 'metadatas', 'distances']
-            )
-
-            for doc, metadata, distance in zip(
-                search_results['documents'][0],
-                search_results['metadatas'][0],
-                search_results['distances'][0]
-            ):
-                score = max(0, 1 - distance)
-                results.append(Citation(
-                    content=doc,
-                    title=metadata.get('title', 'Unknown'),
-                    doc_type=metadata.get('doc_type', 'unknown'),
-                    source=metadata.get('source', 'unknown'),
-                    relevance=round(score, 3),
-                    section=metadata.get('section'),
-                    act=metadata.get('act'),
-                    url=metadata.get('url') or metadata.get('source_url') or metadata.get('pdf_url'),
-                    metadata=metadata
-                ))
+            if vector_citations is not None:
+                results = vector_citations
+            else:
+                n_results = self.rerank_top_n if self.use_reranker else k
+                results = self._query_chroma([processed_query], n_results)[0]
+
+        elif self.vector_store == "dense":
+            if vector_citations is not None:
+                results = vector_citations
+            elif self._hybrid_enabled():
+                candidates_k = self.rerank_top_n if self.use_reranker else max(k, 10)
+                results = self._retrieve_hybrid([analysis], candidates_k)[0]
+            else:
+                n_results = self.rerank_top_n if self.use_reranker else k
+                results = self._query_dense([processed_query], n_results)[0]
 
         elif self.vector_store == "faiss" and hasattr(self, 'faiss_store'):
             n_results = self.rerank_top_n if self.use_reranker else k
@@ -1445,58 +2396,35 @@ Return ONLY the corrected answer, no commentary."""
     # ─── Answer Generation ───────────────────────────────────────────
 
     def _build_legal_prompt(self, query: str, context: str) -> str:
-        """Build the full prompt for the local LLM."""
-        return f"""You are JurisGPT, a citation-grounded legal research assistant specializing in Indian law for startups and corporate matters.
-
-CRITICAL RULES:
-1. ONLY answer based on the provided citations. Do not use external knowledge.
-   If the citations do not state something, do not claim it — even if you know
-   it is true in Indian law. Say "the provided corpus does not cover this"
-   for that part instead.
-2. ALWAYS cite your sources using [1], [2], etc. format in your answer.
-   Attach [i] only to statements that citation i actually contains — never to
-   related or adjacent points it does not state. An uncited true statement is
-   better than a falsely cited one; a declined answer is better than both.
-3. If the citations don't contain relevant information, say so explicitly.
-4. Never invent or hallucinate legal information.
-5. Be precise about legal terminology, sections, and acts.
-
-YOUR ROLE:
-- Answer legal research questions using the provided context
-- Cite specific statutes, sections, and case law from the context
-- Explain legal concepts clearly for non-lawyers
-- Highlight important caveats and when professional advice is needed
-
-RESPONSE FORMAT:
-- Start with a direct answer to the question
-- Reference citations inline using [1], [2], etc.
-- Mention specific acts, sections, and legal provisions
-- Use clear formatting with bullet points where appropriate
-- Keep responses focused and concise
-
-DO NOT:
-- Draft legal documents (this is a separate workflow)
-- Provide advice that requires knowing specific case facts
-- Make up legal provisions not in the citations
-- Give definitive legal advice on complex matters
+        """Build the full prompt for the local LLM: fixed prefix + request suffix."""
+        return LOCAL_PROMPT_PREFIX + self._local_prompt_suffix(query, context)
 
-CONTEXT FROM LEGAL CORPUS:
+    @staticmethod
+    def _local_prompt_suffix(query: str, context: str) -> str:
+        return f"""CONTEXT FROM LEGAL CORPUS:
 {context}
 
 USER QUESTION: {query}
 
 ANSWER:"""
 
-    def generate_answer(self, query: str, citations: List[Citation]) -> RAGResponse:
-        """
-        Generate a citation-grounded answer using the LLM.
-        Priority: Local Legal Llama → OpenAI → Retrieval-only
+    def _prepare_answer(
+        self, query: str, citations: List[Citation]
+    ) -> Tuple[Optional[RAGResponse], str, str, str]:
+        """``(early_response, confidence, limitations, context)`` for generation.
+
+        ``early_response`` is set when no LLM call should be made (no LLM
+        configured, or insufficient evidence); ``context`` is the numbered
+        citation block the prompts are built from.
         """
         confidence = self._assess_confidence(query, citations)
         limitations = self._generate_limitations(query, citations, confidence)
 
         if self.llm is None and self.local_llm is None:
-            return self._format_retrieval_only_response(query, citations, confidence, limitations)
+            return (
+                self._format_retrieval_only_response(query, citations, confidence, limitations),
+                confidence, limitations, "",
+            )
 
         if confidence == "insufficient":
             return RAGResponse(
@@ -1512,73 +2440,55 @@ ANSWER:"""
                 query=query,
                 model_used="retrieval-only",
                 grounded=False
+            ), confidence, limitations, ""
+
+        return None, confidence, limitations, self._answer_context(query, citations)
+
+    def _answer_context(self, query: str, citations: List[Citation]) -> str:
+        """Numbered source block for the answer prompt, packed to the token budget."""
+        if self.context_token_budget <= 0:
+            return self._citation_context(citations)
+        if self._context_packer is None:
+            context_packer = _import_data_module("context_packer")
+            self._approx_token_count = context_packer.token_counter()[1]
+            self._context_packer = context_packer.ContextPacker(
+                self._tokenize, self._count_context_tokens, self.context_token_budget
             )
+        return self._context_packer.pack(query, citations, self._term_weight())
+
+    def _count_context_tokens(self, text: str) -> int:
+        """Tokens in ``text``: the local model's tokenizer once it is loaded,
+        else tiktoken or the estimate (never loads the model just to count)."""
+        if self.local_llm is not None and getattr(self.local_llm, "is_loaded", False):
+            return self.local_llm.count_tokens(text)
+        return self._approx_token_count(text)
 
-        # Build context from citations
-        context = "\n\n---\n\n".join([
+    @staticmethod
+    def _citation_context(citations: List[Citation]) -> str:
+        """Build context from citations (whole contents)"""
+        return "\n\n---\n\n".join([
             f"[{i+1}] {c.title} ({c.doc_type}, {c.source})\nRelevance: {c.relevance:.0%}\n{c.content}"
             for i, c in enumerate(citations)
         ])
 
-        # ── Try Local Legal Llama first ──────────────────────────────
-        if self.local_llm is not None:
-            try:
-                prompt = self._build_legal_prompt(query, context)
-                answer = self.local_llm.generate(prompt, max_tokens=2048, temperature=0.3)
-                if answer.strip():
-                    follow_ups = self._generate_follow_ups(query, citations)
-                    return RAGResponse(
-                        answer=answer,
-                        citations=citations,
-                        confidence=confidence,
-                        limitations=limitations,
-                        follow_up_questions=follow_ups,
-                        query=query,
-                        model_used="local_legal_llama",
-                        grounded=confidence in ["high", "medium"]
-                    )
-            except Exception as e:
-                logger.error("Local LLM generation failed: %s", e)
-
-        # ── Anthropic / OpenAI LLM ────────────────────────────────────
-        if self.llm is not None and self.llm != "local_legal_llama":
-            try:
-                system_prompt = f"""You are JurisGPT, a citation-grounded legal research assistant specializing in Indian law for startups and corporate matters.
-
-CRITICAL RULES:
-1. ONLY answer based on the provided citations. Do not use external knowledge.
-   If the citations do not state something, do not claim it — even if you know
-   it is true in Indian law. Say "the provided corpus does not cover this"
-   for that part instead.
-2. ALWAYS cite your sources using [1], [2], etc. format in your answer.
-   Attach [i] only to statements that citation i actually contains — never to
-   related or adjacent points it does not state. An uncited true statement is
-   better than a falsely cited one; a declined answer is better than both.
-3. If the citations don't contain relevant information, say so explicitly.
-4. Never invent or hallucinate legal information.
-5. Be precise about legal terminology, sections, and acts.
-6. Structure your response with clear headings when appropriate.
-7. Provide actionable advice when the question warrants it.
-
-CONTEXT FROM LEGAL CORPUS:
-{context}
-"""
-                from langchain_core.prompts import ChatPromptTemplate
-                prompt = ChatPromptTemplate.from_messages([
-                    ("system", system_prompt),
-                    ("human", "{query}")
-                ])
-
-                chain = prompt | self.llm
-                response = chain.invoke({"context": context, "query": query})
-                # Claude models with thinking return content as a list of
-                # blocks; downstream (pydantic schemas, SSE, evaluator) all
-                # require a plain string.
-                answer = self._content_to_text(response.content)
-                answer = self._verify_citations(answer, citations)
+    def _generate_local(
+        self,
+        query: str,
+        citations: List[Citation],
+        confidence: str,
+        limitations: str,
+        context: str,
+        cancel: Optional[threading.Event] = None,
+    ) -> Optional[RAGResponse]:
+        """Answer with the local Legal Llama, or None when it fails or is empty.
 
+        Setting ``cancel`` abandons the request in the model's queue.
+        """
+        try:
+            prompt = self._build_legal_prompt(query, context)
+            answer = self.local_llm.generate(prompt, max_tokens=2048, temperature=0.3, cancel=cancel)
+            if answer.strip():
                 follow_ups = self._generate_follow_ups(query, citations)
-                model_name = "anthropic" if self.llm_type == "anthropic" else "openai"
                 return RAGResponse(
                     answer=answer,
                     citations=citations,
@@ -1586,22 +2496,149 @@ CONTEXT FROM LEGAL CORPUS:
                     limitations=limitations,
                     follow_up_questions=follow_ups,
                     query=query,
-                    model_used=model_name,
+                    model_used="local_legal_llama",
                     grounded=confidence in ["high", "medium"]
                 )
+        except Exception as e:
+            logger.error("Local LLM generation failed: %s", e)
+        return None
+
+    def _chat_prompt(self, context: str):
+        """System prompt (cacheable instructions, then sources) + question.
+
+        The instructions are their own system block so that, on Anthropic,
+        a ``cache_control`` breakpoint can end the prefix right after them;
+        the prompt is cached once it reaches the model's minimum cacheable
+        length. Messages are built directly, not from a template, so braces
+        in the sources are never parsed as template fields.
+        """
+        from langchain_core.messages import SystemMessage
+        from langchain_core.prompts import ChatPromptTemplate
+
+        instructions: Dict[str, Any] = {"type": "text", "text": CHAT_SYSTEM_PROMPT}
+        if self.llm_type == "anthropic":
+            instructions["cache_control"] = {"type": "ephemeral"}
+        system = SystemMessage(content=[
+            instructions,
+            {"type": "text", "text": f"CONTEXT FROM LEGAL CORPUS:\n{context}\n"},
+        ])
+        return ChatPromptTemplate.from_messages([system, ("human", "{query}")])
+
+    def _chat_chain(self, context: str):
+        """Prompt | chat model chain for answering and streaming (Anthropic / OpenAI)."""
+        return self._chat_prompt(context) | self.llm
+
+    def _chat_llm_response(
+        self, query: str, citations: List[Citation], confidence: str, limitations: str, answer: str
+    ) -> RAGResponse:
+        follow_ups = self._generate_follow_ups(query, citations)
+        return RAGResponse(
+            answer=answer,
+            citations=citations,
+            confidence=confidence,
+            limitations=limitations,
+            follow_up_questions=follow_ups,
+            query=query,
+            model_used=self._chat_model_name(),
+            grounded=confidence in ["high", "medium"]
+        )
+
+    def _chat_llm_failure(
+        self, query: str, citations: List[Citation], confidence: str, limitations: str, error: Exception
+    ) -> RAGResponse:
+        logger.error("LLM generation failed: %s", error)
+        fallback_limitations = (
+            f"{limitations} Live answer generation is currently unavailable, so a retrieval-only response is shown."
+        )
+        return self._format_retrieval_only_response(query, citations, confidence, fallback_limitations)
+
+    def _uses_chat_llm(self) -> bool:
+        return self.llm is not None and self.llm != "local_legal_llama"
+
+    def generate_answer(self, query: str, citations: List[Citation]) -> RAGResponse:
+        """
+        Generate a citation-grounded answer using the LLM.
+        Priority: Local Legal Llama → OpenAI → Retrieval-only
+        """
+        early, confidence, limitations, context = self._prepare_answer(query, citations)
+        if early is not None:
+            return early
+
+        # ── Try Local Legal Llama first ──────────────────────────────
+        if self.local_llm is not None:
+            response = self._generate_local(query, citations, confidence, limitations, context)
+            if response is not None:
+                return response
+
+        # ── Anthropic / OpenAI LLM ────────────────────────────────────
+        if self._uses_chat_llm():
+            try:
+                response = self._chat_chain(context).invoke({"context": context, "query": query})
+                # Claude models with thinking return content as a list of
+                # blocks; downstream (pydantic schemas, SSE, evaluator) all
+                # require a plain string.
+                answer = self._content_to_text(response.content)
+                answer = self._verify_citations(answer, citations)
+                return self._chat_llm_response(query, citations, confidence, limitations, answer)
             except Exception as e:
-                logger.error("LLM generation failed: %s", e)
-                fallback_limitations = (
-                    f"{limitations} Live answer generation is currently unavailable, so a retrieval-only response is shown."
+                return self._chat_llm_failure(query, citations, confidence, limitations, e)
+
+        return self._format_retrieval_only_response(query, citations, confidence, limitations)
+
+    async def agenerate_answer(self, query: str, citations: List[Citation]) -> RAGResponse:
+        """``generate_answer`` without blocking the event loop.
+
+        The chat model is called through its async client (``ainvoke``) and
+        the citation audit through ``anthropic.AsyncAnthropic``; the local
+        Legal Llama has no async API and runs in a worker thread.
+        Cancelling the awaiting task cancels the in-flight provider request.
+        Context packing (tokenizing every passage) runs on the retrieval pool.
+        """
+        early, confidence, limitations, context = await self._run_retrieval(self._prepare_answer, query, citations)
+        if early is not None:
+            return early
+
+        if self.local_llm is not None:
+            cancel = threading.Event()
+            try:
+                response = await asyncio.to_thread(
+                    self._generate_local, query, citations, confidence, limitations, context, cancel
                 )
-                return self._format_retrieval_only_response(query, citations, confidence, fallback_limitations)
+            except asyncio.CancelledError:
+                cancel.set()
+                raise
+            if response is not None:
+                return response
+
+        if self._uses_chat_llm():
+            try:
+                response = await self._chat_chain(context).ainvoke({"context": context, "query": query})
+                answer = self._content_to_text(response.content)
+                answer = await self._averify_citations(answer, citations)
+                return self._chat_llm_response(query, citations, confidence, limitations, answer)
+            except Exception as e:
+                return self._chat_llm_failure(query, citations, confidence, limitations, e)
 
         return self._format_retrieval_only_response(query, citations, confidence, limitations)
 
+    def _chat_model_name(self) -> str:
+        return "anthropic" if self.llm_type == "anthropic" else "openai"
+
+    def streaming_model(self, citations: List[Citation], confidence: str) -> str:
+        """``model_used`` for a streamed answer, known before generation starts."""
+        if not citations or confidence == "insufficient":
+            return "local-lexical"
+        if self.local_llm is not None:
+            return "local_legal_llama"
+        if self._uses_chat_llm():
+            return self._chat_model_name()
+        return "local-lexical"
+
     def stream_answer(self, query: str, citations: List[Citation]) -> Iterator[str]:
         """
         Stream a citation-grounded answer token-by-token.
-        Uses OpenAI streaming when available, falls back to retrieval-only.
+        Priority (as in generate_answer): Local Legal Llama → Anthropic /
+        OpenAI streaming → retrieval-only.
         """
         confidence = self._assess_confidence(query, citations)
         limitations = self._generate_limitations(query, citations, confidence)
@@ -1612,43 +2649,25 @@ CONTEXT FROM LEGAL CORPUS:
             yield response.answer
             return
 
-        # Build context from citations
-        context = "\n\n---\n\n".join([
-            f"[{i+1}] {c.title} ({c.doc_type}, {c.source})\nRelevance: {c.relevance:.0%}\n{c.content}"
-            for i, c in enumerate(citations)
-        ])
+        context = self._answer_context(query, citations)
 
-        # Try Anthropic/OpenAI streaming (best quality)
-        if self.llm is not None and self.llm != "local_legal_llama":
+        if self.local_llm is not None:
+            streamed = False
             try:
-                system_prompt = f"""You are JurisGPT, a citation-grounded legal research assistant specializing in Indian law for startups and MSMEs.
-
-CRITICAL RULES:
-1. ONLY answer based on the provided citations. Do not use external knowledge.
-   If the citations do not state something, do not claim it — even if you know
-   it is true in Indian law. Say "the provided corpus does not cover this"
-   for that part instead.
-2. ALWAYS cite your sources using [1], [2], etc. format in your answer.
-   Attach [i] only to statements that citation i actually contains — never to
-   related or adjacent points it does not state. An uncited true statement is
-   better than a falsely cited one; a declined answer is better than both.
-3. If the citations don't contain relevant information, say so explicitly.
-4. Never invent or hallucinate legal information.
-5. Be precise about legal terminology, sections, and acts.
-6. Structure your answer clearly with headings if needed.
-7. Provide practical, actionable advice when possible.
-8. Reference specific sections, acts, and legal provisions from the citations.
-
-CONTEXT FROM LEGAL CORPUS:
-{context}
-"""
-                from langchain_core.prompts import ChatPromptTemplate
-                prompt = ChatPromptTemplate.from_messages([
-                    ("system", system_prompt),
-                    ("human", "{query}")
-                ])
+                for token in self.local_llm.stream_generate(
+                    self._build_legal_prompt(query, context), max_tokens=2048, temperature=0.3
+                ):
+                    streamed = True
+                    yield token
+            except Exception as e:
+                logger.error("Local LLM streaming failed: %s", e)
+            if streamed:
+                return
 
-                chain = prompt | self.llm
+        # Try Anthropic/OpenAI streaming (best quality)
+        if self._uses_chat_llm():
+            try:
+                chain = self._chat_chain(context)
 
                 # Try streaming if supported
                 try:
@@ -1671,6 +2690,245 @@ CONTEXT FROM LEGAL CORPUS:
         response = self._format_retrieval_only_response(query, citations, confidence, limitations)
         yield response.answer
 
+    async def astream_answer(self, query: str, citations: List[Citation]) -> AsyncIterator[str]:
+        """``stream_answer`` without blocking the event loop.
+
+        Chat models stream through their async client (``astream``); the
+        local Legal Llama streams from a worker thread. Closing the iterator
+        (or cancelling the task consuming it, e.g. when the SSE client
+        disconnects) closes the provider stream or stops local generation
+        after the current token.
+        """
+        async with aclosing(self._astream_tokens(query, citations, {})) as tokens:
+            async for token in tokens:
+                yield token
+
+    async def astream_answer_events(
+        self, query: str, citations: List[Citation]
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """``("token", text)`` as the answer streams, then ``("correction", answer)``.
+
+        The correction is the citation audit of the finished answer
+        (``_averify_citations``, chat-model answers only, as in
+        ``agenerate_answer``); it is emitted only when the audit changed
+        the answer, and replaces the streamed text as a whole.
+        """
+        async with aclosing(self._astream_answer_events(query, citations, {})) as events:
+            async for event in events:
+                yield event
+
+    async def astream_query_events(self, query: str, top_k: int = None) -> AsyncIterator[Tuple[str, Any]]:
+        """Streaming ``aquery``, in front of the same exact and semantic answer caches.
+
+        Yields either a single ``("response", RAGResponse)`` — a cache hit or
+        an unusable query, to be sent whole — or ``("citations", citations)``
+        as soon as retrieval finishes, followed by the
+        ``astream_answer_events`` events. An answer streamed to the end is
+        stored in both caches (corrected, if the audit changed it); an
+        abandoned stream, or one the model cut short, is not.
+        """
+        invalid, query = self._validate_query(query)
+        if invalid is not None:
+            yield "response", invalid
+            return
+
+        cache_key, cached = self._cached_answer(query, top_k)
+        if cached is not None:
+            yield "response", cached
+            return
+
+        citations, semantic_entry, semantic_hit = await self._run_retrieval(
+            self._retrieve_for_answer, query, top_k
+        )
+        if semantic_hit is not None:
+            yield "response", semantic_hit
+            return
+        yield "citations", citations
+
+        origin: Dict[str, Any] = {}
+        parts: List[str] = []
+        corrected = None
+        async with aclosing(self._astream_answer_events(query, citations, origin)) as events:
+            async for kind, text in events:
+                if kind == "token":
+                    parts.append(text)
+                else:
+                    corrected = text
+                yield kind, text
+
+        if not origin.get("complete", True):
+            return
+        response = self._streamed_response(query, citations, origin.get("model"), corrected or "".join(parts))
+        if response is not None:
+            self._store_answer(cache_key, semantic_entry, response)
+
+    def _streamed_response(
+        self, query: str, citations: List[Citation], model: Optional[str], answer: str
+    ) -> Optional[RAGResponse]:
+        """The ``RAGResponse`` a finished LLM stream stands for (None for fallbacks)."""
+        if model not in ("anthropic", "openai", "local_legal_llama") or not answer.strip():
+            return None
+        confidence = self._assess_confidence(query, citations)
+        return RAGResponse(
+            answer=answer.strip(),
+            citations=citations,
+            confidence=confidence,
+            limitations=self._generate_limitations(query, citations, confidence),
+            follow_up_questions=self._generate_follow_ups(query, citations),
+            query=query,
+            model_used=model,
+            grounded=confidence in ["high", "medium"],
+        )
+
+    async def _astream_answer_events(
+        self, query: str, citations: List[Citation], origin: Dict[str, Any]
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """``astream_answer_events``; fills ``origin`` as ``_astream_tokens`` does."""
+        parts: List[str] = []
+        async with aclosing(self._astream_tokens(query, citations, origin)) as tokens:
+            async for token in tokens:
+                parts.append(token)
+                yield "token", token
+
+        if origin.get("model") in ("anthropic", "openai"):
+            answer = "".join(parts)
+            corrected = await self._averify_citations(answer, citations)
+            if corrected != answer:
+                yield "correction", corrected
+
+    async def _astream_tokens(
+        self, query: str, citations: List[Citation], origin: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        """Answer tokens; ``origin["model"]`` records which model produced them.
+
+        ``origin["complete"]`` is set to False when the answer was cut short:
+        the local model stopped at its deadline, or a model failed after
+        streaming part of the answer. A failure before the first token falls
+        back to the next model; a failure after it is raised, since the
+        client already holds part of the answer.
+        """
+        confidence = self._assess_confidence(query, citations)
+        limitations = self._generate_limitations(query, citations, confidence)
+
+        if not citations or confidence == "insufficient":
+            response = self._format_retrieval_only_response(query, citations, confidence, limitations)
+            origin["model"] = response.model_used
+            yield response.answer
+            return
+
+        context = await self._run_retrieval(self._answer_context, query, citations)
+
+        if self.local_llm is not None:
+            prompt = self._build_legal_prompt(query, context)
+            origin["model"] = "local_legal_llama"
+            streamed = False
+            # Set when the consumer goes away; drops the request from the model's queue
+            cancel = threading.Event()
+            truncated = threading.Event()
+            try:
+                async with aclosing(self._aiterate_in_thread(
+                    partial(
+                        self.local_llm.stream_generate, prompt, max_tokens=2048, temperature=0.3,
+                        cancel=cancel, truncated=truncated,
+                    ),
+                    stop=cancel,
+                )) as tokens:
+                    async for token in tokens:
+                        streamed = True
+                        yield token
+            except Exception as e:
+                if streamed:
+                    origin["complete"] = False
+                    logger.error("Local LLM streaming failed mid-answer: %s", e)
+                    raise
+                logger.error("Local LLM streaming failed: %s", e)
+            if streamed:
+                if truncated.is_set():
+                    origin["complete"] = False
+                return
+
+        if self._uses_chat_llm():
+            origin["model"] = self._chat_model_name()
+            streamed = False
+            try:
+                chain = self._chat_chain(context)
+                try:
+                    async with aclosing(chain.astream({"query": query})) as chunks:
+                        async for chunk in chunks:
+                            if hasattr(chunk, 'content') and chunk.content:
+                                text = self._content_to_text(chunk.content)
+                                if text:
+                                    streamed = True
+                                    yield text
+                    return
+                except Exception as stream_error:
+                    if streamed:
+                        raise
+                    logger.warning("Streaming not supported, falling back to invoke: %s", stream_error)
+                    response = await chain.ainvoke({"query": query})
+                    yield self._content_to_text(response.content)
+                    return
+            except Exception as e:
+                if streamed:
+                    origin["complete"] = False
+                    logger.error("LLM streaming failed mid-answer: %s", e)
+                    raise
+                logger.error("LLM streaming failed: %s", e)
+
+        response = self._format_retrieval_only_response(query, citations, confidence, limitations)
+        origin["model"] = response.model_used
+        yield response.answer
+
+    @staticmethod
+    async def _aiterate_in_thread(
+        make_iterator: Callable[[], Iterator[str]], stop: Optional[threading.Event] = None
+    ) -> AsyncIterator[str]:
+        """Drive a blocking iterator on a worker thread, yielding its items.
+
+        Closing this iterator sets ``stop`` and stops the worker after its
+        current item. The iterator runs in a copy of the caller's context
+        (request-scoped context variables such as the inference priority).
+        """
+        loop = asyncio.get_running_loop()
+        items: asyncio.Queue = asyncio.Queue()
+        stop = stop or threading.Event()
+        finished = object()
+
+        def put(item, error=None):
+            try:
+                loop.call_soon_threadsafe(items.put_nowait, (item, error))
+            except RuntimeError:  # event loop already closed
+                stop.set()
+
+        def produce():
+            try:
+                iterator = make_iterator()
+                try:
+                    for item in iterator:
+                        if stop.is_set():
+                            break
+                        put(item)
+                finally:
+                    close = getattr(iterator, "close", None)
+                    if close is not None:
+                        close()
+            except Exception as exc:
+                put(finished, exc)
+                return
+            put(finished)
+
+        loop.run_in_executor(None, contextvars.copy_context().run, produce)
+        try:
+            while True:
+                item, error = await items.get()
+                if item is finished:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            stop.set()
+
     # ─── Retrieval-Only Formatting ───────────────────────────────────
 
     def _format_retrieval_only_response(
@@ -1831,6 +3089,122 @@ CONTEXT FROM LEGAL CORPUS:
             "Are there any recent amendments to consider?"
         ]
 
+    # ─── Response Cache ──────────────────────────────────────────────
+
+    @staticmethod
+    def _create_response_cache():
+        """Build the retrieval / answer cache from RAG_CACHE_* settings.
+
+        RAG_CACHE_SQLITE_PATH enables the on-disk tier shared by all workers;
+        RAG_CACHE_ENABLED=false turns caching off entirely.
+        """
+        if os.getenv("RAG_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+            return None
+        rag_cache = _import_data_module("rag_cache")
+        return rag_cache.ResponseCache(
+            max_entries=int(os.getenv("RAG_CACHE_MAX_ENTRIES", "1024")),
+            ttl_seconds=float(os.getenv("RAG_CACHE_TTL_SECONDS", "3600")),
+            sqlite_path=os.getenv("RAG_CACHE_SQLITE_PATH") or None,
+        )
+
+    @staticmethod
+    def _create_semantic_cache():
+        """Build the paraphrase answer cache from RAG_SEMANTIC_CACHE_* settings."""
+        if os.getenv("RAG_SEMANTIC_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+            return None
+        try:
+            semantic_cache = _import_data_module("semantic_cache")
+        except ImportError:
+            logger.warning("numpy not installed, semantic answer cache disabled")
+            return None
+        return semantic_cache.SemanticCache(
+            similarity_threshold=float(os.getenv("RAG_SEMANTIC_CACHE_SIMILARITY", "0.92")),
+            min_citation_overlap=float(os.getenv("RAG_SEMANTIC_CACHE_MIN_CITATION_OVERLAP", "0.6")),
+            max_entries=int(os.getenv("RAG_SEMANTIC_CACHE_MAX_ENTRIES", "512")),
+            ttl_seconds=float(os.getenv("RAG_CACHE_TTL_SECONDS", "3600")),
+        )
+
+    def _semantic_cache_entry(self, analysis: QueryAnalysis, citations: List[Citation]):
+        """``(vector, citation ids, guard tokens)`` describing one answered query.
+
+        The vector comes from the configured embedding model, or hashed
+        character trigrams of the query tokens in lexical-only deployments.
+        Numeric tokens (section numbers, years) must match exactly.
+        """
+        vector = None
+        if self.embeddings is not None:
+            try:
+                vector = self.embeddings.embed_query(analysis.processed_query)
+            except Exception as e:
+                logger.warning("Query embedding for the semantic cache failed: %s", e)
+                return None
+        else:
+            vector = _import_data_module("semantic_cache").hashed_ngram_vector(analysis.tokens)
+        citation_ids = [c.key for c in citations]
+        guard = [token for token in analysis.tokens if any(char.isdigit() for char in token)]
+        return vector, citation_ids, guard
+
+    def _compute_corpus_version(self) -> str:
+        """Short id of the indexed corpus: its source files (size + mtime),
+        provenance and this module's own code (via the fingerprint)."""
+        try:
+            fingerprint = self._corpus_fingerprint()
+        except ImportError:
+            fingerprint = None
+        payload = json.dumps(
+            {
+                "source": self.corpus_source,
+                "loaded_files": self.loaded_corpus_files,
+                "documents": len(self.local_corpus),
+                "revision": self._corpus_revision,
+                "corpus_as_of": self.corpus_as_of,
+                "fingerprint": fingerprint,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _cache_key(self, kind: str, query: str, top_k: int) -> Optional[str]:
+        if self._response_cache is None:
+            return None
+        config = {
+            "vector_store": str(self.vector_store),
+            "embedding_type": self.embedding_type,
+            "hybrid_search": self.hybrid_search,
+            "use_reranker": self.use_reranker,
+            "rerank_top_n": self.rerank_top_n,
+            "bm25_weight": self.bm25_weight,
+            "semantic_weight": self.semantic_weight,
+        }
+        if kind == "answer":
+            config.update({
+                "llm_type": self.llm_type,
+                "high_confidence_threshold": self.high_confidence_threshold,
+                "medium_confidence_threshold": self.medium_confidence_threshold,
+                "low_confidence_threshold": self.low_confidence_threshold,
+            })
+        return _import_data_module("rag_cache").make_cache_key(
+            kind, query, top_k, config, self.corpus_version
+        )
+
+    def _is_cacheable_response(self, response: RAGResponse) -> bool:
+        """Never pin the retrieval-only fallback of a failed LLM call."""
+        llm_configured = self.llm is not None or self.local_llm is not None
+        return not (llm_configured and response.model_used == "local-lexical")
+
+    def clear_response_cache(self):
+        """Drop this pipeline's in-memory cached retrievals and answers.
+
+        The shared SQLite tier is left alone: its keys carry the corpus
+        version, so entries for an old corpus are never hit and expire by
+        TTL, while entries already written for the new one stay valid.
+        """
+        if self._response_cache is not None:
+            self._response_cache.clear_memory()
+        if self._semantic_cache is not None:
+            self._semantic_cache.clear()
+
     # ─── Main Query & Chat Methods ───────────────────────────────────
 
     def query(self, query: str, top_k: int = None) -> RAGResponse:
@@ -1842,6 +3216,67 @@ CONTEXT FROM LEGAL CORPUS:
         4. Assesses confidence
         5. Generates citation-grounded answer
         """
+        invalid, query = self._validate_query(query)
+        if invalid is not None:
+            return invalid
+
+        cache_key, cached = self._cached_answer(query, top_k)
+        if cached is not None:
+            return cached
+
+        citations, semantic_entry, semantic_hit = self._retrieve_for_answer(query, top_k)
+        if semantic_hit is not None:
+            return semantic_hit
+
+        response = self.generate_answer(query, citations)
+        self._store_answer(cache_key, semantic_entry, response)
+        return response
+
+    async def aquery(self, query: str, top_k: int = None) -> RAGResponse:
+        """``query`` for async callers.
+
+        Retrieval runs on the bounded retrieval pool (``aretrieve``) and
+        generation through ``agenerate_answer``, so the event loop keeps
+        serving other requests meanwhile. Cancelling the awaiting task
+        abandons the request: an in-flight retrieval still finishes on its
+        worker thread, but no LLM call is started or left running.
+        """
+        invalid, query = self._validate_query(query)
+        if invalid is not None:
+            return invalid
+
+        cache_key, cached = self._cached_answer(query, top_k)
+        if cached is not None:
+            return cached
+
+        citations, semantic_entry, semantic_hit = await self._run_retrieval(
+            self._retrieve_for_answer, query, top_k
+        )
+        if semantic_hit is not None:
+            return semantic_hit
+
+        response = await self.agenerate_answer(query, citations)
+        self._store_answer(cache_key, semantic_entry, response)
+        return response
+
+    async def aretrieve(
+        self,
+        query: str,
+        top_k: int = None,
+        return_analysis: bool = False,
+    ) -> Union[List[Citation], Tuple[List[Citation], QueryAnalysis]]:
+        """``retrieve`` on the bounded retrieval pool (RAG_RETRIEVAL_WORKERS)."""
+        return await self._run_retrieval(self.retrieve, query, top_k, return_analysis)
+
+    @staticmethod
+    async def _run_retrieval(func: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        pool = _get_shared_pool("rag-retrieval", RETRIEVAL_WORKERS)
+        return await loop.run_in_executor(pool, partial(func, *args))
+
+    @staticmethod
+    def _validate_query(query: str) -> Tuple[Optional[RAGResponse], str]:
+        """``(validation_response, query)``; the response is set for unusable input."""
         # Input validation
         if not query or not query.strip():
             return RAGResponse(
@@ -1856,14 +3291,63 @@ CONTEXT FROM LEGAL CORPUS:
                 query=query or "",
                 model_used="validation",
                 grounded=False,
-            )
+            ), query or ""
         query = query.strip()
         if len(query) > 2000:
             query = query[:2000]
             logger.warning("Query truncated from >2000 characters to 2000")
+        return None, query
+
+    def _cached_answer(self, query: str, top_k: Optional[int]) -> Tuple[Optional[str], Optional[RAGResponse]]:
+        """``(cache_key, cached_response)`` from the exact-match answer cache."""
+        cache_key = self._cache_key("answer", query, top_k or self.top_k)
+        cached = self._response_cache.get(cache_key) if cache_key else None
+        if cached is None:
+            return cache_key, None
+        # Cached values are shared with the cache; build fresh objects.
+        return cache_key, RAGResponse(**{
+            **cached,
+            "citations": [Citation(**item) for item in cached["citations"]],
+            "served_from_cache": True,
+        })
+
+    def _retrieve_for_answer(
+        self, query: str, top_k: Optional[int]
+    ) -> Tuple[List[Citation], Optional[tuple], Optional[RAGResponse]]:
+        """Retrieve, then consult the paraphrase cache.
+
+        Returns ``(citations, semantic_entry, semantic_hit)``.
+        """
+        citations, analysis = self.retrieve(query, top_k, return_analysis=True)
+
+        # Paraphrase cache in front of generation; only worth it when an LLM
+        # call is what a hit saves.
+        semantic_entry = None
+        if self._semantic_cache is not None and (self.llm is not None or self.local_llm is not None):
+            semantic_entry = self._semantic_cache_entry(analysis, citations)
+        if semantic_entry is not None:
+            vector, citation_ids, guard = semantic_entry
+            cached_response = self._semantic_cache.lookup(vector, citation_ids, guard)
+            if cached_response is not None:
+                return citations, semantic_entry, replace(
+                    cached_response,
+                    query=query,
+                    citations=list(cached_response.citations),
+                    served_from_cache=True,
+                )
+        return citations, semantic_entry, None
 
-        citations = self.retrieve(query, top_k)
-        return self.generate_answer(query, citations)
+    def _store_answer(self, cache_key: Optional[str], semantic_entry: Optional[tuple], response: RAGResponse):
+        if not self._is_cacheable_response(response):
+            return
+        if cache_key:
+            self._response_cache.set(cache_key, {
+                **asdict(replace(response, citations=[])),
+                "citations": [c.to_dict() for c in response.citations],
+            })
+        if semantic_entry is not None:
+            vector, citation_ids, guard = semantic_entry
+            self._semantic_cache.add(vector, citation_ids, response, guard)
 
     def get_corpus_stats(self) -> CorpusStats:
         """Return current corpus provenance for API diagnostics and evaluations."""
@@ -1871,16 +3355,53 @@ CONTEXT FROM LEGAL CORPUS:
             self._init_local_corpus()
 
         by_doc_type: Dict[str, int] = {}
-        for document in self.local_corpus:
-            doc_type = document.get("doc_type", "unknown")
-            by_doc_type[doc_type] = by_doc_type.get(doc_type, 0) + 1
+        if hasattr(self.local_corpus, "doc_type_counts"):
+            # Snapshot-backed corpus: counted from its doc-type table
+            # instead of decoding every record.
+            by_doc_type = self.local_corpus.doc_type_counts()
+        else:
+            for document in self.local_corpus:
+                doc_type = document.get("doc_type", "unknown")
+                by_doc_type[doc_type] = by_doc_type.get(doc_type, 0) + 1
+        for doc_idx in self._removed_doc_ids:
+            doc_type = self.local_corpus[doc_idx].get("doc_type") or "unknown"
+            if by_doc_type.get(doc_type, 0) > 1:
+                by_doc_type[doc_type] -= 1
+            else:
+                by_doc_type.pop(doc_type, None)
 
         return CorpusStats(
             source=self.corpus_source,
-            total_documents=len(self.local_corpus),
+            total_documents=len(self.local_corpus) - len(self._removed_doc_ids),
             by_doc_type=dict(sorted(by_doc_type.items())),
             loaded_files=self.loaded_corpus_files.copy(),
             cloud_error=self.corpus_error,
+            load_timings=dict(self.corpus_load_timings),
+            cache_stats={
+                **(self._response_cache.stats() if self._response_cache else {}),
+                **{
+                    f"semantic_{name}": value
+                    for name, value in (
+                        self._semantic_cache.stats() if self._semantic_cache else {}
+                    ).items()
+                },
+                **{
+                    f"rerank_{name}": value
+                    for name, value in (
+                        self._reranker.stats() if self._reranker is not None else {}
+                    ).items()
+                },
+                **(
+                    {f"hybrid_{name}": value for name, value in self._hybrid_counters.items()}
+                    if self._hybrid_counters["queries"] else {}
+                ),
+                **{
+                    f"verify_{name}": value
+                    for name, value in (
+                        self._verifier.stats() if self._verifier is not None else {}
+                    ).items()
+                },
+            },
         )
 
     def chat(self, query: str) -> str:
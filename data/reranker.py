@@ -0,0 +1,171 @@
+"""
+Production cross-encoder re-ranking for JurisGPTRAG.
+
+The plain ``CrossEncoder.predict`` over every candidate's full text is too
+slow to leave on: judgments run to tens of thousands of words, of which the
+model reads only its first 512 tokens anyway — usually the cause title and
+headnote rather than the passage that matched. ``CrossEncoderReranker``
+
+- scores the best-matching window of each passage (``best_window``: the
+  ``passage_words``-word span covering the most query terms) instead of the
+  document head;
+- keeps ``(query, doc)`` scores in an LRU, so repeated and batched queries
+  only score new candidates;
+- optionally runs the model int8-quantized (torch dynamic quantization) or
+  on ONNX Runtime (``load_cross_encoder``);
+- scores in small batches against a per-query latency budget, giving up
+  (``score`` returns None, the caller keeps the fused order) as soon as the
+  next batch would not fit.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Collection, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+RUNTIMES = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+
+def load_cross_encoder(model_name: str, runtime: str = "torch", onnx_file: Optional[str] = None):
+    """Load a sentence-transformers ``CrossEncoder`` on the given runtime.
+
+    ONNX needs sentence-transformers >= 4 (``backend="onnx"``); ``onnx-int8``
+    loads ``onnx_file``, a quantized export shipped in the model repo. An
+    unavailable ONNX runtime falls back to torch.
+    """
+    from sentence_transformers import CrossEncoder
+
+    if runtime not in RUNTIMES:
+        raise ValueError(f"unknown reranker runtime {runtime!r}, expected one of {RUNTIMES}")
+
+    if runtime.startswith("onnx"):
+        kwargs: dict = {"backend": "onnx"}
+        if runtime == "onnx-int8" and onnx_file:
+            kwargs["model_kwargs"] = {"file_name": onnx_file}
+        try:
+            return CrossEncoder(model_name, **kwargs)
+        except (TypeError, ImportError, ValueError) as e:
+            logger.warning("ONNX cross-encoder unavailable, using torch: %s", e)
+            runtime = "torch"
+
+    model = CrossEncoder(model_name)
+    if runtime == "torch-int8":
+        import torch
+
+        model.model = torch.quantization.quantize_dynamic(
+            model.model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return model
+
+
+def best_window(
+    text: str,
+    query_terms: Collection[str],
+    tokenize: Callable[[str], List[str]],
+    max_words: int,
+) -> str:
+    """The ``max_words``-word span of ``text`` that best matches the query.
+
+    Candidate windows start every ``max_words // 2`` words; the one covering
+    the most distinct query terms wins, then the most term occurrences, then
+    the earliest. Short texts are returned unchanged.
+    """
+    words = text.split()
+    if len(words) <= max_words or not query_terms:
+        return text if len(words) <= max_words else " ".join(words[:max_words])
+
+    stride = max(1, max_words // 2)
+    best_start, best_score = 0, (-1, -1)
+    for start in range(0, len(words) - stride, stride):
+        matched = [token for token in tokenize(" ".join(words[start:start + max_words])) if token in query_terms]
+        score = (len(set(matched)), len(matched))
+        if score > best_score:
+            best_start, best_score = start, score
+    return " ".join(words[best_start:best_start + max_words])
+
+
+class CrossEncoderReranker:
+    """Windowed, cached, latency-budgeted scoring with a cross-encoder."""
+
+    def __init__(
+        self,
+        model: Any,
+        tokenize: Callable[[str], List[str]],
+        passage_words: int = 200,
+        cache_size: int = 4096,
+        budget_ms: float = 0.0,
+        batch_size: int = 8,
+    ):
+        self.model = model
+        self.tokenize = tokenize
+        self.passage_words = passage_words
+        self.cache_size = cache_size
+        self.budget_seconds = budget_ms / 1000.0
+        self.batch_size = batch_size
+        self._scores: "OrderedDict[Tuple[bytes, Any], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Running estimate of one batch's latency, to stop before overrunning.
+        self._batch_seconds = 0.0
+        self._counters = {"hits": 0, "scored": 0, "over_budget": 0}
+
+    def score(self, query: str, items: Sequence[Any]) -> Optional[List[float]]:
+        """Scores for ``items`` (objects with ``key`` and ``content``), in order.
+
+        Returns None when the latency budget would be exceeded; scores
+        computed up to that point are still cached.
+        """
+        started = time.perf_counter()
+        query_id = hashlib.blake2b(query.encode("utf-8"), digest_size=16).digest()
+        scores: List[Optional[float]] = [None] * len(items)
+        missing: List[int] = []
+        with self._lock:
+            for idx, item in enumerate(items):
+                cache_key = (query_id, item.key)
+                cached = self._scores.get(cache_key)
+                if cached is None:
+                    missing.append(idx)
+                else:
+                    self._scores.move_to_end(cache_key)
+                    scores[idx] = cached
+            self._counters["hits"] += len(items) - len(missing)
+
+        query_terms = frozenset(self.tokenize(query))
+        for batch_start in range(0, len(missing), self.batch_size):
+            elapsed = time.perf_counter() - started
+            if self.budget_seconds and elapsed + self._batch_seconds > self.budget_seconds:
+                with self._lock:
+                    self._counters["over_budget"] += 1
+                return None
+
+            batch = missing[batch_start:batch_start + self.batch_size]
+            pairs = [
+                (query, best_window(items[idx].content, query_terms, self.tokenize, self.passage_words))
+                for idx in batch
+            ]
+            batch_started = time.perf_counter()
+            batch_scores = self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+            batch_seconds = time.perf_counter() - batch_started
+            self._batch_seconds = (
+                batch_seconds if not self._batch_seconds else 0.7 * self._batch_seconds + 0.3 * batch_seconds
+            )
+
+            with self._lock:
+                for idx, value in zip(batch, batch_scores):
+                    scores[idx] = float(value)
+                    self._scores[(query_id, items[idx].key)] = float(value)
+                while len(self._scores) > self.cache_size:
+                    self._scores.popitem(last=False)
+                self._counters["scored"] += len(batch)
+        return scores
+
+    def clear(self):
+        with self._lock:
+            self._scores.clear()
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, "entries": len(self._scores)}
@@ -0,0 +1,143 @@
+"""
+Semantic near-duplicate answer cache for JurisGPTRAG.
+
+The exact-match cache in ``rag_cache.py`` misses paraphrases ("how to
+register a pvt ltd" / "private limited company registration steps"). This
+cache keeps the query vectors of recently answered questions in a fixed-size
+in-memory matrix and reuses a stored answer when a new query is
+
+- close enough in cosine similarity (``similarity_threshold``), and
+- retrieved mostly the same citations (Jaccard overlap of citation ids at
+  least ``min_citation_overlap``), and
+- carries the same guard tokens (section numbers, years, ...) — two queries
+  differing only in "Section 7" vs "Section 8" must never share an answer.
+
+The index holds a few hundred entries, so an exact brute-force cosine search
+over the float32 matrix is faster than any approximate index would be.
+"""
+
+import logging
+import threading
+import time
+import zlib
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def hashed_ngram_vector(tokens: Iterable[str], dim: int = 1024) -> np.ndarray:
+    """Feature-hashed character-trigram vector of ``tokens``.
+
+    Stand-in query embedding when no embedding model is loaded (lexical
+    deployments): trigrams make "register" / "registration" overlap.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for token in tokens:
+        padded = f"#{token}#"
+        for start in range(len(padded) - 2):
+            vector[zlib.crc32(padded[start:start + 3].encode("utf-8")) % dim] += 1.0
+    return vector
+
+
+def jaccard(left: FrozenSet[Hashable], right: FrozenSet[Hashable]) -> float:
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+
+class SemanticCache:
+    """Ring buffer of (query vector, citation ids, guard, value) entries."""
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.92,
+        min_citation_overlap: float = 0.6,
+        max_entries: int = 512,
+        ttl_seconds: float = 3600.0,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.min_citation_overlap = min_citation_overlap
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: list = [None] * self.max_entries
+        self._next_slot = 0
+        self._size = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stores": 0}
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector))
+        if not norm:
+            return None
+        return vector / norm
+
+    def lookup(
+        self,
+        vector: Sequence[float],
+        citation_ids: Iterable[Hashable],
+        guard: Iterable[Hashable] = (),
+    ) -> Optional[Any]:
+        """Return the stored value of the most similar qualifying entry."""
+        query = self._normalize(vector)
+        citation_ids = frozenset(citation_ids)
+        guard = frozenset(guard)
+        now = time.time()
+        with self._lock:
+            if query is not None and self._size and query.shape[0] == self._vectors.shape[1]:
+                similarities = self._vectors[:self._size] @ query
+                for slot in np.argsort(-similarities, kind="stable").tolist():
+                    if similarities[slot] < self.similarity_threshold:
+                        break
+                    expires_at, entry_citations, entry_guard, value = self._entries[slot]
+                    if (
+                        expires_at > now
+                        and entry_guard == guard
+                        and jaccard(entry_citations, citation_ids) >= self.min_citation_overlap
+                    ):
+                        self._counters["hits"] += 1
+                        return value
+            self._counters["misses"] += 1
+            return None
+
+    def add(
+        self,
+        vector: Sequence[float],
+        citation_ids: Iterable[Hashable],
+        value: Any,
+        guard: Iterable[Hashable] = (),
+    ):
+        """Remember ``value``, overwriting the oldest entry when full."""
+        normalized = self._normalize(vector)
+        if normalized is None:
+            return
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != normalized.shape[0]:
+                self._vectors = np.zeros((self.max_entries, normalized.shape[0]), dtype=np.float32)
+                self._size = 0
+                self._next_slot = 0
+            slot = self._next_slot
+            self._vectors[slot] = normalized
+            self._entries[slot] = (
+                time.time() + self.ttl_seconds,
+                frozenset(citation_ids),
+                frozenset(guard),
+                value,
+            )
+            self._next_slot = (slot + 1) % self.max_entries
+            self._size = min(self._size + 1, self.max_entries)
+            self._counters["stores"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries = [None] * self.max_entries
+            self._size = 0
+            self._next_slot = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, "entries": self._size}
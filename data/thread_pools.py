@@ -0,0 +1,29 @@
+"""
+Process-wide thread pools for the RAG pipeline.
+
+The backend re-executes ``rag_pipeline.py`` on every corpus reload, so that
+module's globals belong to one load and a pool kept there would be created
+again, and its threads left behind, by each reload. This module is imported
+once through ``sys.modules`` (see ``_import_data_module``), so every
+pipeline in the process, before and after reloads, shares the same pools.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+_pools: Dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+
+
+def shared_pool(name: str, max_workers: int) -> ThreadPoolExecutor:
+    """The thread pool ``name``, created with ``max_workers`` threads on first use.
+
+    Later calls get the same pool, whatever ``max_workers`` they pass.
+    """
+    with _lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+            _pools[name] = pool
+        return pool
@@ -1819,6 +1819,15 @@ function ChatPageContent() {
               }
               break;
             }
+            case "correction": {
+              // Citation verification rewrote the answer: replace the streamed text.
+              const correctionPayload = parsed as { answer?: string };
+              if (typeof correctionPayload?.answer === "string") {
+                streamedContent = correctionPayload.answer;
+                scheduleFlush();
+              }
+              break;
+            }
             case "citations":
               citations = parsed as Citation[];
               break;